@@ -62,6 +62,7 @@ def create_app(config="config.DevelopmentConfig"):
 
 def register_extensions(flask_app):
     """Register Flask extensions."""
+    from app.core import plan_check, query_stats, routing_session, unit_of_work
     from app.core.factory import factory
 
     if flask_app.config["DB_ENGINE"] == "MONGODB":
@@ -70,8 +71,13 @@ def register_extensions(flask_app):
     elif flask_app.config["DB_ENGINE"] == "POSTGRES":
         db.init_app(flask_app)
         migrate.init_app(flask_app, db)
+        query_stats.init_app(flask_app)
+        routing_session.init_app(flask_app, db)
+        if flask_app.config["UNIT_OF_WORK"]:
+            unit_of_work.init_app(flask_app)
 
     factory.init_app(flask_app, db)
+    plan_check.init_app(flask_app)
     ma.init_app(flask_app)
     cors.init_app(flask_app, resources={r"/api/*": {"origins": "*"}}, allow_headers="*")
 
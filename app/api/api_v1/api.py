@@ -1,4 +1,7 @@
+from config import Config
+
 from .endpoints import customer, file_manager,faq,safety,promotion,contact_us,owned_otherbrand_cylinder
+from .endpoints import storage
 
 def init_app(app):
     """
@@ -13,4 +16,9 @@ def init_app(app):
     app.register_blueprint(safety, url_prefix="/api/v1/safetys")
     app.register_blueprint(contact_us, url_prefix="/api/v1/contactus")
     app.register_blueprint(file_manager, url_prefix="/api/v1/customer/filemanager/files")
+    if Config.OBJECT_STORAGE == "local":
+        # reminder: the urls of the local objects are signed with the secret
+        if not Config.LOCAL_STORAGE_SECRET:
+            raise RuntimeError("LOCAL_STORAGE_SECRET is not set")
+        app.register_blueprint(storage, url_prefix="/api/v1/customer/storage")
     app.register_blueprint(owned_otherbrand_cylinder, url_prefix="/api/v1/owned_otherbrand_cylinder")
@@ -2,6 +2,7 @@ from .customer_view import customer
 from .file_manager import file_manager
 from .owned_otherbrand_cylinder_view import owned_otherbrand_cylinder
 from .safety_view import safety
+from .storage_view import storage
 from .contact_us_view import contact_us
 from .faq_view import faq
 from .promotion_view import promotion
@@ -1,5 +1,9 @@
+import json
+
+import click
 import pinject
-from flask import Blueprint, request
+from flask import Blueprint, Response, request, stream_with_context
+from marshmallow import ValidationError
 
 from app.controllers import CustomerController
 
@@ -13,6 +17,7 @@ from app.repositories import (
 from app.schema import (
     AddPinSchema,
     ConfirmTokenSchema,
+    CustomerExportArgSchema,
     CustomerInfoSchema,
     CustomerRequestArgSchema,
     CustomerSchema,
@@ -23,6 +28,7 @@ from app.schema import (
     PinChangeSchema,
     PinResetRequestSchema,
     PinResetSchema,
+    ProfileImageArgSchema,
     RefreshTokenSchema,
     RequestResetPinSchema,
     ResendTokenSchema,
@@ -31,8 +37,13 @@ from app.schema import (
     TokenLoginSchema,
     UpdatePhoneSchema,
 )
-from app.services import AuthService, CephObjectStorage, RedisService
-from app.utils import arg_validator, auth_required, validator
+from app.services import (
+    AuthService,
+    CephObjectStorage,
+    ObjectStorageBindingSpec,
+    RedisService,
+)
+from app.utils import EXPORT_MIMETYPES, arg_validator, auth_required, validator
 
 customer = Blueprint("customer", __name__)
 
@@ -48,12 +59,13 @@ obj_graph = pinject.new_object_graph(
         CephObjectStorage,
         CustomerSchema,
     ],
+    binding_specs=[ObjectStorageBindingSpec()],
 )
 customer_controller: CustomerController = obj_graph.provide(CustomerController)
 
 
 @customer.route("/", methods=["GET"])
-@arg_validator(schema=CustomerRequestArgSchema, param="page|per_page")
+@arg_validator(schema=CustomerRequestArgSchema, param="page|per_page|cursor|count")
 def get_customers():
     """
     ---
@@ -62,19 +74,44 @@ def get_customers():
       parameters:
         - in: query
           name: page
-          required: true
+          required: false
           schema:
             type: string
-          description: the page to show
+          description: the page to show, ignored when a cursor is passed
         - in: query
           name: per_page
           required: true
           schema:
             type: string
           description: the total records on a page
+        - in: query
+          name: cursor
+          required: false
+          schema:
+            type: string
+          description: the X-Next-Cursor of the previous page, empty for the first
+            page. Pages read with a cursor stay fast however deep they are
+        - in: query
+          name: count
+          required: false
+          schema:
+            type: string
+            enum: [none, exact, cached, estimated]
+          description: how the X-Total-Count header is counted, none by default.
+            cached counts are up to a minute old, estimated ones come from the
+            database statistics
       responses:
         '200':
           description: returns details of all customers
+          headers:
+            X-Next-Cursor:
+              schema:
+                type: string
+              description: cursor of the next page, missing on the last page
+            X-Total-Count:
+              schema:
+                type: integer
+              description: total of customers, missing when count is none
           content:
             application/json:
               schema:
@@ -88,6 +125,130 @@ def get_customers():
     return handle_result(result, schema=CustomerSchema, many=True)
 
 
+@customer.route("/export", methods=["GET"])
+@auth_required()
+@arg_validator(
+    schema=CustomerExportArgSchema,
+    param="format|status|retailer_id|created_from|created_to",
+)
+def export_customers():
+    """
+    ---
+    get:
+      description: export the customers matching the filters as a stream, the
+        whole table when no filter is passed
+      security:
+        - bearerAuth: []
+      parameters:
+        - in: query
+          name: format
+          required: false
+          schema:
+            type: string
+            enum: [ndjson, csv]
+          description: format of the export, ndjson by default
+        - in: query
+          name: status
+          required: false
+          schema:
+            type: string
+          description: status of the customers
+        - in: query
+          name: retailer_id
+          required: false
+          schema:
+            type: string
+          description: id of the retailer who registered the customers
+        - in: query
+          name: created_from
+          required: false
+          schema:
+            type: string
+            format: date-time
+          description: earliest creation date of the customers, included
+        - in: query
+          name: created_to
+          required: false
+          schema:
+            type: string
+            format: date-time
+          description: latest creation date of the customers, excluded
+      responses:
+        '200':
+          description: returns one customer per line
+          content:
+            application/x-ndjson:
+              schema: CustomerSchema
+            text/csv:
+              schema:
+                type: string
+        '401':
+          description: unauthorised
+      tags:
+          - Customer
+    """
+    query_param = CustomerExportArgSchema().load(request.args)
+    result = customer_controller.export(query_param)
+    return Response(
+        stream_with_context(result.value),
+        status=result.status_code,
+        mimetype=EXPORT_MIMETYPES[query_param["format"]],
+        headers={
+            "Content-Disposition": f"attachment; filename=customers.{query_param['format']}"  # noqa
+        },
+    )
+
+
+@customer.cli.command("export")
+@click.option("--format", "export_format", default="ndjson")
+@click.option("--status", "status")
+@click.option("--retailer-id", "retailer_id")
+@click.option("--created-from", "created_from")
+@click.option("--created-to", "created_to")
+@click.option("--output", "-o", "output", default="-", type=click.File("w"))
+@click.option("--ceph-key", "ceph_key", help="upload the export to ceph instead")
+def export_customers_command(
+    export_format, status, retailer_id, created_from, created_to, output, ceph_key
+):
+    """
+    export the customers matching the filters to a file, stdout or ceph
+    """
+    options = {
+        "format": export_format,
+        "status": status,
+        "retailer_id": retailer_id,
+        "created_from": created_from,
+        "created_to": created_to,
+    }
+    try:
+        query_param = CustomerExportArgSchema().load(
+            {key: value for key, value in options.items() if value is not None}
+        )
+    except ValidationError as exc:
+        raise click.BadParameter(str(exc.messages))
+    result = customer_controller.export(query_param)
+    if ceph_key:
+        customer_controller.ceph_object_storage.save_stream(ceph_key, result.value)
+        return
+    for chunk in result.value:
+        output.write(chunk)
+
+
+@customer.cli.command("cleanup-profile-images")
+@click.option("--dry-run", "dry_run", is_flag=True, help="only count the orphans")
+@click.option(
+    "--min-age", "min_age", type=int, help="seconds an orphan is kept after upload"
+)
+def cleanup_profile_images_command(dry_run, min_age):
+    """
+    delete the profile images no customer references from the object storage
+    """
+    result = customer_controller.delete_orphaned_profile_images(
+        dry_run=dry_run, min_age=min_age
+    )
+    click.echo(json.dumps(result.value))
+
+
 @customer.route("account/register", methods=["POST"])
 @validator(schema=CustomerSignUpSchema)
 def create_customer_account():
@@ -1516,8 +1677,38 @@ def change_password_request():
 
 
 @customer.route("/accounts/profile-images/", methods=["GET"])
+@arg_validator(schema=ProfileImageArgSchema, param="per_page|cursor")
 def saved_images():
-    result = customer_controller.customer_profile_images()
+    """
+    ---
+    get:
+      description: list the saved profile images a page at a time
+      parameters:
+        - in: query
+          name: per_page
+          required: false
+          schema:
+            type: integer
+          description: images of a page, 1000 at most
+        - in: query
+          name: cursor
+          required: false
+          schema:
+            type: string
+          description: X-Next-Cursor of the previous page, empty for the first page
+      responses:
+        '200':
+          description: returns the metadata of the images of the page
+          headers:
+            X-Next-Cursor:
+              schema:
+                type: string
+              description: cursor of the next page, missing on the last page
+      tags:
+          - Customer
+    """
+    query_param = ProfileImageArgSchema().load(request.args)
+    result = customer_controller.customer_profile_images(query_param)
     return handle_result(result)
 
 
@@ -1528,5 +1719,40 @@ def saved_image(customer_id):
     return handle_result(result)
 
 
-
-
+@customer.route("/accounts/profile-images/<string:customer_id>/content", methods=["GET"])
+@arg_validator(schema=CustomerRequestArgSchema, param="customer_id")
+def saved_image_content(customer_id):
+    """
+    ---
+    get:
+      description: stream the profile image of a customer from the object storage
+      parameters:
+        - in: path
+          name: customer_id
+          required: true
+          schema:
+            type: string
+          description: id of the customer
+      responses:
+        '200':
+          description: returns the profile image
+          content:
+            image/*:
+              schema:
+                type: string
+                format: binary
+        '404':
+          description: not found
+      tags:
+          - Customer
+    """
+    result = customer_controller.customer_profile_image_content(customer_id)
+    metadata = result.value["metadata"]
+    response = Response(
+        result.value["chunks"],
+        status=result.status_code,
+        mimetype=metadata.get("ContentType") or "application/octet-stream",
+    )
+    if metadata.get("ContentLength") is not None:
+        response.content_length = metadata["ContentLength"]
+    return response
@@ -1,7 +1,7 @@
 import pinject
 from flask import Blueprint, request
 from app.controllers import FaqController
-from app.core.service_result import handle_result
+from app.core.service_result import handle_result, not_modified
 from app.repositories import FaqRepository
 from app.schema import FaqGetSchema, FaqSchema, FaqRequestArgSchema
 from app.utils import arg_validator, auth_required, validator
@@ -32,11 +32,17 @@ def get_faq():
               schema:
                 type: array
                 items: FaqGetSchema
+        '304':
+          description: the list did not change since the ETag in If-None-Match
       tags:
           - FAQ
     """
+    etag = faq_controller.etag()
+    response = not_modified(etag)
+    if response:
+        return response
     result = faq_controller.all_faq()
-    return handle_result(result, schema=FaqGetSchema, many=True)
+    return handle_result(result, schema=FaqGetSchema, many=True, etag=etag)
 
 
 @faq.route("/faq", methods=["POST"])
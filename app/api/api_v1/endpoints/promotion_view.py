@@ -1,7 +1,7 @@
 import pinject
 from flask import Blueprint, request
 from app.controllers import PromotionController
-from app.core.service_result import handle_result
+from app.core.service_result import handle_result, not_modified
 from app.repositories import PromotionRepository
 from app.schema import PromotionGetSchema, PromotionSchema, PromotionRequestArgSchema
 from app.utils import arg_validator, auth_required, validator
@@ -32,12 +32,17 @@ def get_promotion():
               schema:
                 type: array
                 items: PromotionSchema
+        '304':
+          description: the list did not change since the ETag in If-None-Match
       tags:
           - Promotion
     """
-
+    etag = promotion_controller.etag()
+    response = not_modified(etag)
+    if response:
+        return response
     result = promotion_controller.index()
-    return handle_result(result, schema=PromotionGetSchema, many=True)
+    return handle_result(result, schema=PromotionGetSchema, many=True, etag=etag)
 
 
 @promotion.route("/promotion", methods=["POST"])
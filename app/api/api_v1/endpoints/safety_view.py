@@ -1,7 +1,7 @@
 import pinject
 from flask import Blueprint, request
 from app.controllers import SafetyController
-from app.core.service_result import handle_result
+from app.core.service_result import handle_result, not_modified
 from app.repositories import SafetyRepository
 from app.schema import SafetyGetSchema, SafetySchema, SafetyRequestArgSchema, \
     SafetyPatchSchema
@@ -32,12 +32,17 @@ def get_safety():
               schema:
                 type: array
                 items: SafetySchema
+        '304':
+          description: the list did not change since the ETag in If-None-Match
       tags:
           - Safety
     """
-
+    etag = safety_controller.etag()
+    response = not_modified(etag)
+    if response:
+        return response
     result = safety_controller.index()
-    return handle_result(result, schema=SafetyGetSchema, many=True)
+    return handle_result(result, schema=SafetyGetSchema, many=True, etag=etag)
 
 
 @safety.route("/safety", methods=["POST"])
@@ -0,0 +1,87 @@
+from flask import Blueprint, Response, request, send_file
+
+from app.core.exceptions import AppException
+from app.services import LocalObjectStorage
+
+storage = Blueprint("storage", __name__)
+
+local_object_storage = LocalObjectStorage()
+
+
+@storage.route("/", methods=["POST"])
+def upload_object():
+    """
+    ---
+    post:
+      description: upload an object to the local object storage with the fields
+        of a pre signed post
+      requestBody:
+        required: true
+        content:
+          multipart/form-data:
+            schema:
+              type: object
+              properties:
+                key:
+                  type: string
+                expires:
+                  type: string
+                signature:
+                  type: string
+                file:
+                  type: string
+                  format: binary
+      responses:
+        '204':
+          description: object uploaded
+        '401':
+          description: unauthorised
+      tags:
+          - Storage
+    """
+    obj_id = request.form.get("key")
+    if not local_object_storage.verify(
+        "POST", obj_id, request.form.get("expires"), request.form.get("signature")
+    ):
+        raise AppException.Unauthorized(error_message="invalid or expired signature")
+    file = request.files.get("file")
+    if file is None:
+        raise AppException.BadRequest(error_message="missing file")
+    local_object_storage.upload(obj_id, file.stream)
+    return Response(status=204)
+
+
+@storage.route("/<path:obj_id>", methods=["GET"])
+def get_object(obj_id):
+    """
+    ---
+    get:
+      description: download an object of the local object storage with a pre
+        signed url
+      parameters:
+        - in: path
+          name: obj_id
+          required: true
+          schema:
+            type: string
+          description: key of the object
+      responses:
+        '200':
+          description: returns the object
+        '401':
+          description: unauthorised
+        '404':
+          description: not found
+      tags:
+          - Storage
+    """
+    if not local_object_storage.verify(
+        "GET", obj_id, request.args.get("expires"), request.args.get("signature")
+    ):
+        raise AppException.Unauthorized(error_message="invalid or expired signature")
+    # reminder: the server sends the file with sendfile through wsgi.file_wrapper
+    return send_file(
+        local_object_storage.open_path(obj_id),
+        mimetype=local_object_storage.content_type(obj_id),
+        conditional=True,
+    )
@@ -54,6 +54,7 @@ if __name__ == "__main__":
 
         # Application context should be registered before importing from app
         from app.controllers import CustomerController
+        from app.core.unit_of_work import unit_of_work
         from app.events import EventSubscriptionHandler
         from app.repositories import (
             CustomerRepository,
@@ -61,7 +62,12 @@ if __name__ == "__main__":
             RegistrationRepository,
         )
         from app.schema import CustomerSchema
-        from app.services import AuthService, CephObjectStorage, RedisService
+        from app.services import (
+            AuthService,
+            CephObjectStorage,
+            ObjectStorageBindingSpec,
+            RedisService,
+        )
 
         for msg in consumer:
             data = json.loads(msg.value)
@@ -79,8 +85,10 @@ if __name__ == "__main__":
                     CustomerSchema,
                     CephObjectStorage,
                 ],
+                binding_specs=[ObjectStorageBindingSpec()],
             )
             customer_controller = obj_graph.provide(CustomerController)
             event_subscription_handler = EventSubscriptionHandler(customer_controller)
-            event_subscription_handler.event_handler(data)
+            with unit_of_work():
+                event_subscription_handler.event_handler(data)
             logger.info("message status: successfully consumed\n")
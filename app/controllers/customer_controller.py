@@ -1,17 +1,20 @@
 import inspect
+import io
 import random
 import secrets
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from string import digits
 
 import pytz
 from flask import current_app, request
+from PIL import Image
 
 from app.core import Result
 from app.core.exceptions import AppException
 from app.core.notifications.notifier import Notifier
 from app.core.repository import SQLBaseRepository
-from app.enums import AccountStatusEnum
+from app.core.service_interfaces import StorageServiceInterface
+from app.enums import AccountStatusEnum, CountModeEnum
 from app.events import ServiceEventSubscription, extract_valid_data
 from app.notifications import EmailNotificationHandler, SMSNotificationHandler
 from app.repositories import (
@@ -19,8 +22,16 @@ from app.repositories import (
     LoginAttemptRepository,
     RegistrationRepository,
 )
-from app.services import AuthService, CephObjectStorage
-from app.utils import split_full_name
+from app.schema import CustomerSchema
+from app.services import AuthService
+from app.utils import (
+    export_lines,
+    image_mimetype,
+    is_profile_image_key,
+    resize_image,
+    split_full_name,
+)
+from config import Config
 
 utc = pytz.UTC
 OBJECT = "customer"
@@ -37,7 +48,7 @@ class CustomerController(Notifier):
         registration_repository: RegistrationRepository,
         login_attempt_repository: LoginAttemptRepository,
         auth_service: AuthService,
-        ceph_object_storage: CephObjectStorage,
+        ceph_object_storage: StorageServiceInterface,
     ):
         self.customer_repository = customer_repository
         self.registration_repository = registration_repository
@@ -46,17 +57,44 @@ class CustomerController(Notifier):
         self.ceph_object_storage = ceph_object_storage
 
     def index(self, query_param: dict):
-        result = self.customer_repository.paginate(
-            page=int(query_param.get("page", 1)),
-            per_page=int(query_param.get("per_page", 10)),
-        )
+        count = query_param.get("count") or CountModeEnum.none.value
+        if "cursor" in query_param:
+            result = self.customer_repository.cursor_paginate(
+                filter_param={},
+                cursor=query_param.get("cursor") or None,
+                per_page=int(query_param.get("per_page", 10)),
+                count=count,
+            )
+        else:
+            result = self.customer_repository.paginate(
+                page=int(query_param.get("page", 1)),
+                per_page=int(query_param.get("per_page", 10)),
+                count=count,
+            )
         for customer in result:
             if customer.profile_image:
                 customer.profile_image = self.ceph_object_storage.pre_signed_get(
                     customer.profile_image
                 )
+                self.sign_profile_image_variants(customer)
         return Result(result, 200)
 
+    def export(self, query_param: dict):
+        filter_param = {
+            key: query_param[key]
+            for key in ("status", "retailer_id")
+            if query_param.get(key)
+        }
+        customers = self.customer_repository.stream_customers(
+            filter_param,
+            created_from=query_param.get("created_from"),
+            created_to=query_param.get("created_to"),
+        )
+        lines = export_lines(
+            customers, CustomerSchema(exclude=["pre_signed_post"]), query_param["format"]
+        )
+        return Result(lines, 200)
+
     def register(self, obj_data):
         assert obj_data, ASSERT_OBJECT_IS_DICT
 
@@ -64,7 +102,9 @@ class CustomerController(Notifier):
         query_data = {"phone_number": phone_number}
 
         try:
-            customer = self.customer_repository.find(query_data)
+            customer = self.customer_repository.find_by_phone_number(
+                phone_number, cached=False
+            )
         except AppException.NotFoundException:
             try:
                 register_customer = self.registration_repository.find(query_data)
@@ -210,7 +250,9 @@ class CustomerController(Notifier):
         phone_number = obj_data.get("phone_number")
         pin = obj_data.get("pin")
         try:
-            customer = self.customer_repository.find({"phone_number": phone_number})
+            customer = self.customer_repository.find_by_phone_number(
+                phone_number, cached=False
+            )
         except AppException.NotFoundException:
             # reminder: log login attempt
             self.login_attempt(phone_number=phone_number, ip_address=request.remote_addr)
@@ -269,29 +311,32 @@ class CustomerController(Notifier):
         if customer.profile_image:
             # generate ceph server url to retrieve profile image
             customer.profile_image = self.ceph_object_storage.pre_signed_get(obj_id)
+            self.sign_profile_image_variants(customer)
 
         return Result(customer, 200)
 
     def set_profile_image(self, obj_id):
         assert obj_id, ASSERT_OBJECT_ID
 
-        try:
-            customer = self.customer_repository.find_by_id(obj_id)
-        except AppException.NotFoundException:
-            raise AppException.NotFoundException(
-                error_message=f"{OBJECT} with id {obj_id} does not exists",
-            )
+        # reminder: the variants are derived again once the new image is uploaded,
+        # the url to retrieve the profile image is generated by the update
+        customer = self.update(
+            obj_id, {"profile_image": str(obj_id), "profile_image_variants": None}
+        ).value
 
         # generate ceph server url to save profile image
         customer.pre_signed_post = self.ceph_object_storage.pre_signed_post(obj_id)
 
-        self.update(obj_id, {"profile_image": obj_id})
-
-        # generate ceph server url to retrieve profile image
-        customer.profile_image = self.ceph_object_storage.pre_signed_get(obj_id)
-
         return Result(customer, 200)
 
+    def sign_profile_image_variants(self, customer):
+        # generate ceph server urls to retrieve the variants of the profile image
+        if customer.profile_image_variants:
+            customer.profile_image_variants = {
+                name: self.ceph_object_storage.pre_signed_get(obj_id)
+                for name, obj_id in customer.profile_image_variants.items()
+            }
+
     def add_pin(self, obj_data):
         assert obj_data, ASSERT_OBJECT_IS_DICT
 
@@ -325,7 +370,7 @@ class CustomerController(Notifier):
 
         phone_number = obj_data.get("phone_number")
         try:
-            customer = self.customer_repository.find({"phone_number": phone_number})
+            customer = self.customer_repository.find_by_phone_number(phone_number)
         except AppException.NotFoundException:
             raise AppException.NotFoundException(
                 error_message=f"{OBJECT} with phone number {phone_number} does not exist"
@@ -453,7 +498,9 @@ class CustomerController(Notifier):
 
         phone_number = obj_data.get("phone_number")
         try:
-            customer = self.customer_repository.find({"phone_number": phone_number})
+            customer = self.customer_repository.find_by_phone_number(
+                phone_number, cached=False
+            )
         except AppException.NotFoundException:
             raise AppException.NotFoundException(
                 error_message=f"{OBJECT} with phone number {phone_number} does not exists"
@@ -545,7 +592,7 @@ class CustomerController(Notifier):
 
         phone_number = obj_data.get("phone_number")
         try:
-            customer = self.customer_repository.find({"phone_number": phone_number})
+            customer = self.customer_repository.find_by_phone_number(phone_number)
         except AppException.NotFoundException:
             raise AppException.NotFoundException(
                 error_message=f"{OBJECT} with phone number {phone_number} does not exists"
@@ -565,7 +612,7 @@ class CustomerController(Notifier):
         auth_token = obj_data.get("token")
         customer_id = obj_data.get("customer_id")
         try:
-            self.customer_repository.find({"phone_number": phone_number})
+            self.customer_repository.find_by_phone_number(phone_number)
         except AppException.NotFoundException:
             try:
                 customer = self.customer_repository.find_by_id(customer_id)
@@ -644,6 +691,7 @@ class CustomerController(Notifier):
             customer.profile_image = self.ceph_object_storage.pre_signed_get(
                 customer.profile_image
             )
+            self.sign_profile_image_variants(customer)
 
         return Result(customer, 200)
 
@@ -700,7 +748,7 @@ class CustomerController(Notifier):
         assert phone_number, ASSERT_OBJECT_DATA
 
         try:
-            customer = self.customer_repository.find({"phone_number": phone_number})
+            customer = self.customer_repository.find_by_phone_number(phone_number)
         except AppException.NotFoundException:
             raise AppException.NotFoundException(
                 error_message=f"{OBJECT} with phone number {phone_number} does not exist"
@@ -710,6 +758,7 @@ class CustomerController(Notifier):
             customer.profile_image = self.ceph_object_storage.pre_signed_get(
                 customer.profile_image
             )
+            self.sign_profile_image_variants(customer)
         return Result(customer, 200)
 
     # noinspection PyMethodMayBeStatic
@@ -789,7 +838,7 @@ class CustomerController(Notifier):
 
     def lock_account_out(self, record, phone_number):
         try:
-            self.customer_repository.find({"phone_number": phone_number})
+            self.customer_repository.find_by_phone_number(phone_number)
         except AppException.NotFoundException:
             return None
         else:
@@ -836,9 +885,11 @@ class CustomerController(Notifier):
         return None
 
     # noinspection PyMethodMayBeStatic
-    def customer_profile_images(self):
-
-        profile_images = self.ceph_object_storage.list()
+    def customer_profile_images(self, query_param: dict):
+        profile_images = self.ceph_object_storage.list_page(
+            page_token=query_param.get("cursor") or None,
+            page_size=query_param.get("per_page"),
+        )
 
         return Result(profile_images, 200)
 
@@ -856,7 +907,137 @@ class CustomerController(Notifier):
 
         return Result(profile_images, 200)
 
+    def customer_profile_image_content(self, obj_id):
+        assert obj_id, ASSERT_OBJECT_ID
+
+        try:
+            customer = self.customer_repository.find_by_id(obj_id)
+        except AppException.NotFoundException:
+            raise AppException.NotFoundException(
+                error_message=f"{OBJECT} with id {obj_id} does not exist"
+            )
+        if not customer.profile_image:
+            raise AppException.NotFoundException(
+                error_message=f"{OBJECT} with id {obj_id} has no profile image"
+            )
+        chunks, metadata = self.ceph_object_storage.stream(customer.profile_image)
+
+        return Result({"chunks": chunks, "metadata": metadata}, 200)
+
+    def delete_orphaned_profile_images(self, dry_run=False, min_age=None):
+        """
+        deletes the profile images no customer references, and their variants, a
+        page of CEPH_DELETE_BATCH_SIZE keys at a time. Only the profile images,
+        keys at the root of the bucket named after a customer id, and the
+        variants are considered e.g exports are kept. Objects newer than min_age
+        seconds are kept too, a new profile image may not be referenced yet.
+        :param dry_run: {bool} count the orphaned objects without deleting them
+        :param min_age: {int} seconds, ORPHANED_PROFILE_IMAGE_MIN_AGE by default
+        :return: {dict} objects scanned, orphaned and deleted, errors of the
+        objects that could not be deleted
+        """
+        if min_age is None:
+            min_age = Config.ORPHANED_PROFILE_IMAGE_MIN_AGE
+        modified_before = datetime.now(timezone.utc) - timedelta(seconds=min_age)
+        variant_prefix = Config.PROFILE_IMAGE_VARIANT_PREFIX
+        summary = {"scanned": 0, "orphaned": 0, "deleted": 0, "errors": []}
+        page_token = None
+        while True:
+            page = self.ceph_object_storage.list_page(
+                page_token=page_token, page_size=Config.CEPH_DELETE_BATCH_SIZE
+            )
+            summary["scanned"] += len(page)
+            candidates = {}
+            for obj in page:
+                obj_id = obj["Key"]
+                last_modified = obj.get("LastModified")
+                if isinstance(last_modified, datetime) and (
+                    last_modified > modified_before
+                ):
+                    continue
+                if obj_id.startswith(variant_prefix):
+                    # reminder: variants are saved as <prefix><name>/<obj_id>.<format>
+                    variant = obj_id[len(variant_prefix) :].split("/", 1)[-1]
+                    candidates[obj_id] = variant.rsplit(".", 1)[0]
+                elif is_profile_image_key(obj_id):
+                    candidates[obj_id] = obj_id
+            referenced = self.customer_repository.referenced_profile_images(
+                set(candidates.values())
+            )
+            orphans = [
+                obj_id
+                for obj_id, profile_image in candidates.items()
+                if profile_image not in referenced
+            ]
+            summary["orphaned"] += len(orphans)
+            if orphans and not dry_run:
+                errors = self.ceph_object_storage.delete_many(orphans)
+                summary["deleted"] += len(orphans) - len(errors)
+                summary["errors"].extend(errors)
+            page_token = page.next_cursor
+            if not page_token:
+                return Result(summary, 200)
+
     # reminder: below methods handles event subscription for the service
+    def derive_profile_image(self, obj_data):
+        data = extract_valid_data(
+            obj_data=obj_data,
+            validator=ServiceEventSubscription.profile_image_uploaded.value,
+        )
+        obj_id = data.get("obj_id")
+        # reminder: the upload of a variant or an export is notified as well
+        if not is_profile_image_key(obj_id):
+            return None
+        try:
+            customer = self.customer_repository.find({"profile_image": obj_id})
+            chunks, _ = self.ceph_object_storage.stream(obj_id)
+            image = b"".join(chunks)
+            image_format = Config.PROFILE_IMAGE_VARIANT_FORMAT
+            variants = {}
+            for name, size in Config.PROFILE_IMAGE_VARIANTS.items():
+                variant_id = (
+                    f"{Config.PROFILE_IMAGE_VARIANT_PREFIX}{name}/"
+                    f"{obj_id}.{image_format.lower()}"
+                )
+                self.ceph_object_storage.upload(
+                    variant_id,
+                    io.BytesIO(
+                        resize_image(
+                            image,
+                            max_size=size,
+                            image_format=image_format,
+                            quality=Config.PROFILE_IMAGE_VARIANT_QUALITY,
+                        )
+                    ),
+                    content_type=image_mimetype(image_format),
+                )
+                variants[name] = variant_id
+            self.customer_repository.update_by_id(
+                customer.id, {"profile_image_variants": variants}
+            )
+        except (
+            AppException.NotFoundException,
+            Image.DecompressionBombError,
+            OSError,
+        ) as exc:
+            # reminder: the image was replaced since or the upload is not an image
+            current_app.logger.warning(
+                {
+                    "event": f"<{inspect.currentframe().f_back.f_code.co_name}>",
+                    "data": obj_data,
+                    "error": f"{exc}",
+                }
+            )
+        except AppException.OperationError as exc:
+            current_app.logger.critical(
+                {
+                    "event": f"<{inspect.currentframe().f_back.f_code.co_name}>",
+                    "data": obj_data,
+                    "error": f"{exc}",
+                }
+            )
+        return None
+
     def cust_deposit(self, obj_data):
         data = extract_valid_data(
             obj_data=obj_data,
@@ -15,6 +15,12 @@ class FaqController:
     ):
         self.faq_repository = faq_repository
 
+    def etag(self):
+        """
+        :return: {str} entity tag of the faq list, None if it is unknown
+        """
+        return self.faq_repository.cache_etag()
+
     def all_faq(self):
         result = self.faq_repository.index()
         return Result(result, 200)
@@ -15,6 +15,12 @@ class PromotionController:
     ):
         self.promotion_repository = promotion_repository
 
+    def etag(self):
+        """
+        :return: {str} entity tag of the promotion list, None if it is unknown
+        """
+        return self.promotion_repository.cache_etag()
+
     def index(self):
 
         result = self.promotion_repository.index()
@@ -15,6 +15,12 @@ class SafetyController:
     ):
         self.safety_repository = safety_repository
 
+    def etag(self):
+        """
+        :return: {str} entity tag of the safety list, None if it is unknown
+        """
+        return self.safety_repository.cache_etag()
+
     def index(self):
 
         result = self.safety_repository.index()
@@ -0,0 +1,51 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+class TimedQueuePool(QueuePool):
+    """
+    This class is a QueuePool counting how long checkouts wait for a connection,
+    to size the pool against the gunicorn workers and threads using it
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            wait_time = time.perf_counter() - start
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+
+    def stats(self):
+        """
+        :return: {dict} pool size and usage, checkouts and their wait in ms
+        """
+        with self._metrics_lock:
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "overflow": self.overflow(),
+                "max_overflow": self._max_overflow,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms": round(self.wait_time * 1000, 3),
+                "max_wait_ms": round(self.max_wait_time * 1000, 3),
+            }
@@ -1,12 +1,12 @@
 from flask_cors import CORS
 from flask_marshmallow import Marshmallow
 from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 from healthcheck import HealthCheck
 
+from app.core.routing_session import RoutingSQLAlchemy
 from app.utils import GUID
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 migrate = Migrate()
 ma = Marshmallow()
 cors = CORS()
@@ -0,0 +1,90 @@
+import click
+from flask import Flask
+from sqlalchemy import insert, inspect, text
+
+from app.core.extensions import db
+from app.core.repository.base.pagination import Explain
+from config import Config
+
+
+def sequential_scans(plan, tables) -> list:
+    """
+    :param plan: {dict} node of an EXPLAIN (FORMAT JSON) plan
+    :param tables: names of the tables that must not be scanned sequentially
+    :return: {list} tables of the plan read with a sequential scan
+    """
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in tables:
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans.extend(sequential_scans(child, tables))
+    return scans
+
+
+def explain(session, statement) -> dict:
+    """
+    :param session: session of the postgres database
+    :param statement: select statement of a repository query
+    :return: {dict} root node of the query plan
+    """
+    return session.execute(Explain(statement)).scalar()[0]["Plan"]
+
+
+def seed(session, model, rows: int, make_row):
+    """
+    inserts rows made by make_row(index) in the table of model and refreshes the
+    table statistics so the planner sees a large table
+    """
+    table = model.__table__
+    for start in range(0, rows, Config.BULK_CHUNK_SIZE):
+        end = min(start + Config.BULK_CHUNK_SIZE, rows)
+        session.execute(insert(table), [make_row(index) for index in range(start, end)])
+    session.execute(text(f"ANALYZE {table.name}"))
+
+
+def check_plans(session, query_shapes, seeds, rows: int) -> dict:
+    """
+    seeds the tables and explains every repository query shape. The seeded rows
+    are rolled back.
+    :param query_shapes: {dict} name and (model, filter_param) of the queries
+    :param seeds: {dict} model and make_row function of the tables to seed
+    :param rows: {int} rows seeded in each table
+    :return: {dict} name and sequentially scanned tables of the failing queries
+    """
+    tables = {model.__tablename__ for model in seeds}
+    failures = {}
+    try:
+        for model, make_row in seeds.items():
+            seed(session, model, rows, make_row)
+        for name, (model, filter_param) in query_shapes.items():
+            statement = model.query.filter_by(**filter_param).statement
+            scans = sequential_scans(explain(session, statement), tables)
+            if scans:
+                failures[name] = scans
+    finally:
+        session.rollback()
+    return failures
+
+
+def init_app(app: Flask):
+    @app.cli.command("plan_check")
+    @click.option("--rows", "-r", "rows", default=10000, type=int)
+    def plan_check(rows):
+        """
+        fails when a repository query scans a large table sequentially
+        """
+        from app.repositories.query_shapes import QUERY_SHAPES, SEEDS
+
+        session = db.session()
+        dialect = session.get_bind(mapper=inspect(next(iter(SEEDS)))).dialect
+        if dialect.name != "postgresql":
+            raise click.ClickException("query plans are only checked on postgres")
+
+        failures = check_plans(session, QUERY_SHAPES, SEEDS, rows)
+        for name in QUERY_SHAPES:
+            status = (
+                "seq scan on " + ", ".join(failures[name]) if name in failures else "ok"
+            )
+            click.echo(f"{name}: {status}", err=name in failures)
+        if failures:
+            raise click.ClickException(f"{len(failures)} queries scan a whole table")
@@ -0,0 +1,182 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("query_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+)\s*,?)+\)")
+_LITERAL = re.compile(r"\b\d+\b|'(?:[^']|'')*'")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    :param statement: {str} sql statement sent to the database
+    :return: {str} statement with its literal values and IN lists collapsed so
+    the same query issued with different parameters has the same fingerprint
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _PLACEHOLDER_LIST.sub("(?)", statement)
+    return _LITERAL.sub("?", statement)
+
+
+class QueryStats:
+    """
+    This class records the sql statements of a request or of a block of code:
+    how many were issued, the time spent in the database and how often each
+    statement fingerprint was repeated.
+    """
+
+    def __init__(self, parent=None):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.parent = parent
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    def repeated(self, threshold=None):
+        """
+        :param threshold: {int} executions from which a statement is reported,
+        QUERY_REPEAT_THRESHOLD by default
+        :return: {dict} fingerprints of the statements executed at least
+        threshold times e.g the queries of an N+1 pattern
+        """
+        threshold = threshold or Config.QUERY_REPEAT_THRESHOLD
+        return {
+            statement: count
+            for statement, count in self.fingerprints.most_common()
+            if count >= threshold
+        }
+
+
+class QueryMetrics:
+    """
+    This class aggregates the query stats of the requests served by a worker per
+    endpoint
+    """
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint: str, stats: QueryStats):
+        with self._lock:
+            metrics = self._endpoints.setdefault(
+                endpoint,
+                {"requests": 0, "queries": 0, "max_queries": 0, "time_ms": 0.0},
+            )
+            metrics["requests"] += 1
+            metrics["queries"] += stats.count
+            metrics["max_queries"] = max(metrics["max_queries"], stats.count)
+            metrics["time_ms"] += round(stats.duration * 1000, 3)
+            if stats.repeated():
+                metrics["repeated_statements"] = (
+                    metrics.get("repeated_statements", 0) + 1
+                )
+
+    def snapshot(self):
+        """
+        :return: {dict} requests, queries and database time of each endpoint
+        """
+        with self._lock:
+            return {
+                endpoint: dict(metrics) for endpoint, metrics in self._endpoints.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "handle_error")
+def handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start_time"):
+        connection.info["query_start_time"].pop()
+
+
+@contextmanager
+def count_queries():
+    """
+    records the sql statements issued in the block, they are also recorded by
+    the request in progress
+    """
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def init_app(app):
+    """
+    records the sql statements of every request. The query count and database
+    time are sent in the X-Query-Count and X-Query-Time headers in debug mode and
+    statements repeated QUERY_REPEAT_THRESHOLD times are logged as likely N+1
+    queries.
+    """
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats_token = _current.set(QueryStats(parent=_current.get()))
+
+    @app.after_request
+    def report_query_stats(response):
+        token = g.pop("query_stats_token", None)
+        if token is None:
+            return response
+        stats = token.var.get()
+        token.var.reset(token)
+
+        endpoint = request.endpoint or request.path
+        query_metrics.add(endpoint, stats)
+        logger.debug(
+            f"{endpoint}: {stats.count} queries in {stats.duration * 1000:.1f}ms"
+        )
+        for statement, count in stats.repeated().items():
+            logger.warning(f"{endpoint}: statement executed {count} times: {statement}")
+        if app.config["DEBUG"]:
+            response.headers["X-Query-Count"] = str(stats.count)
+            response.headers["X-Query-Time"] = f"{stats.duration * 1000:.3f}"
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        token = g.pop("query_stats_token", None)
+        if token is not None:
+            token.var.reset(token)
@@ -1 +1 @@
-from .base import MongoBaseRepository, SQLBaseRepository
+from .base import MongoBaseRepository, Page, SQLBaseRepository
@@ -1,2 +1,3 @@
 from .mongo_base_repository import MongoBaseRepository
+from .pagination import Page
 from .sql_base_repository import SQLBaseRepository
@@ -91,3 +91,41 @@ class CRUDRepositoryInterface(metaclass=abc.ABCMeta):
         """
 
         raise NotImplementedError
+
+    def bulk_create(self, objs_in):
+        """
+        when inherited, creates many records in a single transaction
+        :param objs_in: list of the data of each record
+        :return: ids of the records
+        """
+
+        raise NotImplementedError
+
+    def bulk_update(self, objs_in):
+        """
+        when inherited, updates many records by id in a single transaction
+        :param objs_in: list of the update data of each record, with its id
+        :return: None
+        """
+
+        raise NotImplementedError
+
+    def bulk_upsert(self, objs_in, conflict_column):
+        """
+        when inherited, creates many records or updates those with the same value
+        of a unique column, in a single transaction
+        :param objs_in: list of the data of each record
+        :param conflict_column: unique column identifying existing records
+        :return: None
+        """
+
+        raise NotImplementedError
+
+    def bulk_delete(self, obj_ids):
+        """
+        when inherited, deletes many records by id in a single transaction
+        :param obj_ids: list of the ids of the records
+        :return: None
+        """
+
+        raise NotImplementedError
@@ -0,0 +1,125 @@
+import base64
+import binascii
+import datetime
+import enum
+import json
+import uuid
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.exceptions.app_exceptions import AppException
+
+
+class Page(list):
+    """
+    This class is a list of the records of a page. It also carries the cursor of
+    the next page, None on the last page, and the total of records when it was
+    counted.
+    """
+
+    def __init__(self, items, next_cursor=None, total=None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+        self.total = total
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) of a select statement, for postgres only
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def compile_explain(element, compiler, **kwargs):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kwargs)
+
+
+def estimate_count(query, model, filtered: bool) -> int:
+    """
+    estimates the total of a query from the postgres statistics without scanning
+    the table: reltuples of the table when the query is not filtered, the row
+    estimate of the query plan otherwise. Other databases are counted exactly.
+    :param query: the query to count
+    :param model: model of the table queried
+    :param filtered: {bool} whether the query is filtered
+    :return: {int} estimated total of the query
+    """
+    session = query.session
+    if session.get_bind(mapper=inspect(model)).dialect.name != "postgresql":
+        return query.count()
+    if not filtered:
+        estimate = session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": model.__tablename__},
+        ).scalar()
+        # reminder: reltuples is -1 until the table is first vacuumed or analyzed
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    plan = session.execute(Explain(query.statement)).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def encode_cursor(sort_by: str, sort_in: str, values: list) -> str:
+    """
+    :param sort_by: record column the page is sorted with
+    :param sort_in: the order the page is sorted in
+    :param values: {list} sort column and id values of the last record of a page
+    :return: {str} opaque cursor of the next page
+    """
+    payload = json.dumps([sort_by, sort_in, [_json_value(value) for value in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_in: str, columns: list) -> list:
+    """
+    :param cursor: {str} cursor returned with the previous page
+    :param sort_by: record column the page is sorted with
+    :param sort_in: the order the page is sorted in
+    :param columns: sort column and id column the cursor values belong to
+    :return: {list} sort column and id values of the last record of previous page
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_in, values = json.loads(payload)
+        if [cursor_sort_by, cursor_sort_in] != [sort_by, sort_in]:
+            raise ValueError("cursor of another sort order")
+        if len(values) != len(columns):
+            raise ValueError("cursor of another sort column")
+        return [_column_value(column, value) for column, value in zip(columns, values)]
+    except (binascii.Error, TypeError, ValueError, KeyError):
+        raise AppException.ValidationException(
+            error_message={"cursor": ["Not a valid cursor."]}
+        )
+
+
+def _json_value(value):
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _column_value(column, value):
+    if value is None:
+        return value
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if issubclass(python_type, enum.Enum):
+        return python_type[value]
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return value
@@ -1,9 +1,72 @@
-from sqlalchemy import asc, desc
+import functools
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import (
+    and_,
+    asc,
+    bindparam,
+    delete,
+    desc,
+    insert,
+    inspect,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 
 from app import db
+from app.core.exceptions import HTTPException
 from app.core.exceptions.app_exceptions import AppException
 from app.core.repository.base.crud_repository_interface import CRUDRepositoryInterface
+from app.core.repository.base.pagination import (
+    Page,
+    decode_cursor,
+    encode_cursor,
+    estimate_count,
+)
+from app.core.unit_of_work import current_unit_of_work
+from app.enums import CountModeEnum
+from config import Config
+
+COUNT_CACHE_KEY = "{}:count:{}"
+BULK_ID_PARAM = "bulk_id"
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def reads_replica(method):
+    """
+    sends the reads of a repository method to a replica database
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.db.session().using_replica():
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def reads_primary(method):
+    """
+    keeps the reads of a repository method on the primary database e.g the find
+    of a write
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.db.session().using_replica(False):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
 
 
 class SQLBaseRepository(CRUDRepositoryInterface):
@@ -19,6 +82,7 @@ class SQLBaseRepository(CRUDRepositoryInterface):
 
         self.db = db
 
+    @reads_replica
     def index(self) -> [db.Model]:
         """
 
@@ -43,7 +107,7 @@ class SQLBaseRepository(CRUDRepositoryInterface):
             obj_data = dict(obj_in)
             db_obj = self.model(**obj_data)
             self.db.session.add(db_obj)
-            self.db.session.commit()
+            self.commit()
             return db_obj
         except IntegrityError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
@@ -52,6 +116,8 @@ class SQLBaseRepository(CRUDRepositoryInterface):
 
     def update_by_id(self, obj_id: str, obj_in: dict) -> db.Model:
         """
+        updates the object with a single UPDATE ... RETURNING statement on
+        databases supporting it, an UPDATE followed by a SELECT otherwise
         :param obj_id: {int} id of object to update
         :param obj_in: {dict} update data. This data will be used to update
         any object that matches the id specified
@@ -61,20 +127,34 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         assert obj_in, "Missing update data"
         assert isinstance(obj_in, dict), "Update data should be a dictionary"
 
-        db_obj = self.find_by_id(obj_id)
+        id_column = getattr(self.model, self.id_key)
+        if self.supports_returning():
+            return self.update_returning(id_column == obj_id, obj_in)
 
         try:
-            for field in obj_in:
-                if hasattr(db_obj, field):
-                    setattr(db_obj, field, obj_in[field])
-            self.db.session.add(db_obj)
-            self.db.session.commit()
-            return db_obj
+            values = self.column_values(obj_in)
+            if values:
+                self.db.session.flush()
+                result = self.db.session.execute(
+                    update(self.model.__table__)
+                    .where(id_column == obj_id)
+                    .values(values)
+                )
+                if result.rowcount == 0:
+                    raise AppException.NotFoundException(error_message=None)
+                self.commit()
+            db_obj = self.model.query.populate_existing().get(obj_id)
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
+        if db_obj is None:
+            raise AppException.NotFoundException(error_message=None)
+        return db_obj
 
+    @reads_primary
     def update(self, filter_param: dict, obj_in: dict) -> db.Model:
         """
+        updates the first object matching the filter, with a single statement on
+        databases supporting UPDATE ... RETURNING
         :param filter_param: {dict} object to filter with
         :param obj_in: {dict} update data. This data will be used to update
         any object that matches the id specified
@@ -84,18 +164,82 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         assert obj_in, "Missing update data"
         assert isinstance(obj_in, dict), "Update data should be a dictionary"
 
-        db_obj = self.find(filter_param)
+        if not self.supports_returning():
+            return self.update_by_id(self.find(filter_param).id, obj_in)
 
-        try:
-            for field in obj_in:
-                if hasattr(db_obj, field):
-                    setattr(db_obj, field, obj_in[field])
-            self.db.session.add(db_obj)
-            self.db.session.commit()
+        id_column = getattr(self.model, self.id_key)
+        first_match = (
+            select(id_column).filter_by(**filter_param).limit(1).scalar_subquery()
+        )
+        return self.update_returning(id_column == first_match, obj_in)
+
+    def update_returning(self, where, obj_in: dict) -> db.Model:
+        """
+        updates the object matching the where clause and loads it from the
+        returned row, without querying it before or after the update
+        """
+        values = self.column_values(obj_in)
+        if not values:
+            db_obj = self.model.query.filter(where).first()
+            if db_obj is None:
+                raise AppException.NotFoundException(error_message=None)
             return db_obj
+
+        table = self.model.__table__
+        try:
+            self.db.session.flush()
+            row = self.db.session.execute(
+                update(table).where(where).values(values).returning(*table.c)
+            ).first()
+            if row is None:
+                raise AppException.NotFoundException(error_message=None)
+            self.commit()
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
+        # reminder: merged after the commit so the object is not expired by it
+        mapper = inspect(self.model)
+        db_obj = self.model(
+            **{
+                mapper.get_property_by_column(column).key: row._mapping[column]
+                for column in table.c
+            }
+        )
+        make_transient_to_detached(db_obj)
+        return self.db.session.merge(db_obj, load=False)
+
+    def column_values(self, obj_in: dict) -> dict:
+        """
+        translates update data to column values. The data is set on a transient
+        object of the model so property setters, e.g hashing a pin, still apply.
+        :param obj_in: {dict} update data
+        :return: {dict} values of the columns to update
+        """
+        obj = self.model()
+        for field in obj_in:
+            if hasattr(self.model, field):
+                setattr(obj, field, obj_in[field])
+        state = inspect(obj)
+        values = {}
+        for column_attr in state.mapper.column_attrs:
+            history = state.attrs[column_attr.key].history
+            if history.added:
+                values[column_attr.columns[0]] = history.added[0]
+        return values
+
+    @property
+    def id_key(self) -> str:
+        """
+        name of the primary key attribute of the model
+        """
+        mapper = inspect(self.model)
+        return mapper.get_property_by_column(mapper.primary_key[0]).key
+
+    def supports_returning(self) -> bool:
+        bind = self.db.session().get_bind(mapper=inspect(self.model))
+        return bind.dialect.full_returning
+
+    @reads_replica
     def find_by_id(self, obj_id: str) -> db.Model:
         """
         returns an object matching the specified id if it exists in the database
@@ -112,6 +256,7 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
+    @reads_replica
     def find(self, filter_param: dict) -> db.Model:
         """
         This method returns the first object that matches the query parameters specified
@@ -130,6 +275,7 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
+    @reads_replica
     def find_all(self, filter_param: dict) -> db.Model:
         """
         This method returns all objects that matches the query
@@ -146,6 +292,37 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
+    def stream(self, filter_param: dict = None, criteria=()):
+        """
+        yields the matching records as dicts of their columns, read in chunks
+        of EXPORT_CHUNK_SIZE through a server side cursor so memory stays flat
+        however large the table is. The records are read on a connection of
+        their own, outside the session and its transaction.
+        :param filter_param: {dict} column values the records must have
+        :param criteria: other conditions of the records e.g created ranges
+        :return: {Iterator[dict]}
+        """
+        with self.db.session().using_replica():
+            engine = self.db.session().get_bind(mapper=inspect(self.model))
+        statement = (
+            select(self.model.__table__)
+            .filter_by(**(filter_param or {}))
+            .where(*criteria)
+            .order_by(inspect(self.model).primary_key[0])
+        )
+        return self.stream_rows(engine, statement)
+
+    # noinspection PyMethodMayBeStatic
+    def stream_rows(self, engine, statement):
+        with engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, max_row_buffer=Config.EXPORT_CHUNK_SIZE
+            ).execute(statement)
+            for rows in result.mappings().partitions(Config.EXPORT_CHUNK_SIZE):
+                for row in rows:
+                    yield dict(row)
+
+    @reads_primary
     def delete_by_id(self, obj_id: str):
 
         """
@@ -156,10 +333,11 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         db_obj = self.find_by_id(obj_id)
         try:
             db.session.delete(db_obj)
-            db.session.commit()
+            self.commit()
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
+    @reads_primary
     def delete(self, filter_param: dict):
 
         """
@@ -170,51 +348,232 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         db_obj = self.find(filter_param)
         try:
             db.session.delete(db_obj)
-            db.session.commit()
+            self.commit()
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
-    def paginate(self, page: int, per_page: int) -> [db.Model]:
+    def bulk_create(self, objs_in: list) -> list:
+        """
+        creates the objects with multi row INSERT statements of BULK_CHUNK_SIZE
+        rows, in a single transaction
+        :param objs_in: {list} data of the objects to create
+        :return: {list} ids of the created objects, in the order of objs_in
+        """
+        assert objs_in, "Missing data to be saved"
+
+        table = self.model.__table__
+        id_column = inspect(self.model).primary_key[0]
+        rows = []
+        for obj_in in objs_in:
+            row = self.column_values(obj_in)
+            if id_column not in row and id_column.default is not None:
+                row[id_column] = id_column.default.arg(None)
+            rows.append({column.key: value for column, value in row.items()})
+        self.execute_many(insert(table), rows)
+        return [row.get(id_column.key) for row in rows]
+
+    def bulk_update(self, objs_in: list):
+        """
+        updates objects by id with executemany UPDATE statements of
+        BULK_CHUNK_SIZE rows, in a single transaction
+        :param objs_in: {list} update data of the objects, each with the id of
+        the object to update
+        :return: {None}
+        """
+        assert objs_in, "Missing update data"
+
+        table = self.model.__table__
+        id_column = inspect(self.model).primary_key[0]
+        rows = []
+        for obj_in in objs_in:
+            assert obj_in.get(self.id_key), "Missing id of object to update"
+            row = self.column_values(
+                {key: value for key, value in obj_in.items() if key != self.id_key}
+            )
+            if row:
+                row = {column.key: value for column, value in row.items()}
+                rows.append({**row, BULK_ID_PARAM: obj_in[self.id_key]})
+        statement = update(table).where(id_column == bindparam(BULK_ID_PARAM))
+        self.execute_many(statement, rows)
+
+    def bulk_upsert(self, objs_in: list, conflict_column: str):
+        """
+        creates the objects or, when an object with the same value of the unique
+        conflict column exists, updates it with the fields given. Uses
+        INSERT ... ON CONFLICT DO UPDATE of BULK_CHUNK_SIZE rows in a single
+        transaction, on postgres and sqlite.
+        :param objs_in: {list} data of the objects to create or update
+        :param conflict_column: unique column identifying existing objects
+        :return: {None}
         """
+        assert objs_in, "Missing data to be saved"
 
-        This method returns a list of paginated objects
-        :param page: the page number
-        :param per_page: the number of items to return for each page
-        :return: {list} returns a list of objects of type model
+        dialect = self.db.session().get_bind(mapper=inspect(self.model)).dialect
+        if dialect.name not in UPSERT_INSERTS:
+            raise AppException.OperationError(
+                error_message=f"upsert is not supported on {dialect.name}"
+            )
+        table = self.model.__table__
+        id_column = inspect(self.model).primary_key[0]
+        conflict = getattr(self.model, conflict_column).expression
+
+        rows = []
+        for obj_in in objs_in:
+            assert obj_in.get(conflict_column), "Missing conflict column value"
+            row = self.column_values(obj_in)
+            if id_column not in row and id_column.default is not None:
+                row[id_column] = id_column.default.arg(None)
+            rows.append({column.key: value for column, value in row.items()})
+
+        def upsert(keys):
+            columns = [table.c[key] for key in keys]
+            statement = UPSERT_INSERTS[dialect.name](table)
+            set_ = {
+                column.key: statement.excluded[column.key]
+                for column in columns
+                if column is not id_column and column is not conflict
+            }
+            for column in table.c:
+                if column.onupdate is not None and column not in columns:
+                    onupdate = column.onupdate
+                    set_[column.key] = (
+                        onupdate.arg(None) if onupdate.is_callable else onupdate.arg
+                    )
+            if not set_:
+                return statement.on_conflict_do_nothing(index_elements=[conflict])
+            return statement.on_conflict_do_update(index_elements=[conflict], set_=set_)
+
+        self.execute_many(upsert, rows)
+
+    def bulk_delete(self, obj_ids: list):
+        """
+        deletes the objects with DELETE ... WHERE id IN statements of
+        BULK_CHUNK_SIZE ids, in a single transaction
+        :param obj_ids: {list} ids of the objects to delete
+        :return: {None}
         """
+        assert obj_ids, "Missing ids of objects to delete"
+
+        table = self.model.__table__
+        id_column = inspect(self.model).primary_key[0]
         try:
-            data = self.model.query.paginate(
-                page=page, per_page=per_page, error_out=False
-            ).items
-            return data
+            with self.transaction():
+                for chunk in chunked(obj_ids, Config.BULK_CHUNK_SIZE):
+                    self.db.session.execute(delete(table).where(id_column.in_(chunk)))
+                # reminder: deleted objects left in the session would fail to refresh
+                deleted = {str(obj_id) for obj_id in obj_ids}
+                identity_map = self.db.session.identity_map
+                for (model, identity, _), obj in list(identity_map.items()):
+                    if issubclass(model, self.model) and str(identity[0]) in deleted:
+                        self.db.session.expunge(obj)
+        except DBAPIError as e:
+            raise AppException.OperationError(error_message=e.orig.args[0])
+
+    def execute_many(self, statement, rows: list):
+        """
+        executes a statement with chunks of BULK_CHUNK_SIZE rows, grouped by the
+        columns they set since executemany needs the same columns in every row,
+        in a single transaction
+        :param statement: statement to execute, or a function building it from
+        the column keys set by the rows
+        :param rows: {list} values of each row by column key
+        :return: {None}
+        """
+        groups = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row)), []).append(row)
+        try:
+            with self.transaction():
+                for keys, params in groups.items():
+                    group_statement = (
+                        statement(keys) if callable(statement) else statement
+                    )
+                    for chunk in chunked(params, Config.BULK_CHUNK_SIZE):
+                        self.db.session.execute(group_statement, chunk)
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
 
+    def commit(self):
+        """
+        commits the session. Inside a unit of work the session is only flushed,
+        the unit of work commits it once when it ends.
+        """
+        work = current_unit_of_work()
+        if work is None:
+            self.db.session.commit()
+        else:
+            try:
+                self.db.session.flush()
+            except DBAPIError:
+                # reminder: the failed statement aborts the whole unit of work
+                self.db.session.rollback()
+                raise
+            work.flushed = True
+
+    @contextmanager
+    def transaction(self):
+        """
+        runs the statements of the block atomically: in a transaction committed
+        when the block exits, or in a savepoint inside a unit of work
+        """
+        work = current_unit_of_work()
+        if work is None:
+            try:
+                self.db.session.flush()
+                yield
+                self.db.session.commit()
+            except Exception:
+                self.db.session.rollback()
+                raise
+            return
+        with self.db.session.begin_nested():
+            yield
+        work.flushed = True
+
+    @reads_replica
+    def paginate(
+        self, page: int, per_page: int, count: str = CountModeEnum.none.value
+    ) -> Page:
+        """
+
+        This method returns a list of paginated objects
+        :param page: the page number
+        :param per_page: the number of items to return for each page
+        :param count: how the total is counted, one of CountModeEnum
+        :return: {Page} returns a list of objects of type model
+        """
+        return self.offset_page(self.model.query, {}, page, per_page, count)
+
+    @reads_replica
     def filter_paginate(
-        self, filter_param: dict, page: int, per_page: int
-    ) -> [db.Model]:
+        self,
+        filter_param: dict,
+        page: int,
+        per_page: int,
+        count: str = CountModeEnum.none.value,
+    ) -> Page:
         """
 
         This method returns a list of paginated objects
         :param filter_param: object to filter with
         :param page: the page number
         :param per_page: the number of items to return for each page
-        :return: {list} returns a list of objects of type model
+        :param count: how the total is counted, one of CountModeEnum
+        :return: {Page} returns a list of objects of type model
         """
+        query = self.model.query.filter_by(**filter_param)
+        return self.offset_page(query, filter_param, page, per_page, count)
 
-        try:
-            data = (
-                self.model.query.filter_by(**filter_param)
-                .paginate(page=page, per_page=per_page, error_out=False)
-                .items
-            )
-            return data
-        except DBAPIError as e:
-            raise AppException.OperationError(error_message=e.orig.args[0])
-
+    @reads_replica
     def filter_sort_paginate(
-        self, filter_param: dict, sort_in: str, sort_by: str, page: int, per_page: int
-    ) -> [db.Model]:
+        self,
+        filter_param: dict,
+        sort_in: str,
+        sort_by: str,
+        page: int,
+        per_page: int,
+        count: str = CountModeEnum.none.value,
+    ) -> Page:
         """
 
         This method returns a list of paginated objects
@@ -223,25 +582,140 @@ class SQLBaseRepository(CRUDRepositoryInterface):
         :param sort_in: the order to sort the objects in
         :param page: the page number
         :param per_page: the number of items to return for each page
-        :return: {list} returns a list of objects of type model
+        :param count: how the total is counted, one of CountModeEnum
+        :return: {Page} returns a list of objects of type model
+        """
+        if sort_in.lower() == "asc":
+            order = asc(getattr(self.model, sort_by))
+        elif sort_in.lower() == "desc":
+            order = desc(getattr(self.model, sort_by))
+        else:
+            raise AppException.OperationError(error_message="invalid sort order")
+        query = self.model.query.filter_by(**filter_param).order_by(order)
+        return self.offset_page(query, filter_param, page, per_page, count)
+
+    def offset_page(
+        self, query, filter_param: dict, page: int, per_page: int, count: str
+    ) -> Page:
+        """
+        reads a page of the query with LIMIT and OFFSET. Unlike flask-sqlalchemy
+        paginate, the total is only counted when a count mode asks for it.
         """
+        page = max(page, 1)
+        per_page = per_page if per_page >= 0 else 20
         try:
-            if sort_in.lower() == "asc":
-                result = (
-                    self.model.query.filter_by(**filter_param)
-                    .order_by(asc(getattr(self.model, sort_by)))
-                    .paginate(page=page, per_page=per_page, error_out=False)
-                    .items
-                )
-            elif sort_in.lower() == "desc":
-                result = (
-                    self.model.query.filter_by(**filter_param)
-                    .order_by(desc(getattr(self.model, sort_by)))
-                    .paginate(page=page, per_page=per_page, error_out=False)
-                    .items
-                )
+            items = query.limit(per_page).offset((page - 1) * per_page).all()
+        except DBAPIError as e:
+            raise AppException.OperationError(error_message=e.orig.args[0])
+        return Page(items, total=self.count(query, filter_param, count))
+
+    def count(self, query, filter_param: dict, count: str = CountModeEnum.exact.value):
+        """
+        counts the records of a query
+        :param query: the query to count
+        :param filter_param: the object the query is filtered with
+        :param count: none, exact, cached (exact count kept in redis for
+        COUNT_CACHE_TTL seconds) or estimated (planner estimate on postgres)
+        :return: {int} total of the query, None when the count mode is none
+        """
+        try:
+            count = CountModeEnum(count)
+        except ValueError:
+            raise AppException.OperationError(error_message="invalid count mode")
+        query = query.order_by(None)
+        try:
+            if count is CountModeEnum.none:
+                return None
+            if count is CountModeEnum.cached:
+                return self.cached_count(query, filter_param)
+            if count is CountModeEnum.estimated:
+                return estimate_count(query, self.model, bool(filter_param))
+            return query.count()
+        except DBAPIError as e:
+            raise AppException.OperationError(error_message=e.orig.args[0])
+
+    def cached_count(self, query, filter_param: dict):
+        redis_service = getattr(self, "redis_service", None)
+        if redis_service is None:
+            return query.count()
+        cache_key = COUNT_CACHE_KEY.format(
+            self.model.__tablename__,
+            json.dumps(filter_param, sort_keys=True, default=str),
+        )
+        try:
+            total = redis_service.get(cache_key)
+            if total is None:
+                total = query.count()
+                redis_service.set(cache_key, total, ex=Config.COUNT_CACHE_TTL)
+            return total
+        except HTTPException:
+            return query.count()
+
+    @reads_replica
+    def cursor_paginate(
+        self,
+        filter_param: dict,
+        per_page: int,
+        cursor: str = None,
+        sort_by: str = "id",
+        sort_in: str = "asc",
+        count: str = CountModeEnum.none.value,
+    ) -> Page:
+        """
+
+        This method returns a page of objects following the page of the cursor.
+        Pages are read with a range on the sort column and the id, not an offset,
+        so deep pages are as fast as the first one and records inserted or deleted
+        meanwhile do not shift the following pages. The total is only counted
+        when a count mode asks for it.
+        :param filter_param: the object to filter with
+        :param per_page: the number of items to return for each page
+        :param cursor: cursor of the previous page, None for the first page
+        :param sort_by: record column to sort the objects with. It should not be
+        nullable and an index on it keeps pages cheap
+        :param sort_in: the order to sort the objects in
+        :param count: how the total is counted, one of CountModeEnum
+        :return: {Page} objects of type model with the cursor of the next page
+        """
+        if sort_in.lower() not in ("asc", "desc"):
+            raise AppException.OperationError(error_message="invalid sort order")
+        if per_page < 1:
+            raise AppException.OperationError(error_message="invalid page size")
+        sort_in = sort_in.lower()
+        order = asc if sort_in == "asc" else desc
+        keys = [sort_by] if sort_by == self.id_key else [sort_by, self.id_key]
+        columns = [getattr(self.model, key) for key in keys]
+
+        query = self.model.query.filter_by(**filter_param)
+        total = self.count(query, filter_param, count)
+        if cursor:
+            values = decode_cursor(cursor, sort_by, sort_in, columns)
+            if sort_in == "asc":
+                after = [column > value for column, value in zip(columns, values)]
+            else:
+                after = [column < value for column, value in zip(columns, values)]
+            if len(columns) == 1:
+                query = query.filter(after[0])
             else:
-                raise AppException.OperationError(error_message="invalid sort order")
-            return result
+                query = query.filter(
+                    or_(after[0], and_(columns[0] == values[0], after[1]))
+                )
+
+        try:
+            items = (
+                query.order_by(*[order(column) for column in columns])
+                .limit(per_page + 1)
+                .all()
+            )
         except DBAPIError as e:
             raise AppException.OperationError(error_message=e.orig.args[0])
+
+        next_cursor = None
+        if len(items) > per_page:
+            items = items[:per_page]
+            next_cursor = encode_cursor(
+                sort_by,
+                sort_in,
+                [getattr(items[-1], key) for key in keys],
+            )
+        return Page(items, next_cursor=next_cursor, total=total)
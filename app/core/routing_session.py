@@ -0,0 +1,146 @@
+import random
+import time
+from contextlib import contextmanager
+
+from flask import request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import event, orm
+
+from app.core.engine_pool import TimedQueuePool
+from config import Config
+
+REPLICA_BIND_PREFIX = "replica_"
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+class RoutingSession(SignallingSession):
+    """
+    This class sends the reads of the repositories to a replica database and
+    every other statement to the primary. A session reads from the primary for
+    REPLICA_STICKY_SECONDS after it wrote so a flow reading its own writes is not
+    broken by the replication lag.
+    """
+
+    def __init__(self, db, **options):
+        super().__init__(db, **options)
+        self.db = db
+        self.replica_keys = [
+            key for key in db.get_binds_config() if key.startswith(REPLICA_BIND_PREFIX)
+        ]
+        self.wrote_at = None
+        self.pinned_until = 0.0
+        self._reading_replica = None
+        self._written = False
+
+    @contextmanager
+    def using_replica(self, replica=True):
+        """
+        reads the statements of the block from a replica when the session may,
+        or from the primary. The outermost block decides e.g the find of an
+        update reads from the primary.
+        """
+        reading_replica = self._reading_replica
+        if reading_replica is None:
+            self._reading_replica = replica
+        try:
+            yield
+        finally:
+            self._reading_replica = reading_replica
+
+    def mark_written(self):
+        self._written = True
+        self.wrote_at = time.time()
+
+    def reads_primary(self) -> bool:
+        """
+        :return: {bool} whether reads have to go to the primary: the transaction
+        wrote, or the session wrote less than REPLICA_STICKY_SECONDS ago
+        """
+        if self._written:
+            return True
+        sticky_until = (self.wrote_at or 0.0) + Config.REPLICA_STICKY_SECONDS
+        return time.time() < max(sticky_until, self.pinned_until)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if (
+            self._reading_replica
+            and self.replica_keys
+            and not self._flushing
+            and not self.reads_primary()
+            and (mapper is None or not mapper.persist_selectable.info.get("bind_key"))
+        ):
+            return self.db.get_engine(self.app, bind=random.choice(self.replica_keys))
+        return super().get_bind(mapper, clause)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def after_flush(session, flush_context):
+    session.mark_written()
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def do_orm_execute(orm_execute_state):
+    if orm_execute_state.statement.is_dml:
+        orm_execute_state.session.mark_written()
+
+
+@event.listens_for(RoutingSession, "after_commit")
+@event.listens_for(RoutingSession, "after_rollback")
+def after_transaction(session):
+    session._written = False
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    This class creates routing sessions, the replicas are the binds named
+    replica_<n> e.g SQLALCHEMY_BINDS = {"replica_0": "postgresql://..."}
+    """
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        if sa_url.drivername.startswith("postgresql"):
+            options.setdefault("poolclass", TimedQueuePool)
+        return super().apply_driver_hacks(app, sa_url, options)
+
+    def engines(self) -> dict:
+        """
+        :return: {dict} the primary engine and the engine of every bind
+        """
+        app = self.get_app()
+        engines = {"primary": self.get_engine(app)}
+        for key in self.get_binds_config():
+            engines[key] = self.get_engine(app, bind=key)
+        return engines
+
+    def get_binds_config(self):
+        return self.get_app().config.get("SQLALCHEMY_BINDS") or {}
+
+
+def init_app(app, db):
+    """
+    keeps the reads of a client on the primary for REPLICA_STICKY_SECONDS after
+    a request of the client wrote, e.g registering then confirming the otp
+    token. The client is recognised with a cookie.
+    """
+
+    @app.before_request
+    def pin_primary():
+        try:
+            pinned_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            return
+        db.session().pinned_until = pinned_until
+
+    @app.after_request
+    def set_read_primary_cookie(response):
+        session = db.session()
+        if session.replica_keys and session.wrote_at is not None:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                str(session.wrote_at + Config.REPLICA_STICKY_SECONDS),
+                max_age=Config.REPLICA_STICKY_SECONDS,
+                httponly=True,
+            )
+        return response
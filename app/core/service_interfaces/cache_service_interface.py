@@ -12,20 +12,23 @@ class CacheServiceInterface(metaclass=abc.ABCMeta):
         )
 
     @abc.abstractmethod
-    def set(self, name, data):
+    def set(self, name, data, ex=None, nx=False):
         """
 
         :param name: key of redis object that should be saved
         :param data: the data of that should be saved
+        :param ex: seconds after which the saved data expires
+        :param nx: only save the data if the key does not exist
         :return:
         """
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get(self, name):
+    def get(self, name, obj_schema=None):
         """
 
         :param name: key of object that should be retrieved
+        :param obj_schema: schema loading the object retrieved
         :return:
         """
         raise NotImplementedError
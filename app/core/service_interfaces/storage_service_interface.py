@@ -4,15 +4,18 @@ import abc
 class StorageServiceInterface(metaclass=abc.ABCMeta):
     @classmethod
     def __subclasshook__(cls, subclass):
-        return (
-            hasattr(subclass, "save")
-            and callable(subclass.save)
-            and hasattr(subclass, "download")
-            and callable(subclass.download)
-            and hasattr(subclass, "list")
-            and callable(subclass.list)
-            and hasattr(subclass, "delete")
-            and callable(subclass.delete)
+        return all(
+            hasattr(subclass, name) and callable(getattr(subclass, name))
+            for name in (
+                "save",
+                "download",
+                "upload",
+                "stream",
+                "list_page",
+                "iter_objects",
+                "delete",
+                "delete_many",
+            )
         )
 
     @abc.abstractmethod
@@ -34,12 +37,43 @@ class StorageServiceInterface(metaclass=abc.ABCMeta):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def list(self):
+    def upload(self, obj_id, obj):
         """
 
-        :param:
+        :param obj_id: id of the object
+        :param obj: file like object or iterator of the content of the object
         :return:
         """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def stream(self, obj_id):
+        """
+
+        :param obj_id: id of the object
+        :return: iterator of the content of the object and its metadata
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def list_page(self, page_token=None, page_size=None, prefix=""):
+        """
+
+        :param page_token: token of the page to list, None for the first page
+        :param page_size: objects of the page
+        :param prefix: prefix of the objects listed
+        :return: objects of the page with the token of the next page
+        """
+
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def iter_objects(self, prefix=""):
+        """
+
+        :param prefix: prefix of the objects listed
+        :return: generator of the objects, listed a page at a time
+        """
 
         raise NotImplementedError
 
@@ -52,3 +86,13 @@ class StorageServiceInterface(metaclass=abc.ABCMeta):
         """
 
         raise NotImplementedError
+
+    @abc.abstractmethod
+    def delete_many(self, obj_ids):
+        """
+
+        :param: obj_ids: ids of objects to delete
+        :return: errors of the objects that could not be deleted
+        """
+
+        raise NotImplementedError
@@ -1,16 +1,51 @@
-from flask import Response, json
+from flask import Response, json, request
 
+from app.core.repository import Page
+from config import Config
 
-def handle_result(result, schema=None, many=False):
+
+def handle_result(result, schema=None, many=False, etag=None):
     if schema:
-        return Response(
+        response = Response(
             schema(many=many).dumps(result.value),
             status=result.status_code,
             mimetype="application/json",
         )
     else:
-        return Response(
+        response = Response(
             json.dumps(result.value),
             status=result.status_code,
             mimetype="application/json",
         )
+    if etag:
+        set_cache_headers(response, etag)
+    if isinstance(result.value, Page):
+        set_page_headers(response, result.value)
+    return response
+
+
+def not_modified(etag):
+    """
+    answers a conditional GET whose If-None-Match matches the current entity tag.
+    Call it before reading the result so a 304 is returned without querying the
+    database or serializing the result.
+    :param etag: {str} current entity tag of the resource, None if unknown
+    :return: {Response} 304 response, None if the resource has to be sent
+    """
+    if not etag or not request.if_none_match.contains(etag):
+        return None
+    return set_cache_headers(Response(status=304), etag)
+
+
+def set_cache_headers(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = Config.CONTENT_CACHE_CONTROL
+    return response
+
+
+def set_page_headers(response, page):
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+    return response
@@ -0,0 +1,114 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g
+
+from app.core.extensions import db
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """
+    This class groups the repository calls of a request or consumer message in a
+    single transaction. Repositories only flush inside a unit of work and the
+    session is committed, or rolled back, once when it ends.
+    """
+
+    def __init__(self):
+        self.flushed = False
+        self._callbacks = {}
+
+    def after_end(self, key, callback):
+        """
+        runs a callback once the unit of work is committed or rolled back e.g to
+        drop cache entries written from uncommitted data
+        :param key: callbacks registered with the same key run once
+        :param callback: {callable} function taking no argument
+        :return: {None}
+        """
+        self._callbacks.setdefault(key, callback)
+
+    def end(self, commit=True):
+        try:
+            if commit and self.flushed and db.session.is_active:
+                # reminder: only the repository writes are committed, attributes
+                # changed after them e.g pre signed urls of a response are dropped
+                db.session.expire_all()
+                db.session.commit()
+            else:
+                db.session.rollback()
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            for callback in self._callbacks.values():
+                try:
+                    callback()
+                except Exception as exc:
+                    logger.warning(f"unit of work callback failed: {exc}")
+
+
+def current_unit_of_work():
+    """
+    :return: {UnitOfWork} unit of work in progress, None outside of one
+    """
+    return _current.get()
+
+
+@contextmanager
+def unit_of_work():
+    """
+    commits the repository calls made in the block once when it exits, rolls
+    them back if it raises. Nested blocks join the unit of work in progress.
+    """
+    if _current.get() is not None:
+        yield _current.get()
+        return
+    work = UnitOfWork()
+    token = _current.set(work)
+    try:
+        yield work
+    except BaseException:
+        _current.reset(token)
+        work.end(commit=False)
+        raise
+    _current.reset(token)
+    work.end(commit=True)
+
+
+def init_app(app):
+    """
+    runs every request in a unit of work. Responses of handled errors are
+    committed as well, e.g failed login attempts are recorded, while unhandled
+    exceptions roll the request back.
+    """
+
+    def end_unit_of_work(commit):
+        token = g.pop("unit_of_work_token", None)
+        if token is None:
+            return
+        work = token.var.get()
+        token.var.reset(token)
+        work.end(commit=commit)
+
+    @app.before_request
+    def begin_unit_of_work():
+        g.unit_of_work_token = _current.set(UnitOfWork())
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        try:
+            end_unit_of_work(commit=True)
+        except Exception:
+            if response.status_code < 400:
+                raise
+            logger.exception("failed to commit the request of an error response")
+        return response
+
+    @app.teardown_request
+    def rollback_unit_of_work(exc):
+        end_unit_of_work(commit=False)
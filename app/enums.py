@@ -17,6 +17,18 @@ class IDEnum(enum.Enum):
     null = "null"
 
 
+class CountModeEnum(enum.Enum):
+    none = "none"
+    exact = "exact"
+    cached = "cached"
+    estimated = "estimated"
+
+
+class ExportFormatEnum(enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 class RegularExpression(enum.Enum):
     phone_number = r"((\+?233)((2)[03467]|(5)[045679])\d{7}$)|(((02)[03467]|(05)[045679])\d{7}$)"  # noqa
     pin = r"([0-9]{4}$)"
@@ -13,6 +13,8 @@ class ServiceEventSubscription(enum.Enum):
 
     # nova-be-inventory
     cust_deposit = ["customer_id", "type_id"]
+    # object storage i.e bucket notifications of the ceph server
+    profile_image_uploaded = ["obj_id"]
 
 
 class ServiceEventPublishing(enum.Enum):
@@ -1,6 +1,9 @@
+from urllib.parse import unquote_plus
+
 from flask import current_app
 
 from app.core.service_interfaces import EventHandlerInterface
+from app.utils import is_profile_image_key
 
 from .event_data_structure import ServiceEventSubscription
 
@@ -14,6 +17,19 @@ class EventSubscriptionHandler(EventHandlerInterface):
         self.event_action = None
 
     def event_handler(self, event_data: dict):
+        if "Records" in event_data:
+            for record in event_data["Records"]:
+                event = self.bucket_notification_event(record)
+                if event:
+                    self.event_handler(event)
+                else:
+                    current_app.logger.info(
+                        f"bucket notification {record.get('eventName')} of "
+                        f"{record.get('s3', {}).get('object', {}).get('key')} "
+                        f"is skipped"
+                    )
+            return None
+
         self.data = event_data
         self.details = event_data.get("details")
         self.meta = event_data.get("meta")
@@ -28,6 +44,27 @@ class EventSubscriptionHandler(EventHandlerInterface):
                 f"event {self.event_action} with data {self.data} did not pass data validation"  # noqa
             )
 
+    @staticmethod
+    def bucket_notification_event(record: dict):
+        """
+        converts a record of a bucket notification of the object storage to an
+        event of this service i.e an upload of a profile image. The other objects
+        of the bucket e.g variants and exports are notified as well
+        :param record: {dict} record of a s3 event notification
+        :return: {dict} the event, None if the record is not handled
+        """
+        # reminder: keys are url encoded in the notifications
+        obj_id = unquote_plus(record.get("s3", {}).get("object", {}).get("key", ""))
+        if "ObjectCreated" not in record.get(
+            "eventName", ""
+        ) or not is_profile_image_key(obj_id):
+            return None
+        return {
+            "service_name": record.get("eventSource"),
+            "details": {"obj_id": obj_id},
+            "meta": {"event_action": "profile_image_uploaded"},
+        }
+
     def validate_event(self, data):
         if self.event_action in ServiceEventSubscription.__members__:
             validator = ServiceEventSubscription[self.event_action].value
@@ -53,3 +90,14 @@ class EventSubscriptionHandler(EventHandlerInterface):
 
         """
         self.customer_controller.cust_deposit(self.details)
+
+    def profile_image_uploaded(self):
+        """
+
+        This event derives the variants of a profile image e.g its thumbnail once
+        the image is uploaded. Event is published by the ceph server to the kafka
+        topic of the bucket notification set on the bucket of the service.
+        :return: None
+
+        """
+        self.customer_controller.derive_profile_image(self.details)
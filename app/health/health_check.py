@@ -1,13 +1,14 @@
+import json
 import os
 
-import boto3
 import requests
-from botocore.client import Config as boto_config
 from kafka import KafkaConsumer
 from kafka.errors import KafkaError
 
 from app.core.extensions import db
-from app.services.redis_service import redis_conn
+from app.core.query_stats import query_metrics
+from app.services.redis_service import RedisService, redis_conn
+from app.services.s3_client import s3_client
 from config import Config
 
 
@@ -16,6 +17,24 @@ def redis_available():
     return True, "redis is ok"
 
 
+def cache_stats():
+    return True, json.dumps(RedisService().stats())
+
+
+def database_pool():
+    return True, json.dumps(
+        {
+            name: engine.pool.stats()
+            for name, engine in db.engines().items()
+            if hasattr(engine.pool, "stats")
+        }
+    )
+
+
+def query_stats():
+    return True, json.dumps(query_metrics.snapshot())
+
+
 def postgres_available():
     try:
         result = db.engine.execute("SELECT 1")
@@ -39,14 +58,15 @@ def keycloak_available():
 
 
 def ceph_available():
-    s3_client = boto3.client(
-        "s3",
-        aws_access_key_id=Config.CEPH_ACCESS_KEY,
-        aws_secret_access_key=Config.CEPH_SECRET_KEY,
-        endpoint_url=Config.CEPH_SERVER_URL,
-        config=boto_config(retries={"max_attempts": 3}),
+    if Config.OBJECT_STORAGE == "local":
+        # reminder: the objects are stored on the disk of the server, not ceph
+        if os.access(Config.LOCAL_STORAGE_ROOT, os.W_OK):
+            return True, "local storage is ok"
+        return False, "local storage is not writable"
+
+    response = (
+        s3_client.get().head_bucket(Bucket=Config.CEPH_BUCKET).get("ResponseMetadata")
     )
-    response = s3_client.head_bucket(Bucket=Config.CEPH_BUCKET).get("ResponseMetadata")
 
     if response.get("HTTPStatusCode") == 200:
         return True, "ceph server is ok"
@@ -72,7 +92,10 @@ def kafka_available():
 
 HEALTH_CHECKS = [
     redis_available,
+    cache_stats,
     postgres_available,
+    database_pool,
+    query_stats,
     ceph_available,
     keycloak_available,
     kafka_available,
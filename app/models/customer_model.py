@@ -30,11 +30,19 @@ class CustomerModel(db.Model):
     retailer_id: str
     level: str
     profile_image: str
+    profile_image_variants: dict
     eula_consent: bool
     created: datetime.datetime
     modified: datetime.datetime
 
     __tablename__ = "customers"
+    __table_args__ = (
+        db.Index(
+            "ix_customers_auth_token",
+            "auth_token",
+            postgresql_where=db.text("auth_token IS NOT NULL"),
+        ),
+    )
     id = db.Column(db.GUID(), primary_key=True, default=uuid.uuid4)
     phone_number = db.Column(db.String(), unique=True, nullable=False)
     full_name = db.Column(db.String(60))
@@ -56,7 +64,8 @@ class CustomerModel(db.Model):
     level = db.Column(db.String())
     auth_token = db.Column(db.String())
     auth_token_expiration = db.Column(db.DateTime(timezone=True))
-    profile_image = db.Column(db.String())
+    profile_image = db.Column(db.String(), index=True)
+    profile_image_variants = db.Column(db.JSON())
     otp_token = db.Column(db.String(), nullable=True)
     otp_token_expiration = db.Column(db.DateTime(timezone=True))
     eula_consent = db.Column(db.Boolean(), nullable=True, default=False)
@@ -21,6 +21,9 @@ class LoginAttemptModel(db.Model):
     modified: datetime.datetime
 
     __tablename__ = "login_attempts"
+    __table_args__ = (
+        db.Index("ix_login_attempts_phone_number_status", "phone_number", "status"),
+    )
     id = db.Column(db.GUID(), primary_key=True, default=uuid.uuid4)
     phone_number = db.Column(db.String(), nullable=False)
     request_ip_address = db.Column(db.String(), nullable=True)
@@ -24,7 +24,7 @@ class RegistrationModel(db.Model):
 
     __tablename__ = "registrations"
     id = db.Column(db.GUID(), primary_key=True, default=uuid.uuid4)
-    phone_number = db.Column(db.String())
+    phone_number = db.Column(db.String(), index=True)
     otp_token = db.Column(db.String(), nullable=True)
     otp_token_expiration = db.Column(db.DateTime(timezone=True))
     auth_token = db.Column(db.String())
@@ -1,9 +1,13 @@
-import json
+import time
 
 from marshmallow import Schema
 
 from app import db
 from app.services import RedisService
+from config import Config
+
+STALE_CACHE_KEY = "{}:stale"
+LOCK_CACHE_KEY = "{}:lock"
 
 
 def cache_object(
@@ -19,7 +23,7 @@ def cache_object(
     """
 
     serialize_object = obj_schema.dumps(obj_data)
-    redis_instance.set(cache_key, serialize_object)
+    cache_serialized_object(serialize_object, cache_key, redis_instance)
 
     return obj_data
 
@@ -38,38 +42,111 @@ def cache_list_of_object(
     """
 
     serialize_all_object = obj_schema.dumps(obj_data, many=True)
-    redis_instance.set(cache_key, serialize_all_object)
+    cache_serialized_object(serialize_all_object, cache_key, redis_instance)
 
     return obj_data
 
 
-def deserialize_cached_object(obj_data: str, obj_model: db.Model, obj_schema: Schema):
+def cache_serialized_object(
+    serialized_object: str, cache_key: str, redis_instance: RedisService
+):
     """
-    This function takes a cache object, typecast it to a model object
-    :param obj_data: {str} object to deserialize
-    :param obj_model: {Model} object model to typecast to
-    :param obj_schema: {Schema} object serializer
-    :return: {Model} deserialized object
+    This function caches a serialized object together with a longer lived stale copy
+    which is served while the object is being refreshed
+    :param serialized_object: {str} object to cache
+    :param cache_key: {str} name of the object
+    :param redis_instance: {RedisService} redis server instance
+    :return: {None}
     """
 
-    deserialized_object = obj_schema.loads(json.dumps(obj_data))
+    redis_instance.set(cache_key, serialized_object, ex=Config.CACHE_TTL)
+    redis_instance.set(
+        STALE_CACHE_KEY.format(cache_key), serialized_object, ex=Config.CACHE_STALE_TTL
+    )
+
+
+def invalidate_cached_object(
+    cache_key: str, redis_instance: RedisService, keep_stale: bool = True
+):
+    """
+    This function removes a cached object so the next read refreshes it
+    :param cache_key: {str} name of the object
+    :param redis_instance: {RedisService} redis server instance
+    :param keep_stale: {bool} keep the stale copy to serve while refreshing
+    :return: {None}
+    """
 
-    return obj_model(**deserialized_object)
+    redis_instance.delete(cache_key)
+    if not keep_stale:
+        redis_instance.delete(STALE_CACHE_KEY.format(cache_key))
 
 
-def deserialize_list_of_cached_object(
-    obj_data: list, obj_model: db.Model, obj_schema: Schema
+def single_flight_cache(
+    cache_key: str,
+    fill_cache,
+    deserialize,
+    redis_instance: RedisService,
+    obj_schema: Schema = None,
 ):
     """
-    This function takes a list of cache object, typecast it the objects to a model object
+    This function reads an object from redis. On a cache miss only one caller across
+    all workers, the holder of a short lived lock, calls fill_cache to query the
+    database. Every other caller serves the stale copy of the object, or waits for
+    the lock holder to fill the cache when no stale copy exists, taking the lock
+    over once it is released or its lease expires.
+    :param cache_key: {str} name of the object
+    :param fill_cache: {callable} queries the object, caches it and returns it
+    :param deserialize: {callable} typecasts a cached object to a model object
+    :param redis_instance: {RedisService} redis server instance
+    :param obj_schema: {Schema} loads the cached object before it is typecast
+    :return: {Model} cached or queried object
+    """
+
+    cached_object = redis_instance.get(cache_key, obj_schema)
+    if cached_object is not None:
+        return deserialize(cached_object)
+
+    lock_key = LOCK_CACHE_KEY.format(cache_key)
+    lock_token = redis_instance.acquire_lock(lock_key, Config.CACHE_LOCK_LEASE)
+    if not lock_token:
+        stale_object = redis_instance.get(STALE_CACHE_KEY.format(cache_key), obj_schema)
+        if stale_object is not None:
+            return deserialize(stale_object)
+
+    # reminder: a holder releasing the lock without filling the cache e.g when the
+    # object does not exist hands it to a single waiter, not to all of them at once
+    while not lock_token:
+        time.sleep(Config.CACHE_LOCK_POLL_INTERVAL)
+        cached_object = redis_instance.get(cache_key, obj_schema)
+        if cached_object is not None:
+            return deserialize(cached_object)
+        lock_token = redis_instance.acquire_lock(lock_key, Config.CACHE_LOCK_LEASE)
+
+    try:
+        return fill_cache()
+    finally:
+        redis_instance.release_lock(lock_key, lock_token)
+
+
+def deserialize_cached_object(obj_data: dict, obj_model: db.Model):
+    """
+    This function takes a cache object loaded by its schema, typecast it to a model
+    object
+    :param obj_data: {dict} object to deserialize
+    :param obj_model: {Model} object model to typecast to
+    :return: {Model} deserialized object
+    """
+
+    return obj_model(**obj_data)
+
+
+def deserialize_list_of_cached_object(obj_data: list, obj_model: db.Model):
+    """
+    This function takes a list of cache object loaded by its schema, typecast the
+    objects to a model object
     :param obj_data: {list} object to deserialize
     :param obj_model: {Model} object model to typecast
-    :param obj_schema: {Schema} object serializer
     :return: {list} deserialized object
     """
 
-    deserialize_objects = obj_schema.loads(json.dumps(obj_data), many=True)
-    for count, value in enumerate(deserialize_objects):
-        deserialize_objects[count] = obj_model(**value)
-
-    return deserialize_objects
+    return [obj_model(**value) for value in obj_data]
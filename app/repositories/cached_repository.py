@@ -0,0 +1,195 @@
+import dataclasses
+import time
+
+from marshmallow import Schema, fields
+
+from app.core.exceptions import HTTPException
+from app.services import RedisService
+
+from .cache_object import (
+    cache_list_of_object,
+    cache_object,
+    deserialize_cached_object,
+    deserialize_list_of_cached_object,
+    single_flight_cache,
+)
+
+VERSION_CACHE_KEY = "{}:version"
+ALL_RECORDS_CACHE_KEY = "{}:v{}:all"
+SINGLE_RECORD_CACHE_KEY = "{}:v{}:{}"
+
+
+class CachedRepositoryMixin:
+    """
+    This class adds read-through redis caching to a SQLBaseRepository. Cached keys
+    are stamped with a version of the table which every create, update and delete
+    bumps, so a write invalidates all cached reads of the table at once and old
+    versions simply expire. Repositories opt in by listing the mixin first:
+
+        class FaqRepository(CachedRepositoryMixin, SQLBaseRepository):
+    """
+
+    redis_service = RedisService()
+    _cache_schemas = {}
+
+    @property
+    def cache_namespace(self):
+        return self.model.__tablename__
+
+    @property
+    def cache_schema(self) -> Schema:
+        """
+        serializer of cached records, built from the dataclass fields of the model
+        """
+        if self.model not in self._cache_schemas:
+            schema = Schema.from_dict(
+                {
+                    field.name: Schema.TYPE_MAPPING.get(field.type, fields.Raw)(
+                        allow_none=True
+                    )
+                    for field in dataclasses.fields(self.model)
+                },
+                name=f"{self.model.__name__}CacheSchema",
+            )
+            self._cache_schemas[self.model] = schema()
+        return self._cache_schemas[self.model]
+
+    def cache_version(self):
+        """
+        :return: {int} current version of the cached records of the table
+        """
+        version_key = VERSION_CACHE_KEY.format(self.cache_namespace)
+        version = self.redis_service.get(version_key)
+        if version is None:
+            # reminder: seeded from the clock so versions are not reused after a flush
+            version = int(time.time() * 1000)
+            # reminder: another worker may have seeded and bumped it meanwhile
+            if not self.redis_service.set(version_key, version, nx=True):
+                version = self.redis_service.get(version_key)
+        return version
+
+    def cache_etag(self):
+        """
+        :return: {str} entity tag of the records of the table, None if unknown
+        """
+        try:
+            return f"{self.cache_namespace}-{self.cache_version()}"
+        except HTTPException:
+            return None
+
+    def bump_cache_version(self):
+        try:
+            self.cache_version()
+            self.redis_service.incr(VERSION_CACHE_KEY.format(self.cache_namespace))
+        except HTTPException:
+            return None
+
+    def index(self):
+        index = super().index
+
+        def fill_cache():
+            return cache_list_of_object(
+                obj_data=index(),
+                obj_schema=self.cache_schema,
+                redis_instance=self.redis_service,
+                cache_key=cache_key,
+            )
+
+        def deserialize(cached_objects):
+            return deserialize_list_of_cached_object(
+                obj_data=cached_objects,
+                obj_model=self.model,
+            )
+
+        try:
+            cache_key = ALL_RECORDS_CACHE_KEY.format(
+                self.cache_namespace, self.cache_version()
+            )
+            return single_flight_cache(
+                cache_key=cache_key,
+                fill_cache=fill_cache,
+                deserialize=deserialize,
+                redis_instance=self.redis_service,
+                obj_schema=self.cache_schema,
+            )
+        except HTTPException:
+            return super().index()
+
+    def get_by_id(self, obj_id):
+        """
+        returns the cached record matching the specified id. The record is not
+        attached to the database session, use find_by_id to modify it.
+        :param obj_id: id of object to query
+        :return: model_object - Returns an instance object of the model passed
+        """
+        find_by_id = super().find_by_id
+
+        def fill_cache():
+            return cache_object(
+                obj_data=find_by_id(obj_id),
+                obj_schema=self.cache_schema,
+                redis_instance=self.redis_service,
+                cache_key=cache_key,
+            )
+
+        def deserialize(cached_object):
+            return deserialize_cached_object(
+                obj_data=cached_object,
+                obj_model=self.model,
+            )
+
+        try:
+            cache_key = SINGLE_RECORD_CACHE_KEY.format(
+                self.cache_namespace, self.cache_version(), obj_id
+            )
+            return single_flight_cache(
+                cache_key=cache_key,
+                fill_cache=fill_cache,
+                deserialize=deserialize,
+                redis_instance=self.redis_service,
+                obj_schema=self.cache_schema,
+            )
+        except HTTPException:
+            return super().find_by_id(obj_id)
+
+    def create(self, obj_in):
+        db_obj = super().create(obj_in)
+        self.bump_cache_version()
+        return db_obj
+
+    def update_by_id(self, obj_id, obj_in):
+        db_obj = super().update_by_id(obj_id, obj_in)
+        self.bump_cache_version()
+        return db_obj
+
+    def update(self, filter_param, obj_in):
+        db_obj = super().update(filter_param, obj_in)
+        self.bump_cache_version()
+        return db_obj
+
+    def delete_by_id(self, obj_id):
+        result = super().delete_by_id(obj_id)
+        self.bump_cache_version()
+        return result
+
+    def delete(self, filter_param):
+        result = super().delete(filter_param)
+        self.bump_cache_version()
+        return result
+
+    def bulk_create(self, objs_in):
+        obj_ids = super().bulk_create(objs_in)
+        self.bump_cache_version()
+        return obj_ids
+
+    def bulk_update(self, objs_in):
+        super().bulk_update(objs_in)
+        self.bump_cache_version()
+
+    def bulk_upsert(self, objs_in, conflict_column):
+        super().bulk_upsert(objs_in, conflict_column)
+        self.bump_cache_version()
+
+    def bulk_delete(self, obj_ids):
+        super().bulk_delete(obj_ids)
+        self.bump_cache_version()
@@ -1,7 +1,9 @@
 from app.core.repository import SQLBaseRepository
 from app.models.contact_us_model import ContactUsModel
 
+from .cached_repository import CachedRepositoryMixin
 
-class ContactUsRepository(SQLBaseRepository):
+
+class ContactUsRepository(CachedRepositoryMixin, SQLBaseRepository):
 
     model = ContactUsModel
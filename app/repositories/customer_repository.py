@@ -1,24 +1,34 @@
-from app.core.exceptions import HTTPException
+import json
+
+from app.core.exceptions import AppException, HTTPException
 from app.core.repository import SQLBaseRepository
 from app.models import CustomerModel
 from app.schema import CustomerSchema
 from app.services import RedisService
+from config import Config
 
 from .cache_object import (
+    STALE_CACHE_KEY,
     cache_list_of_object,
     cache_object,
     deserialize_cached_object,
     deserialize_list_of_cached_object,
+    invalidate_cached_object,
+    single_flight_cache,
 )
 
 SINGLE_RECORD_CACHE_KEY = "customer_{}"
 ALL_RECORDS_CACHE_KEY = "all_customers"
+PHONE_NUMBER_CACHE_KEY = "customer_phone_{}"
 
 
 class CustomerRepository(SQLBaseRepository):
     """
     This class handles the database operations and record caching of customers data.
     customers: users who are done with the registration process.
+    Cache misses are filled by a single worker at a time, see single_flight_cache.
+    Phone numbers are mapped to customer ids in a secondary cache so lookups by phone
+    number resolve through the same cached record as get_by_id.
     """
 
     model = CustomerModel
@@ -29,22 +39,30 @@ class CustomerRepository(SQLBaseRepository):
         super().__init__()
 
     def index(self):
-        try:
-            list_of_cached_object = self.redis_service.get(ALL_RECORDS_CACHE_KEY)
-            if list_of_cached_object:
-                deserialized_objects = deserialize_list_of_cached_object(
-                    obj_data=list_of_cached_object,
-                    obj_schema=self.customer_schema,
-                    obj_model=self.model,
-                )
-                return deserialized_objects
-            server_data = cache_list_of_object(
-                obj_data=super().index(),
+        index = super().index
+
+        def fill_cache():
+            return cache_list_of_object(
+                obj_data=index(),
                 obj_schema=self.customer_schema,
                 redis_instance=self.redis_service,
                 cache_key=ALL_RECORDS_CACHE_KEY,
             )
-            return server_data
+
+        def deserialize(cached_objects):
+            return deserialize_list_of_cached_object(
+                obj_data=cached_objects,
+                obj_model=self.model,
+            )
+
+        try:
+            return single_flight_cache(
+                cache_key=ALL_RECORDS_CACHE_KEY,
+                fill_cache=fill_cache,
+                deserialize=deserialize,
+                redis_instance=self.redis_service,
+                obj_schema=self.customer_schema,
+            )
         except HTTPException:
             return super().index()
 
@@ -57,76 +75,297 @@ class CustomerRepository(SQLBaseRepository):
                 redis_instance=self.redis_service,
                 cache_key=SINGLE_RECORD_CACHE_KEY.format(server_data.id),
             )
-            _ = cache_list_of_object(
-                obj_data=super().index(),
-                obj_schema=self.customer_schema,
-                redis_instance=self.redis_service,
-                cache_key=ALL_RECORDS_CACHE_KEY,
-            )
+            self.forget_phone_number(server_data.phone_number)
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
             return obj_data
         except HTTPException:
             return server_data
 
     def get_by_id(self, obj_id):
-        try:
-            cached_object = self.redis_service.get(
-                SINGLE_RECORD_CACHE_KEY.format(obj_id)
-            )
-            if cached_object:
-                deserialized_object = deserialize_cached_object(
-                    obj_data=cached_object,
-                    obj_model=self.model,
-                    obj_schema=self.customer_schema,
-                )
-                return deserialized_object
-            object_data = cache_object(
-                obj_data=super().find_by_id(obj_id),
+        find_by_id = super().find_by_id
+
+        def fill_cache():
+            return cache_object(
+                obj_data=find_by_id(obj_id),
                 obj_schema=self.customer_schema,
                 redis_instance=self.redis_service,
                 cache_key=SINGLE_RECORD_CACHE_KEY.format(obj_id),
             )
-            return object_data
+
+        def deserialize(cached_object):
+            return deserialize_cached_object(
+                obj_data=cached_object,
+                obj_model=self.model,
+            )
+
+        try:
+            return single_flight_cache(
+                cache_key=SINGLE_RECORD_CACHE_KEY.format(obj_id),
+                fill_cache=fill_cache,
+                deserialize=deserialize,
+                redis_instance=self.redis_service,
+                obj_schema=self.customer_schema,
+            )
         except HTTPException:
             return super().find_by_id(obj_id)
 
     def update_by_id(self, obj_id, obj_in):
+        previous_phone_number = None
+        if "phone_number" in obj_in:
+            previous_phone_number = self.cached_phone_number(obj_id)
         server_data = super().update_by_id(
             obj_id, self.customer_schema.load(obj_in, unknown="include")
         )
         try:
-            cached_object = self.redis_service.get(
-                SINGLE_RECORD_CACHE_KEY.format(obj_id)
-            )
-            if cached_object:
-                self.redis_service.delete(SINGLE_RECORD_CACHE_KEY.format(obj_id))
             object_data = cache_object(
                 obj_data=server_data,
                 obj_schema=self.customer_schema,
                 redis_instance=self.redis_service,
                 cache_key=SINGLE_RECORD_CACHE_KEY.format(server_data.id),
             )
-            _ = cache_list_of_object(
-                obj_data=super().index(),
-                obj_schema=self.customer_schema,
-                redis_instance=self.redis_service,
-                cache_key=ALL_RECORDS_CACHE_KEY,
-            )
+            if previous_phone_number not in (None, server_data.phone_number):
+                self.redis_service.delete(
+                    PHONE_NUMBER_CACHE_KEY.format(previous_phone_number)
+                )
+                self.forget_phone_number(server_data.phone_number)
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
             return object_data
         except HTTPException:
-            return super().update_by_id(obj_id, obj_in)
+            return server_data
 
-    def delete(self, obj_id):
-        server_data = super().delete(obj_id)
+    def cached_phone_number(self, obj_id):
+        """
+        reads the phone number of a customer from its cached record, without a
+        query. find_by_phone_number checks the record an index entry points to, so
+        an entry left behind when the record is not cached is only refreshed later.
+        :param obj_id: id of the customer
+        :return: {str} phone number of the customer, None if the record is not cached
+        """
+        cache_key = SINGLE_RECORD_CACHE_KEY.format(obj_id)
         try:
-            cached_data = self.redis_service.get(SINGLE_RECORD_CACHE_KEY.format(obj_id))
-            if cached_data:
-                self.redis_service.delete(SINGLE_RECORD_CACHE_KEY.format(obj_id))
-            _ = cache_list_of_object(
-                obj_data=super().index(),
+            cached_object = self.redis_service.get(cache_key) or self.redis_service.get(
+                STALE_CACHE_KEY.format(cache_key)
+            )
+        except HTTPException:
+            return None
+        return cached_object.get("phone_number") if cached_object else None
+
+    def delete(self, filter_param):
+        customer = self.find(filter_param)
+        return self.delete_by_id(customer.id)
+
+    def delete_by_id(self, obj_id):
+        # reminder: the record stays in the session, so deleting it does not query again
+        phone_number = super().find_by_id(obj_id).phone_number
+        server_data = super().delete_by_id(obj_id)
+        try:
+            invalidate_cached_object(
+                SINGLE_RECORD_CACHE_KEY.format(obj_id),
+                self.redis_service,
+                keep_stale=False,
+            )
+            self.redis_service.delete(PHONE_NUMBER_CACHE_KEY.format(phone_number))
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
+            return server_data
+        except HTTPException:
+            return server_data
+
+    def bulk_create(self, objs_in):
+        objs_in = [
+            self.customer_schema.load(data, unknown="include") for data in objs_in
+        ]
+        obj_ids = super().bulk_create(objs_in)
+        try:
+            for obj_in in objs_in:
+                self.forget_phone_number(obj_in.get("phone_number"))
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
+        except HTTPException:
+            pass
+        return obj_ids
+
+    def bulk_update(self, objs_in):
+        objs_in = [
+            self.customer_schema.load(data, unknown="include") for data in objs_in
+        ]
+        obj_ids = [obj_in.get("id") for obj_in in objs_in]
+        previous_phone_numbers = {}
+        if any("phone_number" in obj_in for obj_in in objs_in):
+            previous_phone_numbers = self.phone_numbers(obj_ids)
+        super().bulk_update(objs_in)
+        try:
+            for obj_in in objs_in:
+                invalidate_cached_object(
+                    SINGLE_RECORD_CACHE_KEY.format(obj_in.get("id")),
+                    self.redis_service,
+                )
+                phone_number = obj_in.get("phone_number")
+                previous_phone_number = previous_phone_numbers.get(str(obj_in.get("id")))
+                if previous_phone_number not in (None, phone_number):
+                    self.redis_service.delete(
+                        PHONE_NUMBER_CACHE_KEY.format(previous_phone_number)
+                    )
+                    self.forget_phone_number(phone_number)
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
+        except HTTPException:
+            pass
+
+    def bulk_upsert(self, objs_in, conflict_column="phone_number"):
+        objs_in = [
+            self.customer_schema.load(data, unknown="include") for data in objs_in
+        ]
+        super().bulk_upsert(objs_in, conflict_column)
+        conflict_values = [obj_in.get(conflict_column) for obj_in in objs_in]
+        try:
+            customers = self.model.query.with_entities(
+                self.model.id, self.model.phone_number
+            ).filter(getattr(self.model, conflict_column).in_(conflict_values))
+            for obj_id, phone_number in customers:
+                invalidate_cached_object(
+                    SINGLE_RECORD_CACHE_KEY.format(obj_id), self.redis_service
+                )
+                self.forget_phone_number(phone_number)
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
+        except HTTPException:
+            pass
+
+    def bulk_delete(self, obj_ids):
+        phone_numbers = self.phone_numbers(obj_ids)
+        super().bulk_delete(obj_ids)
+        try:
+            for obj_id in obj_ids:
+                invalidate_cached_object(
+                    SINGLE_RECORD_CACHE_KEY.format(obj_id),
+                    self.redis_service,
+                    keep_stale=False,
+                )
+            for phone_number in phone_numbers.values():
+                self.redis_service.delete(PHONE_NUMBER_CACHE_KEY.format(phone_number))
+            invalidate_cached_object(ALL_RECORDS_CACHE_KEY, self.redis_service)
+        except HTTPException:
+            pass
+
+    def phone_numbers(self, obj_ids):
+        """
+        :param obj_ids: {list} ids of customers
+        :return: {dict} phone number of each customer by id
+        """
+        customers = self.model.query.with_entities(
+            self.model.id, self.model.phone_number
+        ).filter(self.model.id.in_(obj_ids))
+        return {str(obj_id): phone_number for obj_id, phone_number in customers}
+
+    def stream_customers(self, filter_param, created_from=None, created_to=None):
+        """
+        streams the customers matching filter_param created in the given range
+        :param filter_param: {dict} e.g status and retailer_id of the customers
+        :param created_from: {datetime} earliest creation date, included
+        :param created_to: {datetime} latest creation date, excluded
+        :return: {Iterator[dict]}
+        """
+        criteria = []
+        if created_from:
+            criteria.append(self.model.created >= created_from)
+        if created_to:
+            criteria.append(self.model.created < created_to)
+        return self.stream(filter_param, criteria)
+
+    def referenced_profile_images(self, obj_ids) -> set:
+        """
+        reads the primary, a profile image set a moment ago must not look orphaned
+        :param obj_ids: keys of objects of the object storage
+        :return: {set} the keys that are the profile image of a customer
+        """
+        if not obj_ids:
+            return set()
+        with self.db.session().using_replica(False):
+            rows = self.db.session.query(self.model.profile_image).filter(
+                self.model.profile_image.in_(list(obj_ids))
+            )
+            return {profile_image for (profile_image,) in rows}
+
+    def find_by_phone_number(self, phone_number, cached=True):
+        """
+        returns the customer with the specified phone number. Unknown phone numbers
+        are cached for a short while so repeated lookups do not reach the database.
+        :param phone_number: phone number of the customer
+        :param cached: {bool} return the cached record which, like get_by_id, leaves
+        out the pin and tokens. Use False when those fields are needed.
+        :return: model_object - Returns an instance object of the model passed
+        """
+        assert phone_number, "Missing phone number of object for querying"
+
+        try:
+            phone_index = self.redis_service.get(
+                PHONE_NUMBER_CACHE_KEY.format(phone_number)
+            )
+        except HTTPException:
+            return super().find({"phone_number": phone_number})
+        if phone_index is None:
+            return self.index_phone_number(phone_number)
+        if phone_index.get("id") is None:
+            raise AppException.NotFoundException(error_message=None)
+
+        try:
+            if cached:
+                customer = self.get_by_id(phone_index.get("id"))
+            else:
+                customer = super().find_by_id(phone_index.get("id"))
+        except AppException.NotFoundException:
+            customer = None
+        if customer is None or customer.phone_number != phone_number:
+            # reminder: the phone number was changed or deleted by another worker
+            self.forget_phone_number(phone_number)
+            return self.index_phone_number(phone_number)
+        return customer
+
+    def index_phone_number(self, phone_number):
+        """
+        queries the customer with the specified phone number and caches its id
+        together with its record, which get_by_id and update_by_id then read
+        :param phone_number: phone number of the customer
+        :return: model_object - Returns an instance object of the model passed
+        """
+        try:
+            customer = super().find({"phone_number": phone_number})
+        except AppException.NotFoundException:
+            self.cache_phone_number(phone_number, None)
+            raise
+        try:
+            cache_object(
+                obj_data=customer,
                 obj_schema=self.customer_schema,
                 redis_instance=self.redis_service,
-                cache_key=ALL_RECORDS_CACHE_KEY,
+                cache_key=SINGLE_RECORD_CACHE_KEY.format(customer.id),
             )
-            return server_data
         except HTTPException:
-            return super().delete(obj_id)
+            pass
+        self.cache_phone_number(phone_number, customer.id)
+        return customer
+
+    def cache_phone_number(self, phone_number, obj_id):
+        """
+        :param phone_number: phone number of the customer
+        :param obj_id: id of the customer, None when no customer has the phone number
+        :return: {None}
+        """
+        try:
+            # reminder: a lookup missing before a concurrent create committed must
+            # not replace the id cached by a lookup made after it
+            self.redis_service.set(
+                PHONE_NUMBER_CACHE_KEY.format(phone_number),
+                json.dumps({"id": str(obj_id) if obj_id else None}),
+                ex=Config.CACHE_STALE_TTL if obj_id else Config.CACHE_NEGATIVE_TTL,
+                nx=obj_id is None,
+            )
+        except HTTPException:
+            return None
+
+    def forget_phone_number(self, phone_number):
+        """
+        drops the cached id of a phone number taken by a write, including an unknown
+        phone number cached by a lookup. The next lookup caches the new id.
+        :param phone_number: phone number of the customer
+        :return: {None}
+        """
+        if phone_number:
+            self.redis_service.delete(PHONE_NUMBER_CACHE_KEY.format(phone_number))
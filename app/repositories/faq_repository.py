@@ -1,7 +1,9 @@
 from app.core.repository import SQLBaseRepository
 from app.models.faq_model import FaqModel
 
+from .cached_repository import CachedRepositoryMixin
 
-class FaqRepository(SQLBaseRepository):
+
+class FaqRepository(CachedRepositoryMixin, SQLBaseRepository):
 
     model = FaqModel
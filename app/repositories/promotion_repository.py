@@ -1,7 +1,9 @@
 from app.core.repository import SQLBaseRepository
 from app.models.promotion_model import PromotionModel
 
+from .cached_repository import CachedRepositoryMixin
 
-class PromotionRepository(SQLBaseRepository):
+
+class PromotionRepository(CachedRepositoryMixin, SQLBaseRepository):
 
     model = PromotionModel
@@ -0,0 +1,53 @@
+import datetime
+import uuid
+
+from app.enums import AccountStatusEnum
+from app.models import CustomerModel, LoginAttemptModel, RegistrationModel
+
+# reminder: the filters the repositories are called with on the hot paths, the
+# values only need the right type
+QUERY_SHAPES = {
+    "customer by id": (CustomerModel, {"id": uuid.uuid4()}),
+    "customer by phone number": (CustomerModel, {"phone_number": "+233590000000"}),
+    "customer by auth token": (CustomerModel, {"auth_token": "token"}),
+    "customer by profile image": (CustomerModel, {"profile_image": "obj_key"}),
+    "registration by phone number": (
+        RegistrationModel,
+        {"phone_number": "+233590000000"},
+    ),
+    "active login attempt by phone number": (
+        LoginAttemptModel,
+        {"phone_number": "+233590000000", "status": AccountStatusEnum.active},
+    ),
+}
+
+
+def customer_row(index):
+    return {
+        "id": uuid.uuid4(),
+        "phone_number": f"+999{index:09d}",
+        # reminder: auth tokens only exist while a pin is being reset
+        "auth_token": f"token{index}" if index % 100 == 0 else None,
+        "profile_image": f"{index:09d}.jpg",
+    }
+
+
+def registration_row(index):
+    return {"id": uuid.uuid4(), "phone_number": f"+999{index:09d}"}
+
+
+def login_attempt_row(index):
+    return {
+        "id": uuid.uuid4(),
+        "phone_number": f"+999{index // 3:09d}",
+        "failed_login_attempts": index % 3,
+        "failed_login_time": datetime.datetime.now(datetime.timezone.utc),
+        "status": AccountStatusEnum.active if index % 3 else AccountStatusEnum.blocked,
+    }
+
+
+SEEDS = {
+    CustomerModel: customer_row,
+    RegistrationModel: registration_row,
+    LoginAttemptModel: login_attempt_row,
+}
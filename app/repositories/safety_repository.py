@@ -1,8 +1,9 @@
 from app.core.repository import SQLBaseRepository
 from app.models.safety_model import SafetyModel
 
+from .cached_repository import CachedRepositoryMixin
 
-class SafetyRepository(SQLBaseRepository):
 
-    model = SafetyModel
+class SafetyRepository(CachedRepositoryMixin, SQLBaseRepository):
 
+    model = SafetyModel
@@ -16,17 +16,23 @@ from .auth_schema import (
     TokenSchema,
 )
 from .customer_schema import (
+    CustomerExportArgSchema,
     CustomerInfoSchema,
     CustomerRequestArgSchema,
     CustomerSchema,
     CustomerSignUpSchema,
     CustomerUpdateSchema,
+    ProfileImageArgSchema,
     RetailerSignUpCustomerSchema,
     UpdatePhoneSchema,
 )
 
 from .faq_schema import *
 from .contact_us_schema import *
-from .owned_otherbrand_cylinder_schema import OwnedOtherBrandCylinderRequestArgSchema,OwnedOtherBrandCylinderPostSchema,OwnedOtherBrandCylinderGetSchema
+from .owned_otherbrand_cylinder_schema import (
+    OwnedOtherBrandCylinderRequestArgSchema,
+    OwnedOtherBrandCylinderPostSchema,
+    OwnedOtherBrandCylinderGetSchema,
+)
 from .promotion_schema import *
 from .safety_schema import *
@@ -1,9 +1,16 @@
 import re
 
-from marshmallow import Schema, fields, pre_load, validate
+from marshmallow import EXCLUDE, Schema, fields, post_load, pre_load, validate
 from marshmallow_enum import EnumField
 
-from app.enums import AccountStatusEnum, IDEnum, RegularExpression
+from app.enums import (
+    AccountStatusEnum,
+    CountModeEnum,
+    ExportFormatEnum,
+    IDEnum,
+    RegularExpression,
+)
+from config import Config
 
 
 class CustomerSchema(Schema):
@@ -17,6 +24,9 @@ class CustomerSchema(Schema):
     id_number = fields.String(allow_none=True)
     status = EnumField(AccountStatusEnum, allow_none=True)
     profile_image = fields.String(allow_none=True)
+    profile_image_variants = fields.Dict(
+        keys=fields.String(), values=fields.String(), allow_none=True
+    )
     auth_service_id = fields.UUID(allow_none=True)
     retailer_id = fields.UUID(allow_none=True)
     level = fields.String(allow_none=True)
@@ -37,6 +47,7 @@ class CustomerSchema(Schema):
             "id_type",
             "id_number",
             "profile_image",
+            "profile_image_variants",
             "auth_service_id",
             "retailer_id",
             "status",
@@ -103,17 +114,58 @@ class UpdatePhoneSchema(Schema):
     token = fields.Str(required=True)
 
 
+class CustomerExportArgSchema(Schema):
+    format = fields.String(
+        allow_none=True,
+        load_default=ExportFormatEnum.ndjson.value,
+        validate=validate.OneOf([export.value for export in ExportFormatEnum]),
+    )
+    status = EnumField(AccountStatusEnum, allow_none=True)
+    retailer_id = fields.UUID(allow_none=True)
+    created_from = fields.DateTime(allow_none=True)
+    created_to = fields.DateTime(allow_none=True)
+
+
+class ProfileImageArgSchema(Schema):
+    per_page = fields.Integer(allow_none=True, validate=validate.Range(min=1))
+    cursor = fields.String(allow_none=True)
+
+    class Meta:
+        unknown = EXCLUDE
+
+    @post_load
+    def limit_page_size(self, data, **kwargs):
+        if data.get("per_page"):
+            data["per_page"] = min(data["per_page"], Config.CEPH_LIST_MAX_PAGE_SIZE)
+        return data
+
+
 class CustomerRequestArgSchema(CustomerSchema):
     phone_number = fields.String(
         validate=validate.Regexp(RegularExpression.phone_number.value)
     )
     customer_id = fields.UUID()
     user_id = fields.UUID()
-    page = fields.Integer()
-    per_page = fields.Integer()
+    page = fields.Integer(allow_none=True, validate=validate.Range(min=1))
+    per_page = fields.Integer(
+        allow_none=True, validate=validate.Range(min=1, max=Config.MAX_PER_PAGE)
+    )
+    cursor = fields.String(allow_none=True)
+    count = fields.String(
+        allow_none=True,
+        validate=validate.OneOf([mode.value for mode in CountModeEnum]),
+    )
 
     class Meta:
-        fields = ["phone_number", "customer_id", "user_id", "page", "per_page"]
+        fields = [
+            "phone_number",
+            "customer_id",
+            "user_id",
+            "page",
+            "per_page",
+            "cursor",
+            "count",
+        ]
 
 
 class RetailerSignUpCustomerSchema(CustomerSchema):
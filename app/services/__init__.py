@@ -1,3 +1,5 @@
 from .ceph_storage import CephObjectStorage
 from .keycloak_service import AuthService
+from .local_storage import LocalObjectStorage
 from .redis_service import RedisService
+from .storage_binding import ObjectStorageBindingSpec
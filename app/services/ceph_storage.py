@@ -1,15 +1,33 @@
-import inspect
+import io
+import json
+import time
 from dataclasses import dataclass
 
-import boto3
-from botocore.client import Config as boto_config
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, ConnectionError
 
-from app.core.exceptions import AppException
+from app.core.exceptions import AppException, HTTPException
+from app.core.repository import Page
 from app.core.service_interfaces import StorageServiceInterface
-from app.utils import get_full_class_name, message_struct
+from app.utils import (
+    IterableReader,
+    caller_context,
+    get_full_class_name,
+    message_struct,
+)
 from config import Config
 
+from .local_cache import MISSING, LocalCache
+from .redis_service import RedisService, cache_stats
+from .s3_client import s3_client
+
+PRESIGNED_URL_CACHE_KEY = "presigned_url:{}"
+
+presigned_url_cache = LocalCache(
+    capacity=Config.CEPH_PRESIGNED_URL_CACHE_CAPACITY,
+    ttl=Config.CEPH_PRESIGNED_URL_CACHE_TTL,
+)
+
 
 @dataclass
 class CephObjectStorage(StorageServiceInterface):
@@ -19,14 +37,13 @@ class CephObjectStorage(StorageServiceInterface):
     It makes api calls to the ceph server on behalf of the application.
     """
 
-    boto3_config = boto_config(retries={"max_attempts": 3})
-    s3_client = boto3.client(
-        "s3",
-        aws_access_key_id=Config.CEPH_ACCESS_KEY,
-        aws_secret_access_key=Config.CEPH_SECRET_KEY,
-        endpoint_url=Config.CEPH_SERVER_URL,
-        config=boto3_config,
+    s3_client = s3_client
+    transfer_config = TransferConfig(
+        multipart_threshold=Config.CEPH_TRANSFER_THRESHOLD,
+        multipart_chunksize=Config.CEPH_TRANSFER_PART_SIZE,
+        max_concurrency=Config.CEPH_TRANSFER_CONCURRENCY,
     )
+    redis_service = RedisService()
 
     def pre_signed_post(self, obj_id: str):
         assert obj_id, "missing id of object"
@@ -39,66 +56,243 @@ class CephObjectStorage(StorageServiceInterface):
         return response
 
     def pre_signed_get(self, obj_id: str):
+        """
+        signs a url to get the object, reusing the url signed for the object
+        earlier while it is valid for CEPH_PRESIGNED_URL_CACHE_TTL seconds more
+        :param obj_id: key of the object
+        :return: {str} pre signed url
+        """
         assert obj_id, "missing id of object"
 
+        url = presigned_url_cache.get(obj_id)
+        if url is not MISSING:
+            cache_stats.hit("presigned_url")
+            return url
+        cache_stats.miss("presigned_url")
+        cached = self.shared_pre_signed_get(obj_id)
+        if cached:
+            presigned_url_cache.set(
+                obj_id, cached["url"], cached["expires_at"] - time.time()
+            )
+            return cached["url"]
+
         response = self.object_storage_request(
             method="generate_presigned_url",
             arg="get_object",
-            kwarg={"Params": {"Bucket": Config.CEPH_BUCKET, "Key": obj_id}},
+            kwarg={
+                "Params": {"Bucket": Config.CEPH_BUCKET, "Key": obj_id},
+                "ExpiresIn": Config.CEPH_PRESIGNED_URL_EXPIRY,
+            },
         )
-
+        ttl = min(
+            Config.CEPH_PRESIGNED_URL_CACHE_TTL, Config.CEPH_PRESIGNED_URL_EXPIRY - 60
+        )
+        if ttl > 0:
+            presigned_url_cache.set(obj_id, response, ttl)
+            self.share_pre_signed_get(obj_id, response, ttl)
         return response
 
+    def shared_pre_signed_get(self, obj_id: str):
+        """
+        :return: {dict} url cached in redis by a worker and the time it has to be
+        dropped at, None if it is not cached or redis is not used
+        """
+        if not Config.CEPH_PRESIGNED_URL_REDIS_CACHE:
+            return None
+        try:
+            cached = self.redis_service.get(PRESIGNED_URL_CACHE_KEY.format(obj_id))
+        except HTTPException:
+            return None
+        if cached and cached["expires_at"] > time.time():
+            return cached
+        return None
+
+    def share_pre_signed_get(self, obj_id: str, url: str, ttl: int):
+        if not Config.CEPH_PRESIGNED_URL_REDIS_CACHE:
+            return
+        cached = {"url": url, "expires_at": time.time() + ttl}
+        try:
+            self.redis_service.set(
+                PRESIGNED_URL_CACHE_KEY.format(obj_id), json.dumps(cached), ex=ttl
+            )
+        except HTTPException:
+            pass
+
     def save(self, obj_id: str, obj_path: str):
+        """
+        uploads a local file, in parts when it is above CEPH_TRANSFER_THRESHOLD
+        :param obj_id: key of the object
+        :param obj_path: path of the file
+        """
         assert obj_id, "missing id of object"
         assert obj_path, "missing path of object"
 
         response = self.object_storage_request(
-            method="put_object",
+            method="upload_file",
             kwarg={
-                "Body": open(obj_path, "rb"),
+                "Filename": obj_path,
                 "Bucket": Config.CEPH_BUCKET,
                 "Key": obj_id,
+                "Config": self.transfer_config,
             },
         )
 
         return response
 
-    def download(self, obj_id: str):
+    def upload(self, obj_id: str, obj, content_type: str = None):
+        """
+        uploads an object in parts of CEPH_TRANSFER_PART_SIZE, uploading
+        CEPH_TRANSFER_CONCURRENCY parts at a time, without holding it in memory
+        :param obj_id: key of the object
+        :param obj: binary file like object, or {Iterator[str|bytes]} content of
+        the object
+        :param content_type: mimetype the object is served with
+        """
         assert obj_id, "missing id of object"
 
-        self.object_storage_request(
-            method="download_file",
-            kwarg={"Bucket": Config.CEPH_BUCKET, "Key": obj_id, "Filename": obj_id},
-        )
+        if not hasattr(obj, "read"):
+            obj = io.BufferedReader(IterableReader(obj))
+        kwarg = {
+            "Fileobj": obj,
+            "Bucket": Config.CEPH_BUCKET,
+            "Key": obj_id,
+            "Config": self.transfer_config,
+        }
+        if content_type:
+            kwarg["ExtraArgs"] = {"ContentType": content_type}
+        response = self.object_storage_request(method="upload_fileobj", kwarg=kwarg)
+
+        return response
+
+    def save_stream(self, obj_id: str, chunks):
+        """
+        uploads an object while it is generated, in parts, without holding it
+        in memory
+        :param obj_id: key of the object
+        :param chunks: {Iterator[str]} content of the object
+        """
+        return self.upload(obj_id, chunks)
+
+    def download(self, obj_id: str, obj):
+        """
+        downloads an object in parts, CEPH_TRANSFER_CONCURRENCY parts at a time
+        :param obj_id: key of the object
+        :param obj: path of the file or binary file like object to write the
+        object to
+        """
+        assert obj_id, "missing id of object"
+        # reminder: a key must not pick the path written to e.g ../../app/__init__.py
+        assert obj, "missing path or file to download the object to"
+
+        kwarg = {
+            "Bucket": Config.CEPH_BUCKET,
+            "Key": obj_id,
+            "Config": self.transfer_config,
+        }
+        if hasattr(obj, "write"):
+            self.object_storage_request(
+                method="download_fileobj", kwarg={**kwarg, "Fileobj": obj}
+            )
+        else:
+            self.object_storage_request(
+                method="download_file", kwarg={**kwarg, "Filename": obj}
+            )
 
         return None
 
+    def stream(self, obj_id: str, chunk_size: int = None):
+        """
+        reads an object a chunk at a time e.g to serve it without holding it in
+        memory
+        :param obj_id: key of the object
+        :param chunk_size: {int} bytes of a chunk, CEPH_STREAM_CHUNK_SIZE by default
+        :return: {tuple} {Iterator[bytes]} content of the object and {dict} its
+        ContentType, ContentLength and ETag
+        """
+        assert obj_id, "missing id of object"
+
+        response = self.object_storage_request(
+            method="get_object", kwarg={"Bucket": Config.CEPH_BUCKET, "Key": obj_id}
+        )
+        metadata = {
+            key: response.get(key) for key in ("ContentType", "ContentLength", "ETag")
+        }
+        body = response["Body"]
+
+        def chunks():
+            try:
+                yield from body.iter_chunks(chunk_size or Config.CEPH_STREAM_CHUNK_SIZE)
+            finally:
+                body.close()
+
+        return chunks(), metadata
+
     def view(self, obj_id: str):
+        """
+        :param obj_id: key of the object
+        :return: {dict} metadata of the object listed by list_objects, None if it
+        does not exist
+        """
         assert obj_id, "missing id of object"
 
+        # reminder: keys are listed in order so a key is the first key it prefixes
         response = self.object_storage_request(
-            method="list_objects", kwarg={"Bucket": Config.CEPH_BUCKET}
+            method="list_objects",
+            kwarg={"Bucket": Config.CEPH_BUCKET, "Prefix": obj_id, "MaxKeys": 1},
         )
-        contents = response.get("Contents")
-        for obj in contents:
+        for obj in response.get("Contents") or []:
             if obj_id == obj.get("Key"):
                 return obj
 
         return None
 
-    def list(self):
+    def list_page(self, page_token: str = None, page_size: int = None, prefix=""):
+        """
+        :param page_token: continuation token of the previous page, None for the
+        first page
+        :param page_size: {int} keys of the page, CEPH_LIST_PAGE_SIZE by default
+        :param prefix: prefix of the keys listed
+        :return: {Page} metadata of the objects with the continuation token of
+        the next page as cursor
+        """
+        kwarg = {
+            "Bucket": Config.CEPH_BUCKET,
+            "Prefix": prefix,
+            "MaxKeys": page_size or Config.CEPH_LIST_PAGE_SIZE,
+        }
+        if page_token:
+            kwarg["ContinuationToken"] = page_token
+        response = self.object_storage_request(method="list_objects_v2", kwarg=kwarg)
 
-        response = self.object_storage_request(
-            method="list_objects", kwarg={"Bucket": Config.CEPH_BUCKET}
+        return Page(
+            response.get("Contents") or [],
+            next_cursor=response.get("NextContinuationToken"),
         )
-        contents = response.get("Contents")
 
-        return contents if contents else None
+    def iter_objects(self, prefix=""):
+        """
+        lists the objects of the bucket a page at a time
+        :param prefix: prefix of the keys listed
+        :return: {Iterator[dict]} metadata of the objects
+        """
+        page_token = None
+        while True:
+            page = self.list_page(page_token=page_token, prefix=prefix)
+            yield from page
+            page_token = page.next_cursor
+            if not page_token:
+                return
 
     def delete(self, obj_id):
         assert obj_id, "missing id of object to delete"
 
+        presigned_url_cache.delete(obj_id)
+        if Config.CEPH_PRESIGNED_URL_REDIS_CACHE:
+            try:
+                self.redis_service.delete(PRESIGNED_URL_CACHE_KEY.format(obj_id))
+            except HTTPException:
+                pass
+
         response = self.object_storage_request(
             method="delete_object",
             kwarg={"Bucket": Config.CEPH_BUCKET, "Key": obj_id},
@@ -106,6 +300,47 @@ class CephObjectStorage(StorageServiceInterface):
 
         return response
 
+    def delete_many(self, obj_ids):
+        """
+        deletes objects CEPH_DELETE_BATCH_SIZE keys per request
+        :param obj_ids: {Iterable[str]} keys of the objects
+        :return: {list} errors of the keys that could not be deleted i.e Key, Code
+        and Message
+        """
+        errors = []
+        batch = []
+        for obj_id in obj_ids:
+            batch.append(obj_id)
+            if len(batch) == Config.CEPH_DELETE_BATCH_SIZE:
+                errors.extend(self.delete_batch(batch))
+                batch = []
+        if batch:
+            errors.extend(self.delete_batch(batch))
+
+        return errors
+
+    def delete_batch(self, obj_ids: list):
+        for obj_id in obj_ids:
+            presigned_url_cache.delete(obj_id)
+            if Config.CEPH_PRESIGNED_URL_REDIS_CACHE:
+                try:
+                    self.redis_service.delete(PRESIGNED_URL_CACHE_KEY.format(obj_id))
+                except HTTPException:
+                    pass
+
+        # reminder: quiet responses only list the keys that failed
+        response = self.object_storage_request(
+            method="delete_objects",
+            kwarg={
+                "Bucket": Config.CEPH_BUCKET,
+                "Delete": {
+                    "Objects": [{"Key": obj_id} for obj_id in obj_ids],
+                    "Quiet": True,
+                },
+            },
+        )
+        return response.get("Errors") or []
+
     def object_storage_request(self, method, kwarg: dict, arg=None):
         try:
             if arg:
@@ -118,9 +353,7 @@ class CephObjectStorage(StorageServiceInterface):
                 context=message_struct(
                     exc_class=get_full_class_name(exc),
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=exc,
                 ),
             )
@@ -130,9 +363,7 @@ class CephObjectStorage(StorageServiceInterface):
                 context=message_struct(
                     exc_class=get_full_class_name(exc),
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=exc,
                 ),
             )
@@ -1,4 +1,3 @@
-import inspect
 from dataclasses import dataclass
 
 import requests
@@ -7,7 +6,7 @@ from requests import exceptions
 import config
 from app.core.exceptions import AppException
 from app.core.service_interfaces.auth_service_interface import AuthServiceInterface
-from app.utils import get_full_class_name, message_struct
+from app.utils import caller_context, get_full_class_name, message_struct
 
 CLIENT_ID = config.Config.KEYCLOAK_CLIENT_ID or ""
 CLIENT_SECRET = config.Config.KEYCLOAK_CLIENT_SECRET or ""
@@ -59,9 +58,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -99,9 +96,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -224,9 +219,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -251,9 +244,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -279,9 +270,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -321,9 +310,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -350,9 +337,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -378,9 +363,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -421,9 +404,7 @@ class AuthService(AuthServiceInterface):
                 status_code=keycloak_response.status_code,
                 context=message_struct(
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=keycloak_response.json(),
                 ),
             )
@@ -444,9 +425,7 @@ class AuthService(AuthServiceInterface):
                 context=message_struct(
                     exc_class=get_full_class_name(exc),
                     module=__name__,
-                    method=inspect.currentframe().f_code.co_name,
-                    calling_module=inspect.stack()[1],
-                    calling_method=inspect.currentframe().f_back.f_code.co_name,
+                    **caller_context(),
                     error=exc,
                 ),
             )
@@ -0,0 +1,99 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+MISSING = object()
+
+
+class LocalCache:
+    """
+    This class is a thread safe in-process cache with least recently used eviction
+    and a time to live on every entry. Each gunicorn worker holds its own instance.
+    """
+
+    def __init__(self, capacity: int, ttl: float):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+
+        :param name: {string} name of the object you want to get
+        :return: {Any} the object, MISSING if it is not cached or has expired
+        """
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return MISSING
+            expires_at, data = entry
+            if time.monotonic() > expires_at:
+                del self._entries[name]
+                return MISSING
+            self._entries.move_to_end(name)
+            return data
+
+    def set(self, name, data, ttl: float = None):
+        """
+
+        :param name: {string} name of the object you want to set
+        :param data: {Any} the object you want to set
+        :param ttl: {float} seconds the object stays cached, defaults to the cache ttl
+        :return: {None}
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[name] = (expires_at, data)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def delete(self, name):
+        """
+
+        :param name: {string} name of the object you want to delete
+        :return: {None}
+        """
+        with self._lock:
+            self._entries.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheStats:
+    """
+    This class counts cache hits and misses per cache tier e.g local and redis
+    """
+
+    def __init__(self):
+        self._counter = Counter()
+        self._lock = threading.Lock()
+
+    def hit(self, tier: str):
+        with self._lock:
+            self._counter[(tier, "hits")] += 1
+
+    def miss(self, tier: str):
+        with self._lock:
+            self._counter[(tier, "misses")] += 1
+
+    def snapshot(self):
+        """
+
+        :return: {dict} hits and misses of each tier e.g {"redis": {"hits": 1}}
+        """
+        with self._lock:
+            stats = {}
+            for (tier, outcome), count in self._counter.items():
+                stats.setdefault(tier, {"hits": 0, "misses": 0})[outcome] = count
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._counter.clear()
@@ -0,0 +1,241 @@
+import bisect
+import hashlib
+import hmac
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote, urlencode
+
+from werkzeug.utils import safe_join
+
+from app.core.exceptions import AppException
+from app.core.repository import Page
+from app.core.service_interfaces import StorageServiceInterface
+from config import Config
+
+
+class LocalObjectStorage(StorageServiceInterface):
+    """
+    This class stores the objects on the disk of the server, under
+    LOCAL_STORAGE_ROOT, instead of the ceph server. The objects are served by the
+    storage blueprint through urls signed with LOCAL_STORAGE_SECRET, the way
+    ceph serves pre signed urls.
+    """
+
+    def __init__(self):
+        # reminder: (prefix, sorted keys) of the last listing, the next pages of
+        # a listing are read from it instead of walking the root again
+        self._listing = None
+
+    def pre_signed_post(self, obj_id: str):
+        assert obj_id, "missing id of object"
+
+        expires = int(time.time()) + Config.CEPH_PRESIGNED_URL_EXPIRY
+        return {
+            "url": f"{Config.LOCAL_STORAGE_URL}/",
+            "fields": {
+                "key": obj_id,
+                "expires": str(expires),
+                "signature": self.signature("POST", obj_id, expires),
+            },
+        }
+
+    def pre_signed_get(self, obj_id: str):
+        assert obj_id, "missing id of object"
+
+        expires = int(time.time()) + Config.CEPH_PRESIGNED_URL_EXPIRY
+        query = urlencode(
+            {"expires": expires, "signature": self.signature("GET", obj_id, expires)}
+        )
+        return f"{Config.LOCAL_STORAGE_URL}/{quote(obj_id)}?{query}"
+
+    @staticmethod
+    def signature(method: str, obj_id: str, expires: int):
+        """
+        :param method: http method the url is signed for
+        :param obj_id: key of the object
+        :param expires: {int} timestamp the url expires at
+        :return: {str} hmac of the url
+        """
+        message = f"{method}\n{obj_id}\n{expires}".encode()
+        return hmac.new(
+            Config.LOCAL_STORAGE_SECRET.encode(), message, hashlib.sha256
+        ).hexdigest()
+
+    def verify(self, method: str, obj_id: str, expires, signature):
+        """
+        :return: {bool} whether the url was signed by this service and is valid
+        """
+        try:
+            expires = int(expires)
+        except (TypeError, ValueError):
+            return False
+        if not signature or expires < time.time():
+            return False
+        return hmac.compare_digest(
+            self.signature(method, obj_id, expires), str(signature)
+        )
+
+    def path(self, obj_id: str):
+        """
+        :param obj_id: key of the object
+        :return: {str} path of the object on the disk
+        """
+        assert obj_id, "missing id of object"
+
+        path = safe_join(Config.LOCAL_STORAGE_ROOT, obj_id)
+        if path is None:
+            raise AppException.ValidationException(
+                error_message=f"invalid object key {obj_id}"
+            )
+        return path
+
+    def save(self, obj_id: str, obj_path: str):
+        assert obj_path, "missing path of object"
+
+        with open(obj_path, "rb") as obj:
+            return self.upload(obj_id, obj)
+
+    def upload(self, obj_id: str, obj, content_type: str = None):
+        """
+        writes an object to a temporary file then moves it in place so readers
+        never see a partial object
+        :param obj_id: key of the object
+        :param obj: binary file like object, or {Iterator[str|bytes]} content of
+        the object
+        :param content_type: unused, the type is guessed from the key when served
+        """
+        path = self.path(obj_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                if hasattr(obj, "read"):
+                    shutil.copyfileobj(obj, file)
+                else:
+                    for chunk in obj:
+                        file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return None
+
+    def save_stream(self, obj_id: str, chunks):
+        return self.upload(obj_id, chunks)
+
+    def download(self, obj_id: str, obj):
+        assert obj, "missing path or file to download the object to"
+
+        with open(self.open_path(obj_id), "rb") as file:
+            if hasattr(obj, "write"):
+                shutil.copyfileobj(file, obj)
+            else:
+                with open(obj, "wb") as output:
+                    shutil.copyfileobj(file, output)
+        return None
+
+    def stream(self, obj_id: str, chunk_size: int = None):
+        path = self.open_path(obj_id)
+        metadata = self.view(obj_id)
+
+        def chunks():
+            with open(path, "rb") as file:
+                while True:
+                    chunk = file.read(chunk_size or Config.CEPH_STREAM_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        return chunks(), {
+            "ContentType": self.content_type(obj_id),
+            "ContentLength": metadata["Size"],
+            "ETag": metadata["ETag"],
+        }
+
+    def open_path(self, obj_id: str):
+        """
+        :return: {str} path of an existing object
+        """
+        path = self.path(obj_id)
+        if not os.path.isfile(path):
+            raise AppException.NotFoundException(
+                error_message=f"object {obj_id} does not exist"
+            )
+        return path
+
+    @staticmethod
+    def content_type(obj_id: str):
+        return mimetypes.guess_type(obj_id)[0] or "application/octet-stream"
+
+    def view(self, obj_id: str):
+        assert obj_id, "missing id of object"
+
+        try:
+            stat = os.stat(self.path(obj_id))
+        except FileNotFoundError:
+            return None
+        return {
+            "Key": obj_id,
+            "Size": stat.st_size,
+            "LastModified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            "ETag": f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+        }
+
+    def keys(self, prefix=""):
+        """
+        :param prefix: prefix of the keys listed
+        :return: {list} sorted keys of the objects
+        """
+        keys = []
+        for directory, _, files in os.walk(Config.LOCAL_STORAGE_ROOT):
+            relative = os.path.relpath(directory, Config.LOCAL_STORAGE_ROOT)
+            for name in files:
+                if name.startswith(".upload-"):
+                    continue
+                key = name if relative == "." else f"{relative}/{name}"
+                key = key.replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def list_page(self, page_token: str = None, page_size: int = None, prefix=""):
+        """
+        :param page_token: key of the last object of the previous page, None for
+        the first page
+        """
+        listing = self._listing
+        if page_token is None or listing is None or listing[0] != prefix:
+            listing = self._listing = (prefix, self.keys(prefix))
+        keys = listing[1]
+        start = bisect.bisect_right(keys, page_token) if page_token else 0
+        page_keys = keys[start : start + (page_size or Config.CEPH_LIST_PAGE_SIZE)]
+        next_token = None
+        if page_keys and start + len(page_keys) < len(keys):
+            next_token = page_keys[-1]
+        return Page(
+            [obj for obj in map(self.view, page_keys) if obj], next_cursor=next_token
+        )
+
+    def iter_objects(self, prefix=""):
+        for key in self.keys(prefix):
+            obj = self.view(key)
+            if obj:
+                yield obj
+
+    def delete(self, obj_id):
+        assert obj_id, "missing id of object to delete"
+
+        try:
+            os.remove(self.path(obj_id))
+        except FileNotFoundError:
+            pass
+        return None
+
+    def delete_many(self, obj_ids):
+        for obj_id in obj_ids:
+            self.delete(obj_id)
+        return []
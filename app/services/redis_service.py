@@ -1,12 +1,21 @@
+import copy
 import json
+import logging
+import os
+import threading
+import time
+import uuid
 
 import redis
 from redis.exceptions import RedisError
 
 from app.core.exceptions import HTTPException
 from app.core.service_interfaces import CacheServiceInterface
+from app.core.unit_of_work import current_unit_of_work
 from config import Config
 
+from .local_cache import MISSING, CacheStats, LocalCache
+
 REDIS_SERVER = Config.REDIS_SERVER
 REDIS_PASSWORD = Config.REDIS_PASSWORD
 REDIS_PORT = Config.REDIS_PORT
@@ -15,34 +24,123 @@ redis_conn = redis.Redis(
     host=REDIS_SERVER, port=REDIS_PORT, db=0, password=REDIS_PASSWORD
 )
 
+local_cache = LocalCache(
+    capacity=Config.LOCAL_CACHE_CAPACITY, ttl=Config.LOCAL_CACHE_TTL
+)
+cache_stats = CacheStats()
+# reminder: comparing and deleting in one script, another worker may take the lock
+# between a get and a delete sent separately
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+logger = logging.getLogger(__name__)
+
+
+class InvalidationListener:
+    """
+    This class keeps the local cache of a worker coherent with the other workers.
+    Every write to a locally cached key is published on a redis channel and each
+    worker drops its copy of the key when the message arrives. It is started lazily
+    once per process so it survives gunicorn forking workers after import.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # reminder: entries copied from the parent process were never invalidated
+            local_cache.clear()
+            threading.Thread(
+                target=self.listen, name="cache-invalidation", daemon=True
+            ).start()
+            self._pid = os.getpid()
+
+    def listen(self):
+        while True:
+            pubsub = redis_conn.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message:
+                        local_cache.delete(message.get("data").decode())
+            except RedisError as exc:
+                # reminder: invalidations may have been missed while disconnected
+                local_cache.clear()
+                logger.warning(f"cache invalidation listener disconnected: {exc}")
+            finally:
+                # reminder: the connection is released before subscribing again
+                pubsub.close()
+            time.sleep(1)
+
+
+invalidation_listener = InvalidationListener(Config.LOCAL_CACHE_CHANNEL)
+
 
 class RedisService(CacheServiceInterface):
-    def set(self, name, data):
+    """
+    This class caches objects in redis. Keys starting with one of the
+    LOCAL_CACHE_NAMESPACES are also kept in an in-process cache in front of redis.
+    """
+
+    def set(self, name, data, ex=None, nx=False):
         """
 
         :param name: {string} name of the object you want to set
         :param data: {Any} the object you want to set
-        :return: {None}
+        :param ex: {int} seconds after which the object expires, None to never expire
+        :param nx: {bool} only set the object if the name is not set already
+        :return: {bool} whether the object was set
         """
         try:
-            redis_conn.set(name, data)
+            if not redis_conn.set(name, data, ex=ex, nx=nx):
+                return False
+            self.invalidate_local(name)
+            self.after_unit_of_work(name, self.delete)
             return True
         except RedisError:
             raise HTTPException(status_code=500, description="Error adding to cache")
 
-    def get(self, name):
+    def get(self, name, obj_schema=None):
         """
 
         :param name: {string} name of the object you want to get
-        :return: {Any}
+        :param obj_schema: {Schema} loads the object. The in-process cache keeps the
+        loaded object, so a local hit is neither parsed nor loaded again
+        :return: {Any} the object, each caller gets its own copy of a local hit
         """
+        cache_locally = self.cache_locally(name)
+        schema_class = type(obj_schema) if obj_schema else None
+        if cache_locally:
+            entry = local_cache.get(name)
+            if entry is not MISSING and entry[0] is schema_class:
+                cache_stats.hit("local")
+                return copy.deepcopy(entry[1])
+            cache_stats.miss("local")
         try:
             data = redis_conn.get(name)
-            if data:
-                return json.loads(data)
-            return data
         except RedisError:
             raise HTTPException(status_code=500, description="Error getting from cache")
+        if not data:
+            cache_stats.miss("redis")
+            return data
+        cache_stats.hit("redis")
+        data = json.loads(data)
+        if obj_schema:
+            data = obj_schema.load(data, many=isinstance(data, list))
+        if cache_locally:
+            local_cache.set(name, (schema_class, copy.deepcopy(data)))
+        return data
 
     def delete(self, name):
         """
@@ -51,5 +149,100 @@ class RedisService(CacheServiceInterface):
         """
         try:
             redis_conn.delete(name)
+            self.invalidate_local(name)
+            self.after_unit_of_work(name, self.delete)
         except RedisError:
             raise HTTPException(status_code=500, description="Error deleting from cache")
+
+    def incr(self, name):
+        """
+        :param name: {string} name of the counter you want to increment
+        :return: {int} value of the counter after the increment
+        """
+        try:
+            value = redis_conn.incr(name)
+            self.invalidate_local(name)
+            self.after_unit_of_work(name, self.incr)
+            return value
+        except RedisError:
+            raise HTTPException(status_code=500, description="Error adding to cache")
+
+    def after_unit_of_work(self, name, write):
+        """
+        Repeat a cache write once the unit of work in progress ends. Readers may
+        cache data read before it commits, or data it rolls back, in the meantime.
+        :param name: {string} name of the object written
+        :param write: {callable} cache write to repeat with the name
+        :return: {None}
+        """
+        work = current_unit_of_work()
+        if work is None or not work.flushed:
+            return
+
+        def repeat():
+            try:
+                write(name)
+            except HTTPException:
+                logger.warning(f"failed to invalidate {name} after unit of work")
+
+        work.after_end((write.__name__, name), repeat)
+
+    def acquire_lock(self, name, lease):
+        """
+        Take a short lived lock shared by every worker using this redis server
+        :param name: {string} name of the lock
+        :param lease: {float} seconds after which the lock is released automatically
+        :return: {str} token needed to release the lock, None if the lock is held
+        """
+        token = uuid.uuid4().hex
+        try:
+            if redis_conn.set(name, token, nx=True, px=int(lease * 1000)):
+                return token
+            return None
+        except RedisError:
+            raise HTTPException(status_code=500, description="Error locking cache")
+
+    def release_lock(self, name, token):
+        """
+        Release a lock taken with acquire_lock. A lock whose lease expired and was
+        taken by another worker is left untouched.
+        :param name: {string} name of the lock
+        :param token: {str} token returned by acquire_lock
+        :return: {None}
+        """
+        try:
+            redis_conn.eval(RELEASE_LOCK_SCRIPT, 1, name, token)
+        except RedisError:
+            raise HTTPException(status_code=500, description="Error unlocking cache")
+
+    # noinspection PyMethodMayBeStatic
+    def cache_locally(self, name):
+        """
+        :param name: {string} name of the object
+        :return: {bool} whether the object is kept in the in-process cache
+        """
+        if not Config.LOCAL_CACHE_NAMESPACES:
+            return False
+        if not name.startswith(tuple(Config.LOCAL_CACHE_NAMESPACES)):
+            return False
+        invalidation_listener.ensure_started()
+        return True
+
+    def invalidate_local(self, name):
+        """
+        Drop an object from the in-process cache of every worker
+        :param name: {string} name of the object
+        :return: {None}
+        """
+        if self.cache_locally(name):
+            local_cache.delete(name)
+            redis_conn.publish(Config.LOCAL_CACHE_CHANNEL, name)
+
+    # noinspection PyMethodMayBeStatic
+    def stats(self):
+        """
+        :return: {dict} hit and miss counters of the local and redis cache tiers
+        """
+        stats = cache_stats.snapshot()
+        stats["local_size"] = len(local_cache)
+        return stats
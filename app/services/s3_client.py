@@ -0,0 +1,44 @@
+import os
+import threading
+
+import boto3
+from botocore.client import Config as boto_config
+
+from config import Config
+
+
+class LazyS3Client:
+    """
+    This class creates the s3 client of the object storage on first use instead
+    of at import, then reuses it. A client is created again in a forked process
+    e.g a gunicorn worker, as the connections of the parent must not be shared.
+    It is a descriptor so a class attribute reads as the client itself.
+    """
+
+    def __init__(self, **client_options):
+        self.client_options = client_options
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        :return: the s3 client of the current process
+        """
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._client = boto3.client("s3", **self.client_options)
+                    self._pid = os.getpid()
+        return self._client
+
+    def __get__(self, instance, owner):
+        return self.get()
+
+
+s3_client = LazyS3Client(
+    aws_access_key_id=Config.CEPH_ACCESS_KEY,
+    aws_secret_access_key=Config.CEPH_SECRET_KEY,
+    endpoint_url=Config.CEPH_SERVER_URL,
+    config=boto_config(retries={"max_attempts": 3}),
+)
@@ -0,0 +1,19 @@
+import pinject
+
+from config import Config
+
+from .ceph_storage import CephObjectStorage
+from .local_storage import LocalObjectStorage
+
+OBJECT_STORAGES = {"ceph": CephObjectStorage, "local": LocalObjectStorage}
+
+
+class ObjectStorageBindingSpec(pinject.BindingSpec):
+    """
+    This class binds the object storage of the controllers to the backend chosen
+    with OBJECT_STORAGE e.g obj_graph = pinject.new_object_graph(...,
+    binding_specs=[ObjectStorageBindingSpec()])
+    """
+
+    def configure(self, bind):
+        bind("ceph_object_storage", to_class=OBJECT_STORAGES[Config.OBJECT_STORAGE])
@@ -1,5 +1,7 @@
 from .auth import auth_required
 from .encoders import JSONEncoder
+from .export import EXPORT_MIMETYPES, IterableReader, export_lines
 from .guid import GUID
-from .log_config import get_full_class_name, message_struct
+from .images import image_mimetype, is_profile_image_key, resize_image
+from .log_config import caller_context, get_full_class_name, message_struct
 from .validator import arg_validator, split_full_name, validator
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from app.enums import ExportFormatEnum
+from config import Config
+
+EXPORT_MIMETYPES = {
+    ExportFormatEnum.ndjson.value: "application/x-ndjson",
+    ExportFormatEnum.csv.value: "text/csv",
+}
+
+
+def export_lines(records, schema, export_format: str):
+    """
+    serializes records one at a time, in chunks of about EXPORT_BUFFER_SIZE bytes
+    :param records: {Iterator} records to export e.g streamed by a repository
+    :param schema: {Schema} schema instance the records are dumped with
+    :param export_format: {str} ndjson or csv
+    :return: {Iterator[str]}
+    """
+    if export_format == ExportFormatEnum.csv.value:
+        lines = csv_lines(records, schema)
+    else:
+        lines = ndjson_lines(records, schema)
+    return buffered(lines, Config.EXPORT_BUFFER_SIZE)
+
+
+def ndjson_lines(records, schema):
+    for record in records:
+        yield json.dumps(schema.dump(record)) + "\n"
+
+
+def csv_lines(records, schema):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(schema.dump_fields))
+    writer.writeheader()
+    for record in records:
+        writer.writerow(schema.dump(record))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def buffered(lines, size: int):
+    chunk = []
+    length = 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+class IterableReader(io.RawIOBase):
+    """
+    This class reads an iterator of str or bytes chunks as a binary file e.g to
+    upload an export to the object storage while it is generated
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                return 0
+            self._pending = chunk.encode() if isinstance(chunk, str) else chunk
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
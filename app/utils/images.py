@@ -0,0 +1,50 @@
+import io
+import uuid
+
+from PIL import Image, ImageOps
+
+
+def resize_image(data: bytes, max_size: int, image_format: str, quality: int):
+    """
+    scales an image down to fit a square, keeping its aspect ratio
+    :param data: {bytes} content of the image
+    :param max_size: {int} longest side of the resized image in pixels
+    :param image_format: format of the resized image e.g WEBP
+    :param quality: {int} quality of the resized image, 0 to 100
+    :return: {bytes} content of the resized image
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        # reminder: a jpeg is decoded at the smallest scale above the size asked
+        image.draft("RGB", (max_size, max_size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_size, max_size))
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality)
+    return output.getvalue()
+
+
+def image_mimetype(image_format: str):
+    """
+    :param image_format: format of an image e.g WEBP
+    :return: {str} mimetype of the format e.g image/webp
+    """
+    Image.init()
+    return Image.MIME.get(image_format.upper(), "application/octet-stream")
+
+
+def is_profile_image_key(obj_id: str):
+    """
+    a profile image is saved at the root of the bucket, named after the id of
+    its customer e.g variants and exports are not profile images
+    :param obj_id: key of an object
+    :return: {bool} whether the key is of a profile image
+    """
+    if not obj_id or "/" in obj_id:
+        return False
+    try:
+        uuid.UUID(obj_id.split(".", 1)[0])
+    except ValueError:
+        return False
+    return True
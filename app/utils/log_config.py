@@ -1,8 +1,12 @@
+import copy
 import json
 import logging
+import os
+import queue
+import sys
+import threading
 from datetime import datetime
-from logging.handlers import SMTPHandler
-from threading import Thread
+from logging.handlers import QueueListener, SMTPHandler
 
 from flask import has_request_context, request
 
@@ -16,6 +20,25 @@ def get_full_class_name(obj):
     return module + "." + obj.__class__.__name__
 
 
+def caller_context(depth=1):
+    """
+    names the method raising an error and its caller from the frames of the
+    call stack. inspect.stack() reads the source file of every frame up to the
+    entry point, which made each error path slower than the request it failed
+    :param depth: {int} frames between the method raising the error and this call
+    :return: {dict} method, calling_module and calling_method of message_struct
+    """
+    frame = sys._getframe(depth)
+    caller = frame.f_back
+    if caller is None:
+        return {"method": frame.f_code.co_name}
+    return {
+        "method": frame.f_code.co_name,
+        "calling_module": f"{caller.f_globals.get('__name__')}:{caller.f_lineno}",
+        "calling_method": caller.f_code.co_name,
+    }
+
+
 def message_struct(
     module, method, error, calling_method=None, calling_module=None, exc_class=None
 ):
@@ -42,40 +65,164 @@ def log_message_struct(record):
     }
 
 
+class MailDigest(logging.Handler):
+    """
+    This handler collects the records dequeued by the listener of a
+    MailHandler. Identical errors are counted instead of kept, and the
+    records are sent as one mail when flushed.
+    """
+
+    def __init__(self, mail_handler, capacity=None):
+        super().__init__()
+        self.mail_handler = mail_handler
+        self.capacity = capacity or Config.MAIL_DIGEST_CAPACITY
+        self.records = {}
+        self.dropped = 0
+
+    def emit(self, record):
+        key = (record.levelno, record.name, record.fingerprint)
+        with self.lock:
+            if key in self.records:
+                self.records[key][1] += 1
+            elif len(self.records) < self.capacity:
+                self.records[key] = [record, 1]
+            else:
+                self.dropped += 1
+
+    def flush(self):
+        with self.lock:
+            records, dropped = list(self.records.values()), self.dropped
+            self.records, self.dropped = {}, 0
+        if records:
+            self.mail_handler.send_mail(records, dropped)
+
+
 class MailHandler(SMTPHandler):
+    """
+    This handler mails the error records as digests. A record is formatted
+    and put on a queue by the logging thread, a QueueListener moves it to a
+    MailDigest, and the digest is mailed every digest_interval seconds over
+    one smtp connection kept open between digests. The threads are started
+    on first use in each process, as a gunicorn worker does not inherit them,
+    with a digest and a connection of its own.
+    """
+
+    def __init__(self, *args, digest_interval=None, capacity=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.digest_interval = digest_interval or Config.MAIL_DIGEST_INTERVAL
+        self.queue = queue.SimpleQueue()
+        self.digest = MailDigest(self, capacity)
+        self.listener = None
+        self.smtp = None
+        self._pid = None
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        self._smtp_lock = threading.Lock()
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # reminder: the records pending in the parent are mailed by the parent
+            self.queue = queue.SimpleQueue()
+            self.digest = MailDigest(self, self.digest.capacity)
+            self.smtp = None
+            self._smtp_lock = threading.Lock()
+            self._stopped = threading.Event()
+            self.listener = QueueListener(self.queue, self.digest)
+            self.listener.start()
+            threading.Thread(target=self.send_digests, daemon=True).start()
+            self._pid = os.getpid()
+
     def emit(self, record):
         """
         Emit a record.
-        Format the record and send it to the specified addressees.
+        Format the record and queue it for the next digest.
         """
-        Thread(target=self.send_mail, kwargs={"record": record}).start()
+        if not self.mailhost:
+            return
+        try:
+            self.start()
+            mail_content = self.format(record)
+            fingerprint = record.getMessage()
+            record = copy.copy(record)
+            record.mail_content, record.fingerprint = mail_content, fingerprint
+            record.args, record.exc_info, record.exc_text = None, None, None
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+    def send_digests(self):
+        while not self._stopped.wait(self.digest_interval):
+            self.digest.flush()
+
+    def connect(self):
+        """
+        :return: the open smtp connection, connected again if it was closed
+        """
+        import smtplib
+
+        if self.smtp is not None:
+            try:
+                self.smtp.noop()
+                return self.smtp
+            except (smtplib.SMTPException, OSError):
+                self.smtp = None
+        smtp = smtplib.SMTP(
+            self.mailhost, self.mailport or smtplib.SMTP_PORT, timeout=30
+        )
+        if self.username:
+            if self.secure is not None:
+                smtp.ehlo()
+                smtp.starttls(*self.secure)
+                smtp.ehlo()
+            smtp.login(self.username, self.password)
+        self.smtp = smtp
+        return smtp
 
-    def send_mail(self, record):
+    def send_mail(self, records, dropped=0):
+        """
+        :param records: {list} [record, occurrences] of the distinct errors
+        :param dropped: {int} errors left out as the digest was full
+        """
         try:
             import email.utils
-            import smtplib
             from email.message import EmailMessage
 
-            port = self.mailport
-            if not port:
-                port = smtplib.SMTP_PORT
-            smtp = smtplib.SMTP(self.mailhost, port, timeout=30)
+            occurrences = sum(count for _, count in records) + dropped
+            content = [
+                f"occurrences: {count}\n{record.mail_content}"
+                for record, count in records
+            ]
+            if dropped:
+                content.append(f"{dropped} other errors were left out of this digest")
             msg = EmailMessage()
             msg["From"] = self.fromaddr
             msg["To"] = ",".join(self.toaddrs)
-            msg["Subject"] = self.getSubject(record)
+            msg["Subject"] = f"{self.getSubject(records[0][0])} ({occurrences} errors)"
             msg["Date"] = email.utils.localtime()
-            msg.set_content(self.format(record))
-            if self.username:
-                if self.secure is not None:
-                    smtp.ehlo()
-                    smtp.starttls(*self.secure)
-                    smtp.ehlo()
-                smtp.login(self.username, self.password)
-            smtp.send_message(msg)
-            smtp.quit()
+            msg.set_content("\n\n".join(content))
+            with self._smtp_lock:
+                self.connect().send_message(msg)
         except Exception:
-            self.handleError(record)
+            self.handleError(records[0][0])
+
+    def close(self):
+        if self._pid == os.getpid():
+            self._stopped.set()
+            self.listener.stop()
+            self.digest.flush()
+            with self._smtp_lock:
+                if self.smtp is not None:
+                    try:
+                        self.smtp.quit()
+                    except Exception:
+                        pass
+                    self.smtp = None
+            self._pid = None
+        super().close()
 
 
 class RequestFormatter(logging.Formatter):
@@ -23,6 +23,31 @@ class Config:
     SQL_DB_NAME = os.getenv("DB_NAME")
     SQL_DB_PASSWORD = os.getenv("DB_PASSWORD")
     SQL_DB_PORT = os.getenv("DB_PORT", default=5432)
+    # hosts of the read replicas e.g "replica-1|replica-2", none by default
+    REPLICA_DB_HOSTS = [
+        host for host in os.getenv("REPLICA_DB_HOSTS", default="").split("|") if host
+    ]
+    # seconds reads stay on the primary after a write of the same client
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", default=5))
+
+    # connection pool of each worker process, and of each replica
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", default=5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", default=10))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", default=30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", default=1800))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", default="true").lower() == "true"
+    # milliseconds after which postgres cancels a statement, 0 to never cancel
+    DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", default=30000))
+
+    # rows sent per statement by the bulk repository operations
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", default=500))
+    # rows fetched at a time and bytes sent at a time by the streaming exports
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", default=1000))
+    EXPORT_BUFFER_SIZE = int(os.getenv("EXPORT_BUFFER_SIZE", default=65536))
+    # commit the repository calls of a request once, when the request ends
+    UNIT_OF_WORK = os.getenv("UNIT_OF_WORK", default="true").lower() == "true"
+    # executions of the same statement in a request logged as a likely N+1 query
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", default=5))
 
     # MONGO database
     MONGODB_DB = os.getenv("DB_NAME")
@@ -36,6 +61,27 @@ class Config:
     REDIS_PORT = os.getenv("REDIS_PORT")
     REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
 
+    # CACHE
+    CACHE_TTL = int(os.getenv("CACHE_TTL", default=300))
+    CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", default=3600))
+    CACHE_NEGATIVE_TTL = int(os.getenv("CACHE_NEGATIVE_TTL", default=30))
+    CACHE_LOCK_LEASE = float(os.getenv("CACHE_LOCK_LEASE", default=5))
+    CACHE_LOCK_POLL_INTERVAL = float(os.getenv("CACHE_LOCK_POLL_INTERVAL", default=0.05))
+    # in-process cache in front of redis, enabled per key prefix e.g customer_|faq:
+    LOCAL_CACHE_NAMESPACES = [
+        namespace
+        for namespace in os.getenv("LOCAL_CACHE_NAMESPACES", default="").split("|")
+        if namespace
+    ]
+    LOCAL_CACHE_CAPACITY = int(os.getenv("LOCAL_CACHE_CAPACITY", default=1024))
+    LOCAL_CACHE_TTL = float(os.getenv("LOCAL_CACHE_TTL", default=30))
+    LOCAL_CACHE_CHANNEL = os.getenv("LOCAL_CACHE_CHANNEL", default="cache_invalidation")
+    COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", default=60))
+    # largest per_page accepted by the paginated lists
+    MAX_PER_PAGE = int(os.getenv("MAX_PER_PAGE", default=1000))
+    # Cache-Control of responses sent with an ETag e.g "no-cache", "max-age=60"
+    CONTENT_CACHE_CONTROL = os.getenv("CONTENT_CACHE_CONTROL", default="no-cache")
+
     # KAFKA
     KAFKA_BOOTSTRAP_SERVERS = os.getenv(
         "KAFKA_BOOTSTRAP_SERVERS", default="localhost:9092"
@@ -67,12 +113,86 @@ class Config:
     DEFAULT_MAIL_SENDER_PASSWORD = os.getenv("DEFAULT_MAIL_SENDER_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
     ADMIN_MAIL_ADDRESSES = os.getenv("ADMIN_MAIL_ADDRESSES", default="").split("|")
+    # seconds the error mails are collected for before sent as one digest
+    MAIL_DIGEST_INTERVAL = int(os.getenv("MAIL_DIGEST_INTERVAL", default=60))
+    # distinct errors kept in a digest, the others are only counted
+    MAIL_DIGEST_CAPACITY = int(os.getenv("MAIL_DIGEST_CAPACITY", default=50))
+
+    # OBJECT STORAGE
+    # backend of the object storage i.e ceph, or local to store the objects on the
+    # disk of the server e.g for load tests and single node deployments
+    OBJECT_STORAGE = os.getenv("OBJECT_STORAGE", default="ceph")
+    LOCAL_STORAGE_ROOT = os.getenv(
+        "LOCAL_STORAGE_ROOT", default=os.path.join(basedir, "instance", "objects")
+    )
+    # url the local objects are served from, the storage blueprint
+    LOCAL_STORAGE_URL = os.getenv(
+        "LOCAL_STORAGE_URL", default="http://localhost:5000/api/v1/customer/storage"
+    )
+    # secret the local object urls are signed with, SECRET_KEY if set, required
+    # to serve the local objects
+    LOCAL_STORAGE_SECRET = os.getenv(
+        "LOCAL_STORAGE_SECRET", default=os.getenv("SECRET_KEY")
+    )
 
     # OBJECT STORAGE (CEPH)
     CEPH_SERVER_URL = os.getenv("CEPH_SERVER_URL", default="http://localhost")
     CEPH_ACCESS_KEY = os.getenv("CEPH_ACCESS_KEY", default="")
     CEPH_SECRET_KEY = os.getenv("CEPH_SECRET_KEY", default="")
     CEPH_BUCKET = os.getenv("CEPH_BUCKET", default="nova-bucket")
+    # seconds pre signed urls are valid and cached, the cache ttl stays a minute
+    # below the expiry at least so an almost expired url is never handed out
+    CEPH_PRESIGNED_URL_EXPIRY = int(os.getenv("CEPH_PRESIGNED_URL_EXPIRY", default=3600))
+    CEPH_PRESIGNED_URL_CACHE_TTL = int(
+        os.getenv("CEPH_PRESIGNED_URL_CACHE_TTL", default=3000)
+    )
+    CEPH_PRESIGNED_URL_CACHE_CAPACITY = int(
+        os.getenv("CEPH_PRESIGNED_URL_CACHE_CAPACITY", default=4096)
+    )
+    # objects above the threshold are transferred in parts of CEPH_TRANSFER_PART_SIZE
+    # bytes, CEPH_TRANSFER_CONCURRENCY parts at a time
+    CEPH_TRANSFER_THRESHOLD = int(
+        os.getenv("CEPH_TRANSFER_THRESHOLD", default=8 * 1024 * 1024)
+    )
+    CEPH_TRANSFER_PART_SIZE = int(
+        os.getenv("CEPH_TRANSFER_PART_SIZE", default=8 * 1024 * 1024)
+    )
+    CEPH_TRANSFER_CONCURRENCY = int(os.getenv("CEPH_TRANSFER_CONCURRENCY", default=10))
+    # bytes read from the object storage at a time when an object is served
+    CEPH_STREAM_CHUNK_SIZE = int(os.getenv("CEPH_STREAM_CHUNK_SIZE", default=65536))
+    # keys deleted per request, s3 deletes 1000 keys at most
+    CEPH_DELETE_BATCH_SIZE = int(os.getenv("CEPH_DELETE_BATCH_SIZE", default=1000))
+    # seconds an unreferenced profile image is kept before it is deleted as orphaned
+    ORPHANED_PROFILE_IMAGE_MIN_AGE = int(
+        os.getenv("ORPHANED_PROFILE_IMAGE_MIN_AGE", default=86400)
+    )
+    # keys listed per request, s3 lists 1000 keys at most
+    CEPH_LIST_PAGE_SIZE = int(os.getenv("CEPH_LIST_PAGE_SIZE", default=100))
+    CEPH_LIST_MAX_PAGE_SIZE = 1000
+    # share the cached urls between the workers through redis
+    CEPH_PRESIGNED_URL_REDIS_CACHE = (
+        os.getenv("CEPH_PRESIGNED_URL_REDIS_CACHE", default="false").lower() == "true"
+    )
+    # variants of the profile images i.e name=longest side in pixels, derived when
+    # the object storage notifies an upload and saved under PROFILE_IMAGE_VARIANT_PREFIX
+    PROFILE_IMAGE_VARIANTS = {
+        name: int(size)
+        for name, size in (
+            variant.split("=")
+            for variant in os.getenv(
+                "PROFILE_IMAGE_VARIANTS", default="thumbnail=128|medium=512"
+            ).split("|")
+        )
+    }
+    PROFILE_IMAGE_VARIANT_FORMAT = os.getenv(
+        "PROFILE_IMAGE_VARIANT_FORMAT", default="WEBP"
+    )
+    PROFILE_IMAGE_VARIANT_QUALITY = int(
+        os.getenv("PROFILE_IMAGE_VARIANT_QUALITY", default=80)
+    )
+    PROFILE_IMAGE_VARIANT_PREFIX = os.getenv(
+        "PROFILE_IMAGE_VARIANT_PREFIX", default="profile-image-variants/"
+    )
 
     @property
     def SQLALCHEMY_DATABASE_URI(self):  # noqa
@@ -84,7 +204,34 @@ class Config:
             db_name=self.SQL_DB_NAME,
         )
 
-    SQLALCHEMY_TRACK_MODIFICATIONS = True
+    @property
+    def SQLALCHEMY_BINDS(self):  # noqa
+        return {
+            f"replica_{index}": "postgresql+psycopg2://{db_user}:{password}@{host}:{port}/{db_name}".format(  # noqa
+                db_user=self.SQL_DB_USER,
+                host=host,
+                password=self.SQL_DB_PASSWORD,
+                port=self.SQL_DB_PORT,
+                db_name=self.SQL_DB_NAME,
+            )
+            for index, host in enumerate(self.REPLICA_DB_HOSTS)
+        }
+
+    @property
+    def SQLALCHEMY_ENGINE_OPTIONS(self):  # noqa
+        return {
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": self.DB_POOL_RECYCLE,
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+            "connect_args": {
+                "application_name": self.APP_NAME,
+                "options": f"-c statement_timeout={self.DB_STATEMENT_TIMEOUT}",
+            },
+        }
+
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
 
 
 class DevelopmentConfig(Config):
@@ -111,6 +258,7 @@ class TestingConfig(Config):
     DEVELOPMENT = True
     LOG_BACKTRACE = True
     LOG_LEVEL = "DEBUG"
+    SQLALCHEMY_ENGINE_OPTIONS = {}
 
     @property
     def SQLALCHEMY_DATABASE_URI(self):
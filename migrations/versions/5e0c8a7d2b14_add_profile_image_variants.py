@@ -0,0 +1,25 @@
+"""add the profile image variants column
+
+Revision ID: 5e0c8a7d2b14
+Revises: b7e2f4c91a3d
+Create Date: 2026-10-19 15:02:18.204117
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e0c8a7d2b14"
+down_revision = "b7e2f4c91a3d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "customers", sa.Column("profile_image_variants", sa.JSON(), nullable=True)
+    )
+
+
+def downgrade():
+    op.drop_column("customers", "profile_image_variants")
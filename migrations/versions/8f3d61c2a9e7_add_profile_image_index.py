@@ -0,0 +1,35 @@
+"""add the index of the profile image lookup
+
+Revision ID: 8f3d61c2a9e7
+Revises: 5e0c8a7d2b14
+Create Date: 2026-10-19 16:20:44.918302
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8f3d61c2a9e7"
+down_revision = "5e0c8a7d2b14"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # reminder: concurrent index builds do not lock the tables against writes
+    # but can not run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_customers_profile_image",
+            "customers",
+            ["profile_image"],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_customers_profile_image",
+            table_name="customers",
+            postgresql_concurrently=True,
+        )
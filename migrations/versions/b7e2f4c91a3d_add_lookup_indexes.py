@@ -0,0 +1,59 @@
+"""add indexes of the phone number and auth token lookups
+
+Revision ID: b7e2f4c91a3d
+Revises: 3c56ac63d7e0
+Create Date: 2026-10-19 10:12:41.530218
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e2f4c91a3d"
+down_revision = "3c56ac63d7e0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # reminder: concurrent index builds do not lock the tables against writes
+    # but can not run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_registrations_phone_number",
+            "registrations",
+            ["phone_number"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_login_attempts_phone_number_status",
+            "login_attempts",
+            ["phone_number", "status"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_customers_auth_token",
+            "customers",
+            ["auth_token"],
+            postgresql_where=sa.text("auth_token IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_customers_auth_token",
+            table_name="customers",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_login_attempts_phone_number_status",
+            table_name="login_attempts",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_registrations_phone_number",
+            table_name="registrations",
+            postgresql_concurrently=True,
+        )
@@ -30,6 +30,7 @@ from app.schema.contact_us_schema import ContactUsGetSchema
 from app.schema.faq_schema import FaqSchema
 from app.schema.promotion_schema import PromotionSchema
 from app.schema.safety_schema import SafetySchema
+from app.services import RedisService
 from config import Config
 from tests.utils.mock_auth_service import MockAuthService
 from tests.utils.mock_ceph_storage_service import MockCephObjectStorage
@@ -53,10 +54,11 @@ class BaseTestCase(TestCase):
         self.refresh_token = self.access_token
         self.headers = {"Authorization": f"Bearer {self.access_token}"}
         self.setup_patches()
-        self.instantiate_classes(self.redis)
+        self.instantiate_classes(RedisService())
         return app
 
     def instantiate_classes(self, redis_service):
+        self.redis_service = redis_service
         self.customer_schema = CustomerSchema()
         self.safety_schema = SafetySchema()
         self.promotion_schema = PromotionSchema()
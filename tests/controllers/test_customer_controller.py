@@ -1,12 +1,18 @@
+import io
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from time import sleep
+from unittest import mock
 
 import pytest
+from flask import current_app
+from PIL import Image
 
 from app.core import Result
 from app.core.exceptions import AppException
+from app.core.repository import Page
 from app.models import CustomerModel, RegistrationModel
+from config import Config
 from tests.base_test_case import BaseTestCase
 
 OTP_CODE = "123456"
@@ -542,10 +548,25 @@ class TestCustomerController(BaseTestCase):
         self.assert404(not_found.exception)
 
     def test_customer_profile_images(self):
-        result = self.customer_controller.customer_profile_images()
+        result = self.customer_controller.customer_profile_images({})
         self.assertIsInstance(result, Result)
         self.assertEqual(result.status_code, 200)
         self.assertIsInstance(result.value, list)
+        self.assertEqual(result.value.next_cursor, "next-page-token")
+
+    def test_customer_profile_image_content(self):
+        self.customer_model.profile_image = str(self.customer_model.id)
+        result = self.customer_controller.customer_profile_image_content(
+            self.customer_model.id
+        )
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(b"".join(result.value["chunks"]), b"image")
+        self.assertEqual(result.value["metadata"]["ContentType"], "image/jpeg")
+        self.customer_model.profile_image = None
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_controller.customer_profile_image_content(
+                self.customer_model.id
+            )
 
     def test_customer_profile_image(self):
         self.customer_model.profile_image = str(self.customer_model.id)
@@ -558,6 +579,138 @@ class TestCustomerController(BaseTestCase):
         self.assertTrue(not_found.exception)
         self.assert404(not_found.exception)
 
+    def test_derive_profile_image(self):
+        original = io.BytesIO()
+        Image.new("RGB", (1024, 768), "red").save(original, format="JPEG")
+        obj_id = self.customer_model.profile_image
+        uploads = {}
+        with mock.patch.object(
+            self.ceph_object_storage,
+            "stream",
+            return_value=(iter([original.getvalue()]), {}),
+        ), mock.patch.object(
+            self.ceph_object_storage,
+            "upload",
+            side_effect=lambda key, obj, content_type: uploads.update(
+                {key: (Image.open(obj), content_type)}
+            ),
+        ):
+            result = self.customer_controller.derive_profile_image({"obj_id": obj_id})
+        self.assertIsNone(result)
+        variants = self.customer_repository.find_by_id(
+            self.customer_model.id
+        ).profile_image_variants
+        self.assertEqual(set(variants), set(Config.PROFILE_IMAGE_VARIANTS))
+        for name, size in Config.PROFILE_IMAGE_VARIANTS.items():
+            image, content_type = uploads[variants[name]]
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(content_type, "image/webp")
+            self.assertEqual(image.size, (size, size * 3 // 4))
+
+        with mock.patch.object(self.ceph_object_storage, "stream") as mock_stream:
+            self.customer_controller.derive_profile_image(
+                {"obj_id": variants["thumbnail"]}
+            )
+            mock_stream.assert_not_called()
+        with mock.patch.object(self.ceph_object_storage, "stream") as mock_stream:
+            self.customer_controller.derive_profile_image(
+                {"obj_id": "exports/customers.ndjson"}
+            )
+            mock_stream.assert_not_called()
+        with self.assertLogs(logger=current_app.logger, level="WARNING") as log:
+            self.customer_controller.derive_profile_image({"obj_id": obj_id})
+            self.customer_controller.derive_profile_image(
+                {"obj_id": f"{uuid.uuid4()}.jpg"}
+            )
+            with mock.patch.object(
+                Image, "open", side_effect=Image.DecompressionBombError
+            ):
+                self.customer_controller.derive_profile_image({"obj_id": obj_id})
+        self.assertEqual(len(log.output), 3)
+        self.assertTrue(all(output.startswith("WARNING") for output in log.output))
+        with mock.patch.object(
+            self.ceph_object_storage,
+            "stream",
+            side_effect=AppException.OperationError(error_message="stream failed"),
+        ), self.assertLogs(logger=current_app.logger, level="CRITICAL") as log:
+            self.customer_controller.derive_profile_image({"obj_id": obj_id})
+        self.assertEqual(len(log.output), 1)
+
+    def test_set_profile_image_clears_variants(self):
+        self.customer_repository.update_by_id(
+            self.customer_model.id,
+            {"profile_image_variants": {"thumbnail": "variant_key"}},
+        )
+        result = self.customer_controller.set_profile_image(self.customer_model.id)
+        self.assertIsNone(result.value.profile_image_variants)
+        self.assertIsNone(
+            self.customer_repository.find_by_id(
+                self.customer_model.id
+            ).profile_image_variants
+        )
+
+    def test_delete_orphaned_profile_images(self):
+        profile_image = self.customer_model.profile_image
+        old = datetime.now(timezone.utc) - timedelta(days=2)
+        variant_prefix = Config.PROFILE_IMAGE_VARIANT_PREFIX
+        orphan = f"{uuid.uuid4()}.jpg"
+        pages = [
+            Page(
+                [
+                    {"Key": profile_image, "LastModified": old},
+                    {"Key": orphan, "LastModified": old},
+                    {
+                        "Key": str(uuid.uuid4()),
+                        "LastModified": datetime.now(timezone.utc),
+                    },
+                    # reminder: an export saved at the root of the bucket by --ceph-key
+                    {"Key": "customers.ndjson", "LastModified": old},
+                ],
+                next_cursor=orphan,
+            ),
+            Page(
+                [
+                    {"Key": "exports/customers", "LastModified": old},
+                    {
+                        "Key": f"{variant_prefix}thumbnail/{orphan}.webp",
+                        "LastModified": old,
+                    },
+                    {
+                        "Key": f"{variant_prefix}thumbnail/{profile_image}.webp",
+                        "LastModified": old,
+                    },
+                ]
+            ),
+        ]
+        with mock.patch.object(
+            self.ceph_object_storage, "list_page", side_effect=pages * 2
+        ), mock.patch.object(
+            self.ceph_object_storage, "delete_many", return_value=[]
+        ) as mock_delete_many:
+            result = self.customer_controller.delete_orphaned_profile_images(
+                dry_run=True
+            )
+            self.assertEqual(
+                result.value, {"scanned": 7, "orphaned": 2, "deleted": 0, "errors": []}
+            )
+            mock_delete_many.assert_not_called()
+
+            result = self.customer_controller.delete_orphaned_profile_images()
+        self.assertEqual(result.value["deleted"], 2)
+        self.assertEqual(
+            [call[0][0] for call in mock_delete_many.call_args_list],
+            [[orphan], [f"{variant_prefix}thumbnail/{orphan}.webp"]],
+        )
+
+    def test_profile_image_variants_are_signed(self):
+        self.customer_model.profile_image_variants = {
+            "thumbnail": "profile-image-variants/thumbnail/obj_key.webp"
+        }
+        result = self.customer_controller.get_customer(self.customer_model.id)
+        self.assertTrue(
+            result.value.profile_image_variants["thumbnail"].startswith("https://")
+        )
+
     def test_cust_deposit(self):
         data = self.customer_test_data.cust_deposit.copy()
         data["customer_id"] = self.customer_model.id
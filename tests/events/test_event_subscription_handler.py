@@ -1,4 +1,5 @@
 import uuid
+from unittest import mock
 
 import pytest
 from flask import current_app
@@ -30,3 +31,36 @@ class TestEventSubscriptionHandler(BaseTestCase):
             )
         self.assertEqual(len(log.output), 1)
         self.assertIn("event unhandled", log.output[0])
+
+    @pytest.mark.event
+    def test_profile_image_uploaded(self):
+        data = self.event_subscription_test_data.profile_image_uploaded
+        with mock.patch.object(
+            self.event_subscription_handler.customer_controller, "derive_profile_image"
+        ) as mock_derive:
+            result = self.event_subscription_handler.event_handler(data)
+        self.assertIsNone(result)
+        mock_derive.assert_called_once_with(
+            {"obj_id": "656f8140-3604-4b54-9149-d0473ac4ec23.jpg"}
+        )
+
+    @pytest.mark.event
+    def test_bucket_notification_is_skipped(self):
+        data = self.event_subscription_test_data.profile_image_uploaded
+        records = [
+            {**data["Records"][0], "eventName": "ObjectRemoved:Delete"},
+            {
+                **data["Records"][0],
+                "s3": {"object": {"key": "profile-image-variants%2Fthumbnail%2Fa"}},
+            },
+            {**data["Records"][0], "s3": {"object": {"key": "customers.ndjson"}}},
+        ]
+        with mock.patch.object(
+            self.event_subscription_handler.customer_controller, "derive_profile_image"
+        ) as mock_derive, self.assertLogs(
+            logger=current_app.logger, level="INFO"
+        ) as log:
+            self.event_subscription_handler.event_handler({"Records": records})
+        mock_derive.assert_not_called()
+        self.assertEqual(len(log.output), 3)
+        self.assertTrue(all(output.startswith("INFO") for output in log.output))
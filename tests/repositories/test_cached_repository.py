@@ -0,0 +1,84 @@
+from unittest import mock
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.core.repository import SQLBaseRepository
+from app.models.faq_model import FaqModel
+from app.repositories.cached_repository import VERSION_CACHE_KEY
+from tests.base_test_case import BaseTestCase
+
+
+class TestCachedRepository(BaseTestCase):
+    @pytest.mark.repository
+    def test_index_is_cached(self):
+        result = self.faq_repository.index()
+        with mock.patch.object(SQLBaseRepository, "index") as index:
+            cached_result = self.faq_repository.index()
+        index.assert_not_called()
+        self.assertEqual(len(cached_result), len(result))
+        self.assertIsInstance(cached_result[0], FaqModel)
+        self.assertEqual(cached_result[0].id, str(self.faq_model.id))
+        self.assertEqual(cached_result[0].question, self.faq_model.question)
+
+    @pytest.mark.repository
+    def test_get_by_id_is_cached(self):
+        self.faq_repository.get_by_id(self.faq_model.id)
+        with mock.patch.object(SQLBaseRepository, "find_by_id") as find_by_id:
+            result = self.faq_repository.get_by_id(self.faq_model.id)
+        find_by_id.assert_not_called()
+        self.assertEqual(result.answer, self.faq_model.answer)
+
+    @pytest.mark.repository
+    def test_writes_bump_version(self):
+        version_key = VERSION_CACHE_KEY.format(FaqModel.__tablename__)
+        self.assertEqual(len(self.faq_repository.index()), 1)
+        version = int(self.redis.get(version_key))
+
+        faq = self.faq_repository.create(self.faq_test_data.create_faq)
+        self.assertEqual(int(self.redis.get(version_key)), version + 1)
+        self.assertEqual(len(self.faq_repository.index()), 2)
+
+        self.faq_repository.update_by_id(faq.id, self.faq_test_data.update_faq)
+        self.assertEqual(self.faq_repository.get_by_id(faq.id).question, "question1")
+
+        self.faq_repository.delete_by_id(faq.id)
+        self.assertEqual(int(self.redis.get(version_key)), version + 3)
+        self.assertEqual(len(self.faq_repository.index()), 1)
+
+    @pytest.mark.repository
+    def test_version_seed_keeps_version_of_other_worker(self):
+        version_key = VERSION_CACHE_KEY.format(FaqModel.__tablename__)
+        self.redis.delete(version_key)
+        get = self.faq_repository.redis_service.get
+
+        def seeded_meanwhile(name, *args, **kwargs):
+            # reminder: the version is seeded and bumped by another worker after
+            # this worker reads it
+            value = get(name, *args, **kwargs)
+            if name == version_key and value is None:
+                self.redis.set(version_key, 5)
+                self.redis.incr(version_key)
+            return value
+
+        with mock.patch.object(
+            self.faq_repository.redis_service, "get", side_effect=seeded_meanwhile
+        ):
+            version = self.faq_repository.cache_version()
+        self.assertEqual(int(version), 6)
+        self.assertEqual(int(self.redis.get(version_key)), 6)
+
+    @pytest.mark.repository
+    def test_cache_etag(self):
+        etag = self.faq_repository.cache_etag()
+        self.assertEqual(etag, self.faq_repository.cache_etag())
+        self.faq_repository.create(self.faq_test_data.create_faq)
+        self.assertNotEqual(etag, self.faq_repository.cache_etag())
+
+    @pytest.mark.repository
+    def test_redis_unavailable(self):
+        with mock.patch.object(self.redis, "get", side_effect=RedisError):
+            result = self.faq_repository.index()
+            etag = self.faq_repository.cache_etag()
+        self.assertEqual(len(result), 1)
+        self.assertIsNone(etag)
@@ -1,6 +1,25 @@
+import datetime
+import uuid
+from unittest import mock
+
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
+from app import db
+from app.core.exceptions import AppException
+from app.core.query_stats import count_queries
+from app.core.repository import SQLBaseRepository
+from app.core.repository.base.pagination import Explain
+from app.core.repository.base.sql_base_repository import COUNT_CACHE_KEY
 from app.models import CustomerModel
+from app.repositories.cache_object import LOCK_CACHE_KEY
+from app.repositories.customer_repository import (
+    ALL_RECORDS_CACHE_KEY,
+    PHONE_NUMBER_CACHE_KEY,
+    SINGLE_RECORD_CACHE_KEY,
+)
+from config import Config
 from tests.base_test_case import BaseTestCase
 
 
@@ -41,3 +60,377 @@ class TestCustomerRepository(BaseTestCase):
         result = self.customer_repository.delete_by_id(self.customer_model.id)
         self.assertIsNone(result)
         self.assertEqual(CustomerModel.query.count(), 0)
+
+    @pytest.mark.repository
+    def test_get_by_id_fills_cache_once(self):
+        with mock.patch.object(
+            SQLBaseRepository, "find_by_id", wraps=self.customer_repository.find_by_id
+        ) as find_by_id:
+            first = self.customer_repository.get_by_id(self.customer_model.id)
+            second = self.customer_repository.get_by_id(self.customer_model.id)
+        self.assertEqual(find_by_id.call_count, 1)
+        self.assertEqual(first.id, second.id)
+
+    @pytest.mark.repository
+    def test_get_by_id_serves_stale_while_refilling(self):
+        cache_key = SINGLE_RECORD_CACHE_KEY.format(self.customer_model.id)
+        self.customer_repository.get_by_id(self.customer_model.id)
+        self.redis_service.delete(cache_key)
+        # reminder: another worker is refilling the expired key
+        self.redis_service.acquire_lock(LOCK_CACHE_KEY.format(cache_key), 5)
+        with mock.patch.object(SQLBaseRepository, "find_by_id") as find_by_id:
+            result = self.customer_repository.get_by_id(self.customer_model.id)
+        find_by_id.assert_not_called()
+        self.assertIsInstance(result, CustomerModel)
+        self.assertEqual(result.id, self.customer_model.id)
+
+    @pytest.mark.repository
+    def test_get_by_id_takes_over_released_lock(self):
+        cache_key = SINGLE_RECORD_CACHE_KEY.format(self.customer_model.id)
+        lock_key = LOCK_CACHE_KEY.format(cache_key)
+        # reminder: another worker holds the lock then fails without filling the cache
+        lock_token = self.redis_service.acquire_lock(lock_key, 5)
+
+        def release_lock(_):
+            self.redis_service.release_lock(lock_key, lock_token)
+
+        with mock.patch(
+            "app.repositories.cache_object.time.sleep", side_effect=release_lock
+        ) as sleep, mock.patch.object(
+            SQLBaseRepository, "find_by_id", wraps=self.customer_repository.find_by_id
+        ) as find_by_id:
+            result = self.customer_repository.get_by_id(self.customer_model.id)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(find_by_id.call_count, 1)
+        self.assertEqual(result.id, self.customer_model.id)
+        self.assertIsNone(self.redis_service.get(lock_key))
+
+    @pytest.mark.repository
+    def test_index_refilled_after_write(self):
+        self.customer_repository.index()
+        self.customer_repository.create(self.customer_test_data.create_customer)
+        self.assertIsNone(self.redis_service.get(ALL_RECORDS_CACHE_KEY))
+        self.assertEqual(len(self.customer_repository.index()), 2)
+        self.assertEqual(len(self.redis_service.get(ALL_RECORDS_CACHE_KEY)), 2)
+
+    @pytest.mark.repository
+    def test_delete_by_id_drops_cached_record(self):
+        self.customer_repository.get_by_id(self.customer_model.id)
+        self.customer_repository.delete_by_id(self.customer_model.id)
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.get_by_id(self.customer_model.id)
+
+    @pytest.mark.repository
+    def test_find_by_phone_number(self):
+        phone_number = self.customer_model.phone_number
+        result = self.customer_repository.find_by_phone_number(phone_number)
+        self.assertEqual(result.id, self.customer_model.id)
+        with mock.patch.object(SQLBaseRepository, "find") as find:
+            result = self.customer_repository.find_by_phone_number(phone_number)
+            uncached_result = self.customer_repository.find_by_phone_number(
+                phone_number, cached=False
+            )
+        find.assert_not_called()
+        self.assertEqual(result.id, self.customer_model.id)
+        self.assertTrue(uncached_result.verify_pin("1234"))
+
+    @pytest.mark.repository
+    def test_find_by_unknown_phone_number(self):
+        phone_number = "0590000000"
+        with mock.patch.object(
+            SQLBaseRepository, "find", wraps=self.customer_repository.find
+        ) as find:
+            for _ in range(2):
+                with self.assertRaises(AppException.NotFoundException):
+                    self.customer_repository.find_by_phone_number(phone_number)
+        self.assertEqual(find.call_count, 1)
+        customer = self.customer_repository.create(
+            self.customer_test_data.create_customer
+        )
+        result = self.customer_repository.find_by_phone_number(phone_number)
+        self.assertEqual(result.id, customer.id)
+
+    @pytest.mark.repository
+    def test_unknown_phone_number_does_not_replace_cached_id(self):
+        phone_number = "0590000000"
+        cache_key = PHONE_NUMBER_CACHE_KEY.format(phone_number)
+        self.customer_repository.cache_phone_number(phone_number, None)
+        customer = self.customer_repository.create(
+            self.customer_test_data.create_customer
+        )
+        self.assertIsNone(self.redis_service.get(cache_key))
+        self.customer_repository.find_by_phone_number(phone_number)
+        self.assertEqual(self.redis_service.get(cache_key), {"id": str(customer.id)})
+        # reminder: a lookup which missed before the create committed ends late
+        self.customer_repository.cache_phone_number(phone_number, None)
+        self.assertEqual(self.redis_service.get(cache_key), {"id": str(customer.id)})
+        result = self.customer_repository.find_by_phone_number(phone_number)
+        self.assertEqual(result.id, customer.id)
+
+    @pytest.mark.repository
+    def test_phone_number_cache_follows_updates(self):
+        old_phone_number = self.customer_model.phone_number
+        self.customer_repository.find_by_phone_number(old_phone_number)
+        with count_queries() as stats:
+            self.customer_repository.update_by_id(
+                self.customer_model.id, {"phone_number": "0590000001"}
+            )
+        # reminder: the old phone number is read from the cached record, not queried
+        self.assertTrue(next(iter(stats.fingerprints)).startswith("UPDATE customers"))
+        self.assertIsNone(
+            self.redis_service.get(PHONE_NUMBER_CACHE_KEY.format(old_phone_number))
+        )
+        result = self.customer_repository.find_by_phone_number("0590000001")
+        self.assertEqual(result.id, self.customer_model.id)
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.find_by_phone_number(old_phone_number)
+        self.customer_repository.delete_by_id(self.customer_model.id)
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.find_by_phone_number("0590000001")
+
+    @pytest.mark.repository
+    def test_cursor_paginate(self):
+        for index in range(1, 5):
+            self.customer_repository.create(
+                {
+                    **self.customer_test_data.create_customer,
+                    "phone_number": f"+23359000000{index}",
+                }
+            )
+        for sort_by, sort_in in [("id", "asc"), ("phone_number", "desc")]:
+            records, cursor = [], None
+            while True:
+                page = self.customer_repository.cursor_paginate(
+                    {}, per_page=2, cursor=cursor, sort_by=sort_by, sort_in=sort_in
+                )
+                records.extend(page)
+                cursor = page.next_cursor
+                if not cursor:
+                    break
+            values = [getattr(record, sort_by) for record in records]
+            self.assertEqual(len(records), 5)
+            self.assertEqual(values, sorted(values, reverse=sort_in == "desc"))
+
+    @pytest.mark.repository
+    def test_cursor_paginate_is_stable_under_inserts(self):
+        customer = self.customer_repository.create(
+            {**self.customer_test_data.create_customer, "phone_number": "0590000001"}
+        )
+        page = self.customer_repository.cursor_paginate(
+            {}, per_page=1, sort_by="phone_number"
+        )
+        self.assertEqual(page, [self.customer_model])
+        self.customer_repository.create(
+            {**self.customer_test_data.create_customer, "phone_number": "0200000000"}
+        )
+        next_page = self.customer_repository.cursor_paginate(
+            {}, per_page=1, cursor=page.next_cursor, sort_by="phone_number"
+        )
+        self.assertEqual([record.id for record in next_page], [customer.id])
+        self.assertIsNone(next_page.next_cursor)
+
+    @pytest.mark.repository
+    def test_cursor_paginate_invalid_cursor(self):
+        self.customer_repository.create(self.customer_test_data.create_customer)
+        page = self.customer_repository.cursor_paginate({}, per_page=1)
+        with self.assertRaises(AppException.ValidationException):
+            self.customer_repository.cursor_paginate(
+                {}, per_page=1, cursor=page.next_cursor, sort_by="phone_number"
+            )
+        with self.assertRaises(AppException.ValidationException):
+            self.customer_repository.cursor_paginate({}, per_page=1, cursor="invalid")
+        for per_page in (0, -1):
+            with self.assertRaises(AppException.OperationError):
+                self.customer_repository.cursor_paginate({}, per_page=per_page)
+
+    @pytest.mark.repository
+    def test_paginate_count(self):
+        self.customer_repository.create(self.customer_test_data.create_customer)
+        page = self.customer_repository.paginate(page=1, per_page=1)
+        self.assertEqual(len(page), 1)
+        self.assertIsNone(page.total)
+        for count in ["exact", "estimated"]:
+            page = self.customer_repository.paginate(page=2, per_page=1, count=count)
+            self.assertEqual(len(page), 1)
+            self.assertEqual(page.total, 2)
+        page = self.customer_repository.filter_paginate(
+            {"phone_number": self.customer_model.phone_number},
+            page=1,
+            per_page=1,
+            count="exact",
+        )
+        self.assertEqual(page.total, 1)
+        with self.assertRaises(AppException.OperationError):
+            self.customer_repository.paginate(page=1, per_page=1, count="all")
+
+    @pytest.mark.repository
+    def test_paginate_cached_count(self):
+        page = self.customer_repository.paginate(page=1, per_page=1, count="cached")
+        self.assertEqual(page.total, 1)
+        self.assertEqual(
+            int(self.redis.get(COUNT_CACHE_KEY.format("customers", "{}"))), 1
+        )
+        self.customer_repository.create(self.customer_test_data.create_customer)
+        page = self.customer_repository.paginate(page=1, per_page=1, count="cached")
+        self.assertEqual(page.total, 1)
+
+    @pytest.mark.repository
+    def test_estimated_count_query(self):
+        statement = Explain(CustomerModel.query.filter_by(level="1").statement)
+        self.assertTrue(
+            str(statement.compile(dialect=postgresql.dialect())).startswith(
+                "EXPLAIN (FORMAT JSON) SELECT"
+            )
+        )
+
+    @pytest.mark.repository
+    def test_column_values(self):
+        values = self.customer_repository.column_values(
+            {"pin": "4321", "email": None, "unknown": "value"}
+        )
+        columns = {column.name: value for column, value in values.items()}
+        self.assertEqual(set(columns), {"pin", "email"})
+        self.assertTrue(CustomerModel(hash_pin=columns["pin"]).verify_pin("4321"))
+
+    @pytest.mark.repository
+    def test_update_returning(self):
+        table = CustomerModel.__table__
+        row = db.session.execute(
+            select(*table.c).where(table.c.id == self.customer_model.id)
+        ).first()
+        row = {column: row._mapping[column] for column in table.c}
+        row[table.c.email] = "returned@example.com"
+        with mock.patch.object(
+            SQLBaseRepository, "supports_returning", return_value=True
+        ), mock.patch.object(db.session, "execute") as execute:
+            execute.return_value.first.return_value = mock.Mock(_mapping=row)
+            result = self.customer_repository.update_by_id(
+                self.customer_model.id, {"email": "returned@example.com"}
+            )
+        statement = execute.call_args.args[0]
+        self.assertEqual(execute.call_count, 1)
+        self.assertIn("RETURNING", str(statement.compile(dialect=postgresql.dialect())))
+        self.assertIs(result, self.customer_model)
+        self.assertEqual(result.email, "returned@example.com")
+
+    @pytest.mark.repository
+    def test_update_by_unknown_id(self):
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.update_by_id(uuid.uuid4(), {"email": None})
+
+    @pytest.mark.repository
+    @mock.patch.object(Config, "BULK_CHUNK_SIZE", 2)
+    def test_bulk_create(self):
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.find_by_phone_number("0590000001")
+        objs_in = [
+            {**self.customer_test_data.create_customer, "phone_number": f"059000000{i}"}
+            for i in range(1, 6)
+        ]
+        obj_ids = self.customer_repository.bulk_create(objs_in)
+        self.assertEqual(len(obj_ids), 5)
+        customer = self.customer_repository.find_by_phone_number("0590000001")
+        self.assertEqual(customer.id, obj_ids[0])
+        self.assertTrue(
+            self.customer_repository.find_by_id(obj_ids[0]).verify_pin("1234")
+        )
+        self.assertEqual(len(self.customer_repository.index()), 6)
+
+    @pytest.mark.repository
+    def test_bulk_create_is_atomic(self):
+        objs_in = [
+            {**self.customer_test_data.create_customer, "phone_number": "0590000001"},
+            {**self.customer_test_data.create_customer, "phone_number": "0590000001"},
+        ]
+        with self.assertRaises(AppException.OperationError):
+            self.customer_repository.bulk_create(objs_in)
+        self.assertEqual(len(self.customer_repository.index()), 1)
+
+    @pytest.mark.repository
+    def test_bulk_update(self):
+        customer = self.customer_repository.create(
+            self.customer_test_data.create_customer
+        )
+        self.customer_repository.get_by_id(self.customer_model.id)
+        self.customer_repository.bulk_update(
+            [
+                {"id": self.customer_model.id, "phone_number": "0590000002"},
+                {"id": customer.id, "email": "bulk@example.com", "pin": "4321"},
+            ]
+        )
+        result = self.customer_repository.get_by_id(self.customer_model.id)
+        self.assertEqual(result.phone_number, "0590000002")
+        result = self.customer_repository.find_by_phone_number("0590000002")
+        self.assertEqual(result.id, self.customer_model.id)
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.find_by_phone_number(
+                self.customer_test_data.existing_customer["phone_number"]
+            )
+        customer = self.customer_repository.find_by_id(customer.id)
+        self.assertEqual(customer.email, "bulk@example.com")
+        self.assertTrue(customer.verify_pin("4321"))
+
+    @pytest.mark.repository
+    def test_bulk_upsert(self):
+        phone_number = self.customer_model.phone_number
+        self.customer_repository.get_by_id(self.customer_model.id)
+        self.customer_repository.bulk_upsert(
+            [
+                {"phone_number": phone_number, "email": "upsert@example.com"},
+                {"phone_number": "0590000003", "email": "new@example.com"},
+            ]
+        )
+        result = self.customer_repository.get_by_id(self.customer_model.id)
+        self.assertEqual(result.email, "upsert@example.com")
+        self.assertEqual(result.full_name, self.customer_model.full_name)
+        result = self.customer_repository.find_by_phone_number("0590000003")
+        self.assertEqual(result.email, "new@example.com")
+        self.assertEqual(len(self.customer_repository.index()), 2)
+
+    @pytest.mark.repository
+    def test_bulk_delete(self):
+        customer = self.customer_repository.create(
+            self.customer_test_data.create_customer
+        )
+        obj_id, phone_number = customer.id, customer.phone_number
+        self.customer_repository.get_by_id(self.customer_model.id)
+        self.customer_repository.bulk_delete([self.customer_model.id, obj_id])
+        self.assertEqual(self.customer_repository.index(), [])
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.get_by_id(obj_id)
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.find_by_id(obj_id)
+        with self.assertRaises(AppException.NotFoundException):
+            self.customer_repository.find_by_phone_number(phone_number)
+
+    @pytest.mark.repository
+    def test_referenced_profile_images(self):
+        profile_image = self.customer_model.profile_image
+        self.assertEqual(
+            self.customer_repository.referenced_profile_images(
+                {profile_image, "orphan.jpg"}
+            ),
+            {profile_image},
+        )
+        self.assertEqual(
+            self.customer_repository.referenced_profile_images(set()), set()
+        )
+
+    @pytest.mark.repository
+    def test_stream_customers(self):
+        customer = self.customer_repository.create(
+            self.customer_test_data.create_customer
+        )
+        with mock.patch.object(Config, "EXPORT_CHUNK_SIZE", 1):
+            records = list(self.customer_repository.stream_customers({}))
+        self.assertEqual(len(records), 2)
+        self.assertIsInstance(records[0], dict)
+
+        records = self.customer_repository.stream_customers(
+            {"status": customer.status, "phone_number": customer.phone_number}
+        )
+        self.assertEqual([record["id"] for record in records], [customer.id])
+        records = self.customer_repository.stream_customers(
+            {}, created_from=customer.created + datetime.timedelta(days=1)
+        )
+        self.assertEqual(list(records), [])
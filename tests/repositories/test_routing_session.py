@@ -0,0 +1,76 @@
+from unittest import mock
+
+import pytest
+from flask import url_for
+from sqlalchemy import event
+
+from app import db
+from app.core.routing_session import READ_PRIMARY_COOKIE
+from tests.base_test_case import BaseTestCase
+
+
+class TestRoutingSession(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        # reminder: the replica is the test database opened with another engine
+        self.app.config["SQLALCHEMY_BINDS"] = {
+            "replica_0": self.app.config["SQLALCHEMY_DATABASE_URI"]
+        }
+        db.session.remove()
+        self.replica_statements = []
+        event.listen(
+            db.get_engine(self.app, bind="replica_0"),
+            "before_cursor_execute",
+            self.record_replica_statement,
+        )
+
+    def record_replica_statement(self, conn, cursor, statement, *args):
+        self.replica_statements.append(statement)
+
+    @pytest.mark.repository
+    def test_reads_go_to_replica(self):
+        phone_number = self.login_attempt_test_data.existing_attempt["phone_number"]
+        self.registration_repository.index()
+        self.login_attempt_repository.find({"phone_number": phone_number})
+        self.assertEqual(len(self.replica_statements), 2)
+
+    @pytest.mark.repository
+    def test_writes_go_to_primary(self):
+        registration = self.registration_repository.create(
+            {"phone_number": "+233590000001"}
+        )
+        self.registration_repository.update(
+            {"phone_number": "+233590000001"}, {"otp_token": "123456"}
+        )
+        self.registration_repository.delete_by_id(registration.id)
+        self.assertEqual(self.replica_statements, [])
+
+    @pytest.mark.repository
+    def test_reads_stay_on_primary_after_a_write(self):
+        self.registration_repository.create({"phone_number": "+233590000001"})
+        self.registration_repository.find({"phone_number": "+233590000001"})
+        self.assertEqual(self.replica_statements, [])
+
+        with mock.patch("app.core.routing_session.Config.REPLICA_STICKY_SECONDS", 0):
+            self.registration_repository.find({"phone_number": "+233590000001"})
+        self.assertEqual(len(self.replica_statements), 1)
+
+    @pytest.mark.views
+    def test_client_reads_primary_after_its_write(self):
+        with self.client:
+            response = self.client.post(
+                url_for("faq.create_faq"), json=self.faq_test_data.create_faq
+            )
+            self.assertStatus(response, 201)
+            self.assertIn(READ_PRIMARY_COOKIE, response.headers.get("Set-Cookie"))
+
+            # reminder: every request of a server has its own session
+            db.session.remove()
+            self.client.get(url_for("faq.get_faq"))
+            self.assertEqual(self.replica_statements, [])
+
+            db.session.remove()
+            self.client.delete_cookie("localhost", READ_PRIMARY_COOKIE)
+            self.redis.flushall()
+            self.client.get(url_for("faq.get_faq"))
+            self.assertEqual(len(self.replica_statements), 1)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+import pytest
+
+from app import db
+from app.core.unit_of_work import current_unit_of_work, unit_of_work
+from app.models.faq_model import FaqModel
+from tests.base_test_case import BaseTestCase
+
+
+class TestUnitOfWork(BaseTestCase):
+    @pytest.mark.repository
+    def test_commits_once(self):
+        with mock.patch.object(db.session, "commit", wraps=db.session.commit) as commit:
+            with unit_of_work() as work:
+                self.faq_repository.create(self.faq_test_data.create_faq)
+                self.faq_repository.create(self.faq_test_data.update_faq)
+                commit.assert_not_called()
+                self.assertTrue(work.flushed)
+        commit.assert_called_once()
+        self.assertIsNone(current_unit_of_work())
+        self.assertEqual(FaqModel.query.count(), 3)
+
+    @pytest.mark.repository
+    def test_rolls_back_on_error(self):
+        with self.assertRaises(ValueError):
+            with unit_of_work():
+                self.faq_repository.create(self.faq_test_data.create_faq)
+                raise ValueError("failed")
+        self.assertEqual(FaqModel.query.count(), 1)
+
+    @pytest.mark.repository
+    def test_nested_unit_of_work_joins_outer(self):
+        with unit_of_work() as work:
+            with unit_of_work() as nested_work:
+                self.assertIs(nested_work, work)
+                self.faq_repository.create(self.faq_test_data.create_faq)
+            self.assertIs(current_unit_of_work(), work)
+            db.session.rollback()
+        self.assertEqual(FaqModel.query.count(), 1)
+
+    @pytest.mark.repository
+    def test_bulk_operations_use_a_savepoint(self):
+        with unit_of_work():
+            self.faq_repository.create(self.faq_test_data.create_faq)
+            self.faq_repository.bulk_delete([self.faq_model.id])
+        self.assertEqual(FaqModel.query.count(), 1)
+        self.assertIsNone(FaqModel.query.get(self.faq_model.id))
+
+    @pytest.mark.repository
+    def test_cache_written_before_commit_is_invalidated(self):
+        self.redis_service.set("faq:test", "before")
+        with unit_of_work():
+            self.redis_service.set("faq:test", "not flushed")
+            self.assertEqual(self.redis.get("faq:test"), b"not flushed")
+            self.faq_repository.create(self.faq_test_data.create_faq)
+            self.redis_service.set("faq:test", "uncommitted")
+            self.assertEqual(self.redis.get("faq:test"), b"uncommitted")
+        self.assertIsNone(self.redis.get("faq:test"))
+
+    @pytest.mark.repository
+    def test_changes_not_flushed_by_repositories_are_dropped(self):
+        with unit_of_work():
+            faq = self.faq_repository.create(self.faq_test_data.create_faq)
+            faq.question = "not saved"
+            self.faq_model.answer = "not saved"
+        self.assertEqual(FaqModel.query.get(faq.id).question, "string")
+        self.assertNotEqual(FaqModel.query.get(self.faq_model.id).answer, "not saved")
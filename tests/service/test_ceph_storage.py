@@ -1,9 +1,13 @@
+import io
 from unittest import mock
 
 import pytest
+from botocore.response import StreamingBody
 
 from app.core.exceptions import AppException
 from app.services import CephObjectStorage
+from app.services.ceph_storage import PRESIGNED_URL_CACHE_KEY, presigned_url_cache
+from config import Config
 from tests.utils.mock_response import MockSideEffects
 
 SERVER_URL = "localhost:8000"
@@ -31,14 +35,188 @@ class TestCephStorage(MockSideEffects):
         result = self._ceph_storage.view("customer/obj_key")
         self.assertIsInstance(result, dict)
         self.assertIn("Key", result)
+        self.assertEqual(mock_list_object.call_args[1]["Prefix"], "customer/obj_key")
+        self.assertEqual(mock_list_object.call_args[1]["MaxKeys"], 1)
+
+        self.assertIsNone(self._ceph_storage.view("customer/obj"))
+        mock_list_object.side_effect = None
+        mock_list_object.return_value = {}
+        self.assertIsNone(self._ceph_storage.view("customer/obj_key"))
 
     @pytest.mark.service
-    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.list_objects")
-    def test_list(self, mock_list_object):
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.list_objects_v2")
+    def test_iter_objects_of_one_page(self, mock_list_object):
         mock_list_object.side_effect = self.boto3_list_objects
-        result = self._ceph_storage.list()
-        self.assertIsInstance(result, list)
-        self.assertNotEqual(result, [])
+        result = list(self._ceph_storage.iter_objects())
+        self.assertEqual([obj["Key"] for obj in result], ["customer/obj_key"])
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.list_objects_v2")
+    def test_list_page(self, mock_list_object):
+        mock_list_object.side_effect = [
+            {"Contents": [{"Key": "customer/a"}], "NextContinuationToken": "token"},
+            {"Contents": [{"Key": "customer/b"}]},
+        ]
+        page = self._ceph_storage.list_page(page_size=1)
+        self.assertEqual([obj["Key"] for obj in page], ["customer/a"])
+        self.assertEqual(page.next_cursor, "token")
+        self.assertEqual(mock_list_object.call_args[1]["MaxKeys"], 1)
+        self.assertNotIn("ContinuationToken", mock_list_object.call_args[1])
+
+        page = self._ceph_storage.list_page(page_token="token")
+        self.assertEqual([obj["Key"] for obj in page], ["customer/b"])
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(mock_list_object.call_args[1]["ContinuationToken"], "token")
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.list_objects_v2")
+    def test_iter_objects(self, mock_list_object):
+        mock_list_object.side_effect = [
+            {"Contents": [{"Key": "customer/a"}], "NextContinuationToken": "token"},
+            {"Contents": [{"Key": "customer/b"}], "NextContinuationToken": "last"},
+            {"KeyCount": 0},
+        ]
+        objects = self._ceph_storage.iter_objects(prefix="customer/")
+        self.assertEqual(next(objects)["Key"], "customer/a")
+        # reminder: a page is only listed when the objects before it are read
+        self.assertEqual(mock_list_object.call_count, 1)
+        self.assertEqual([obj["Key"] for obj in objects], ["customer/b"])
+        self.assertEqual(mock_list_object.call_count, 3)
+        self.assertEqual(mock_list_object.call_args[1]["Prefix"], "customer/")
+
+    @pytest.mark.service
+    def test_pre_signed_get_is_cached(self):
+        presigned_url_cache.clear()
+        s3_client = self._ceph_storage.s3_client
+        with mock.patch.object(
+            s3_client,
+            "generate_presigned_url",
+            wraps=s3_client.generate_presigned_url,
+        ) as generate_presigned_url:
+            url = self._ceph_storage.pre_signed_get("customer/obj_key")
+            self.assertEqual(self._ceph_storage.pre_signed_get("customer/obj_key"), url)
+            self.assertEqual(generate_presigned_url.call_count, 1)
+            self.assertEqual(
+                generate_presigned_url.call_args[1]["ExpiresIn"],
+                Config.CEPH_PRESIGNED_URL_EXPIRY,
+            )
+
+            self._ceph_storage.pre_signed_get("customer/other_key")
+            self.assertEqual(generate_presigned_url.call_count, 2)
+
+            with mock.patch.object(s3_client, "delete_object"):
+                self._ceph_storage.delete("customer/obj_key")
+            self._ceph_storage.pre_signed_get("customer/obj_key")
+            self.assertEqual(generate_presigned_url.call_count, 3)
+
+    @pytest.mark.service
+    @mock.patch.object(Config, "CEPH_PRESIGNED_URL_REDIS_CACHE", True)
+    def test_pre_signed_get_is_shared_through_redis(self):
+        presigned_url_cache.clear()
+        url = self._ceph_storage.pre_signed_get("customer/obj_key")
+        presigned_url_cache.clear()
+        with mock.patch.object(
+            self._ceph_storage.s3_client, "generate_presigned_url"
+        ) as generate_presigned_url:
+            self.assertEqual(self._ceph_storage.pre_signed_get("customer/obj_key"), url)
+        generate_presigned_url.assert_not_called()
+        self.assertIsNotNone(
+            self.redis.get(PRESIGNED_URL_CACHE_KEY.format("customer/obj_key"))
+        )
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.upload_fileobj")
+    def test_save_stream(self, mock_upload_fileobj):
+        uploads = []
+        mock_upload_fileobj.side_effect = lambda Fileobj, **kwargs: uploads.append(
+            Fileobj.read()
+        )
+        self._ceph_storage.save_stream("exports/obj_key", iter(["a,b\n", "", "1,2\n"]))
+        self.assertEqual(uploads, [b"a,b\n1,2\n"])
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.upload_file")
+    def test_save(self, mock_upload_file):
+        self._ceph_storage.save("customer/obj_key", "/tmp/obj_key")
+        kwargs = mock_upload_file.call_args[1]
+        self.assertEqual(kwargs["Filename"], "/tmp/obj_key")
+        self.assertEqual(
+            kwargs["Config"].multipart_chunksize, Config.CEPH_TRANSFER_PART_SIZE
+        )
+        self.assertEqual(
+            kwargs["Config"].max_concurrency, Config.CEPH_TRANSFER_CONCURRENCY
+        )
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.upload_fileobj")
+    def test_upload(self, mock_upload_fileobj):
+        uploads = []
+        mock_upload_fileobj.side_effect = lambda Fileobj, **kwargs: uploads.append(
+            Fileobj.read()
+        )
+        fileobj = io.BytesIO(b"image")
+        self._ceph_storage.upload("customer/obj_key", fileobj)
+        self.assertIs(mock_upload_fileobj.call_args[1]["Fileobj"], fileobj)
+        self._ceph_storage.upload("customer/obj_key", iter([b"ima", "", "ge"]))
+        self.assertEqual(uploads, [b"image", b"image"])
+        self.assertIs(
+            mock_upload_fileobj.call_args[1]["Config"],
+            self._ceph_storage.transfer_config,
+        )
+
+    @pytest.mark.service
+    def test_download(self):
+        s3_client = self._ceph_storage.s3_client
+        with mock.patch.object(s3_client, "download_file") as mock_download_file:
+            with self.assertRaises(AssertionError):
+                self._ceph_storage.download("../obj_key", None)
+            mock_download_file.assert_not_called()
+            self._ceph_storage.download("customer/obj_key", "/tmp/obj_key")
+            self.assertEqual(mock_download_file.call_args[1]["Filename"], "/tmp/obj_key")
+        with mock.patch.object(s3_client, "download_fileobj") as mock_download_fileobj:
+            fileobj = io.BytesIO()
+            self._ceph_storage.download("customer/obj_key", fileobj)
+            self.assertIs(mock_download_fileobj.call_args[1]["Fileobj"], fileobj)
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.get_object")
+    def test_stream(self, mock_get_object):
+        body = StreamingBody(io.BytesIO(b"image"), 5)
+        mock_get_object.return_value = {
+            "Body": body,
+            "ContentType": "image/jpeg",
+            "ContentLength": 5,
+            "ETag": "etag",
+        }
+        chunks, metadata = self._ceph_storage.stream("customer/obj_key", chunk_size=2)
+        self.assertEqual(
+            metadata, {"ContentType": "image/jpeg", "ContentLength": 5, "ETag": "etag"}
+        )
+        self.assertEqual(list(chunks), [b"im", b"ag", b"e"])
+        self.assertTrue(body._raw_stream.closed)
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.delete_objects")
+    def test_delete_many(self, mock_delete_objects):
+        mock_delete_objects.side_effect = [
+            {},
+            {"Errors": [{"Key": "customer/2", "Code": "AccessDenied"}]},
+            {},
+        ]
+        with mock.patch.object(Config, "CEPH_DELETE_BATCH_SIZE", 2):
+            errors = self._ceph_storage.delete_many(
+                f"customer/{index}" for index in range(5)
+            )
+        self.assertEqual(errors, [{"Key": "customer/2", "Code": "AccessDenied"}])
+        batches = [
+            [obj["Key"] for obj in call[1]["Delete"]["Objects"]]
+            for call in mock_delete_objects.call_args_list
+        ]
+        self.assertEqual(
+            batches,
+            [["customer/0", "customer/1"], ["customer/2", "customer/3"], ["customer/4"]],
+        )
+        self.assertTrue(mock_delete_objects.call_args[1]["Delete"]["Quiet"])
 
     @pytest.mark.service
     @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.delete_object")
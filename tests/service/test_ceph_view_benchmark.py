@@ -0,0 +1,105 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import boto3
+import pytest
+
+from app.services import CephObjectStorage
+from config import Config
+from tests.base_test_case import BaseTestCase
+
+# reminder: runs against a local s3 stand-in e.g
+# docker run -p 9000:9000 minio/minio server /data
+# CEPH_BENCHMARK_SERVER_URL=http://localhost:9000 pytest -m benchmark
+BENCHMARK_SERVER_URL = os.getenv("CEPH_BENCHMARK_SERVER_URL")
+BENCHMARK_ACCESS_KEY = os.getenv("CEPH_BENCHMARK_ACCESS_KEY", default="minioadmin")
+BENCHMARK_SECRET_KEY = os.getenv("CEPH_BENCHMARK_SECRET_KEY", default="minioadmin")
+BENCHMARK_BUCKET = os.getenv("CEPH_BENCHMARK_BUCKET", default="nova-benchmark")
+BENCHMARK_OBJECTS = int(os.getenv("CEPH_BENCHMARK_OBJECTS", default=100000))
+BENCHMARK_LOOKUPS = int(os.getenv("CEPH_BENCHMARK_LOOKUPS", default=20))
+
+
+def object_key(index):
+    return f"customer/{index:08d}"
+
+
+@pytest.mark.skipif(
+    not BENCHMARK_SERVER_URL, reason="CEPH_BENCHMARK_SERVER_URL is not set"
+)
+class TestCephViewBenchmark(BaseTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.s3_client = boto3.client(
+            "s3",
+            aws_access_key_id=BENCHMARK_ACCESS_KEY,
+            aws_secret_access_key=BENCHMARK_SECRET_KEY,
+            endpoint_url=BENCHMARK_SERVER_URL,
+        )
+        buckets = [bucket["Name"] for bucket in cls.s3_client.list_buckets()["Buckets"]]
+        if BENCHMARK_BUCKET not in buckets:
+            cls.s3_client.create_bucket(Bucket=BENCHMARK_BUCKET)
+
+        # reminder: the objects are kept in the bucket to be reused by the next run
+        last_key = object_key(BENCHMARK_OBJECTS - 1)
+        seeded = cls.s3_client.list_objects(
+            Bucket=BENCHMARK_BUCKET, Prefix=last_key, MaxKeys=1
+        )
+        if not seeded.get("Contents"):
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                list(
+                    executor.map(
+                        lambda index: cls.s3_client.put_object(
+                            Bucket=BENCHMARK_BUCKET, Key=object_key(index), Body=b""
+                        ),
+                        range(BENCHMARK_OBJECTS),
+                    )
+                )
+
+    def setUp(self):
+        super().setUp()
+        self._ceph_storage = CephObjectStorage()
+        patches = [
+            mock.patch.object(CephObjectStorage, "s3_client", self.s3_client),
+            mock.patch.object(Config, "CEPH_BUCKET", BENCHMARK_BUCKET),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def list_bucket(self, obj_id):
+        """the lookup view replaced, listing the bucket until the key is found"""
+        paginator = self.s3_client.get_paginator("list_objects")
+        for page in paginator.paginate(Bucket=BENCHMARK_BUCKET):
+            for obj in page.get("Contents", []):
+                if obj["Key"] == obj_id:
+                    return obj
+        return None
+
+    def time_lookups(self, lookup, keys):
+        start = time.perf_counter()
+        results = [lookup(key) for key in keys]
+        return (time.perf_counter() - start) / len(keys), results
+
+    @pytest.mark.benchmark
+    def test_view(self):
+        keys = [
+            object_key(random.randrange(BENCHMARK_OBJECTS))
+            for _ in range(BENCHMARK_LOOKUPS)
+        ]
+        listing_time, listed = self.time_lookups(self.list_bucket, keys)
+        view_time, viewed = self.time_lookups(self._ceph_storage.view, keys)
+
+        self.assertEqual([obj["Key"] for obj in viewed], [obj["Key"] for obj in listed])
+        self.assertEqual(
+            [obj["Size"] for obj in viewed], [obj["Size"] for obj in listed]
+        )
+        self.assertLess(
+            view_time,
+            listing_time,
+            f"{BENCHMARK_OBJECTS} objects: listing {listing_time * 1000:.1f}ms, "
+            f"view {view_time * 1000:.1f}ms per lookup",
+        )
+        self.assertIsNone(self._ceph_storage.view("customer/missing"))
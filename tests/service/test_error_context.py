@@ -0,0 +1,89 @@
+import inspect
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from app.core.exceptions import AppException
+from app.services import CephObjectStorage
+from app.utils import caller_context
+from tests.utils.mock_response import MockSideEffects
+
+
+def raising_method():
+    return caller_context()
+
+
+def calling_method():
+    return raising_method()
+
+
+def inspect_context():
+    return {
+        "method": inspect.currentframe().f_code.co_name,
+        "calling_module": inspect.stack()[1],
+        "calling_method": inspect.currentframe().f_back.f_code.co_name,
+    }
+
+
+class TestErrorContext(MockSideEffects):
+    _ceph_storage = CephObjectStorage()
+
+    @pytest.mark.service
+    def test_caller_context(self):
+        context = calling_method()
+        self.assertEqual(context["method"], "raising_method")
+        self.assertEqual(context["calling_method"], "calling_method")
+        self.assertRegex(
+            context["calling_module"], r"^tests\.service\.test_error_context:\d+$"
+        )
+
+    @pytest.mark.service
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.s3_client.delete_object")
+    def test_object_storage_error_context(self, mock_delete_object):
+        mock_delete_object.side_effect = self.boto3_client_error
+        with self.assertRaises(AppException.OperationError) as operation_error:
+            self._ceph_storage.delete("obj_key")
+        context = operation_error.exception.context
+        self.assertEqual(context["exception_class"], "botocore.exceptions.ClientError")
+        self.assertEqual(context["method"], "object_storage_request")
+        self.assertEqual(context["calling method"], "delete")
+        self.assertTrue(
+            context["calling module"].startswith("app.services.ceph_storage:")
+        )
+
+    # reminder: timed against a wall clock, run with RUN_BENCHMARKS=1 pytest -m benchmark
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(
+        not os.getenv("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set"
+    )
+    def test_error_context_benchmark(self):
+        start = time.perf_counter()
+        for _ in range(100):
+            inspect_context()
+        inspect_time = (time.perf_counter() - start) / 100
+
+        start = time.perf_counter()
+        for _ in range(100):
+            caller_context()
+        context_time = (time.perf_counter() - start) / 100
+
+        with mock.patch.object(
+            CephObjectStorage.s3_client,
+            "delete_object",
+            side_effect=self.boto3_client_error,
+        ):
+            start = time.perf_counter()
+            for _ in range(100):
+                with self.assertRaises(AppException.OperationError):
+                    self._ceph_storage.delete("obj_key")
+            error_path_time = (time.perf_counter() - start) / 100
+        timings = (
+            f"inspect.stack {inspect_time * 1000:.3f}ms, caller_context "
+            f"{context_time * 1000:.4f}ms, ceph error path {error_path_time * 1000:.3f}ms"
+        )
+
+        # reminder: inspect.stack reads the source of every frame up to pytest
+        self.assertLess(context_time * 10, inspect_time, timings)
+        self.assertLess(error_path_time, inspect_time, timings)
@@ -250,3 +250,10 @@ class TestAuthService(MockSideEffects):
             )
         self.assertTrue(error.exception)
         self.assert500(error.exception)
+        self.assertEqual(error.exception.context["method"], "send_request_to_keycloak")
+        self.assertEqual(error.exception.context["calling method"], "get_token")
+        self.assertTrue(
+            error.exception.context["calling module"].startswith(
+                "app.services.keycloak_service:"
+            )
+        )
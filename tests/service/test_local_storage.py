@@ -0,0 +1,140 @@
+import io
+import os
+import tempfile
+import time
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+import pinject
+import pytest
+
+from app.controllers import CustomerController
+from app.core.exceptions import AppException
+from app.core.service_interfaces import StorageServiceInterface
+from app.repositories import (
+    CustomerRepository,
+    LoginAttemptRepository,
+    RegistrationRepository,
+)
+from app.schema import CustomerSchema
+from app.services import (
+    AuthService,
+    CephObjectStorage,
+    LocalObjectStorage,
+    ObjectStorageBindingSpec,
+    RedisService,
+)
+from config import Config
+from tests.base_test_case import BaseTestCase
+
+
+class TestLocalStorage(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        patch = mock.patch.object(Config, "LOCAL_STORAGE_ROOT", root.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.local_storage = LocalObjectStorage()
+
+    @pytest.mark.service
+    def test_upload_and_stream(self):
+        self.local_storage.upload("customer/obj_key.jpg", io.BytesIO(b"image"))
+        self.local_storage.save_stream("exports/obj_key", iter(["a,b\n", b"1,2\n"]))
+
+        chunks, metadata = self.local_storage.stream("customer/obj_key.jpg", 2)
+        self.assertEqual(list(chunks), [b"im", b"ag", b"e"])
+        self.assertEqual(metadata["ContentType"], "image/jpeg")
+        self.assertEqual(metadata["ContentLength"], 5)
+        output = io.BytesIO()
+        self.local_storage.download("exports/obj_key", output)
+        self.assertEqual(output.getvalue(), b"a,b\n1,2\n")
+
+        self.assertEqual(self.local_storage.view("customer/obj_key.jpg")["Size"], 5)
+        self.assertIsNone(self.local_storage.view("customer/missing"))
+        with self.assertRaises(AppException.NotFoundException):
+            self.local_storage.stream("customer/missing")
+        with self.assertRaises(AppException.ValidationException):
+            self.local_storage.upload("../obj_key", io.BytesIO(b"image"))
+
+        self.local_storage.delete("customer/obj_key.jpg")
+        self.assertIsNone(self.local_storage.view("customer/obj_key.jpg"))
+
+    @pytest.mark.service
+    def test_list_page(self):
+        for index in range(5):
+            self.local_storage.upload(f"customer/{index}", io.BytesIO(b"image"))
+        self.local_storage.upload("exports/obj_key", io.BytesIO(b"a,b\n"))
+
+        page = self.local_storage.list_page(page_size=2, prefix="customer/")
+        self.assertEqual([obj["Key"] for obj in page], ["customer/0", "customer/1"])
+        page = self.local_storage.list_page(
+            page_token=page.next_cursor, page_size=4, prefix="customer/"
+        )
+        self.assertEqual(
+            [obj["Key"] for obj in page], [f"customer/{i}" for i in (2, 3, 4)]
+        )
+        self.assertIsNone(page.next_cursor)
+        self.assertEqual(len(list(self.local_storage.iter_objects())), 6)
+
+        # reminder: the root is walked once for all the pages of a listing
+        with mock.patch("os.walk", wraps=os.walk) as walk:
+            page = self.local_storage.list_page(page_size=1)
+            while page.next_cursor:
+                page = self.local_storage.list_page(
+                    page_token=page.next_cursor, page_size=1
+                )
+            self.assertEqual(walk.call_count, 1)
+            self.assertEqual(len(list(self.local_storage.iter_objects())), 6)
+            self.assertEqual(walk.call_count, 2)
+
+    @pytest.mark.service
+    def test_signature(self):
+        url = urlsplit(self.local_storage.pre_signed_get("customer/obj key.jpg"))
+        query = {key: value[0] for key, value in parse_qs(url.query).items()}
+        self.assertTrue(url.path.endswith("/customer/obj%20key.jpg"))
+        self.assertTrue(
+            self.local_storage.verify("GET", "customer/obj key.jpg", **query)
+        )
+        self.assertFalse(self.local_storage.verify("GET", "customer/other", **query))
+        self.assertFalse(
+            self.local_storage.verify("POST", "customer/obj key.jpg", **query)
+        )
+        expired = int(time.time()) - 1
+        self.assertFalse(
+            self.local_storage.verify(
+                "GET",
+                "customer/obj key.jpg",
+                expired,
+                self.local_storage.signature("GET", "customer/obj key.jpg", expired),
+            )
+        )
+
+    @pytest.mark.service
+    def test_storage_service_interface(self):
+        for object_storage in (CephObjectStorage, LocalObjectStorage):
+            self.assertTrue(issubclass(object_storage, StorageServiceInterface))
+        self.assertIsInstance(self.local_storage, StorageServiceInterface)
+
+    @pytest.mark.service
+    def test_binding_spec(self):
+        with mock.patch.object(Config, "OBJECT_STORAGE", "local"):
+            obj_graph = pinject.new_object_graph(
+                modules=None,
+                classes=[
+                    CustomerController,
+                    CustomerRepository,
+                    RegistrationRepository,
+                    LoginAttemptRepository,
+                    AuthService,
+                    RedisService,
+                    CephObjectStorage,
+                    CustomerSchema,
+                ],
+                binding_specs=[ObjectStorageBindingSpec()],
+            )
+            customer_controller = obj_graph.provide(CustomerController)
+        self.assertIsInstance(
+            customer_controller.ceph_object_storage, LocalObjectStorage
+        )
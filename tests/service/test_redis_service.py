@@ -0,0 +1,121 @@
+from unittest import mock
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.repositories import FaqRepository
+
+from app.services import RedisService
+from app.services.local_cache import MISSING, LocalCache
+from app.services.redis_service import (
+    InvalidationListener,
+    cache_stats,
+    local_cache,
+)
+from tests.base_test_case import BaseTestCase
+
+
+class TestRedisService(BaseTestCase):
+    _redis_service = RedisService()
+
+    def setUp(self):
+        super().setUp()
+        local_cache.clear()
+        cache_stats.reset()
+        listener_patcher = mock.patch(
+            "app.services.redis_service.invalidation_listener.ensure_started"
+        )
+        self.addCleanup(listener_patcher.stop)
+        listener_patcher.start()
+
+    @pytest.mark.service
+    def test_local_cache_lru_and_ttl(self):
+        cache = LocalCache(capacity=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIs(cache.get("b"), MISSING)
+        cache.set("d", 4, ttl=-1)
+        self.assertIs(cache.get("d"), MISSING)
+
+    @pytest.mark.service
+    @mock.patch("app.services.redis_service.Config.LOCAL_CACHE_NAMESPACES", [])
+    def test_get_without_local_cache(self):
+        self._redis_service.set("customer_1", '{"id": 1}')
+        self.assertEqual(self._redis_service.get("customer_1"), {"id": 1})
+        self.assertIsNone(self._redis_service.get("customer_2"))
+        stats = self._redis_service.stats()
+        self.assertEqual(stats["redis"], {"hits": 1, "misses": 1})
+        self.assertNotIn("local", stats)
+
+    @pytest.mark.service
+    @mock.patch("app.services.redis_service.Config.LOCAL_CACHE_NAMESPACES", ["faq:"])
+    def test_get_from_local_cache(self):
+        self._redis_service.set("faq:all", "[1, 2]")
+        self.assertEqual(self._redis_service.get("faq:all"), [1, 2])
+        with mock.patch("app.services.redis_service.redis_conn.get") as redis_get:
+            self.assertEqual(self._redis_service.get("faq:all"), [1, 2])
+        redis_get.assert_not_called()
+        stats = self._redis_service.stats()
+        self.assertEqual(stats["local"], {"hits": 1, "misses": 1})
+        self.assertEqual(stats["redis"], {"hits": 1, "misses": 0})
+
+    @pytest.mark.service
+    @mock.patch("app.services.redis_service.Config.LOCAL_CACHE_NAMESPACES", ["faq:"])
+    def test_local_cache_keeps_loaded_copy(self):
+        faq_schema = FaqRepository().cache_schema
+        self._redis_service.set("faq:1", faq_schema.dumps(self.faq_model))
+        with mock.patch.object(type(faq_schema), "load", wraps=faq_schema.load) as load:
+            first = self._redis_service.get("faq:1", faq_schema)
+        load.assert_called_once()
+        first["question"] = "changed by a caller"
+        with mock.patch.object(type(faq_schema), "load") as load:
+            second = self._redis_service.get("faq:1", faq_schema)
+        load.assert_not_called()
+        self.assertEqual(second["question"], self.faq_model.question)
+
+    @pytest.mark.service
+    @mock.patch("app.services.redis_service.Config.LOCAL_CACHE_NAMESPACES", ["faq:"])
+    def test_write_invalidates_local_cache(self):
+        pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe("cache_invalidation")
+        self._redis_service.set("faq:all", "[1]")
+        self._redis_service.get("faq:all")
+        self._redis_service.set("faq:all", "[1, 2]")
+        self.assertEqual(self._redis_service.get("faq:all"), [1, 2])
+        self._redis_service.delete("faq:all")
+        self.assertIsNone(self._redis_service.get("faq:all"))
+        messages = [pubsub.get_message() for _ in range(5)]
+        self.assertEqual(
+            [message.get("data") for message in messages if message],
+            [b"faq:all"] * 3,
+        )
+
+    @pytest.mark.service
+    def test_release_lock_keeps_lock_of_other_worker(self):
+        token = self._redis_service.acquire_lock("customer:lock", 5)
+        self.assertIsNotNone(token)
+        self.assertIsNone(self._redis_service.acquire_lock("customer:lock", 5))
+        # reminder: the lease expired and another worker took the lock
+        self.redis.set("customer:lock", "other-token")
+        self._redis_service.release_lock("customer:lock", token)
+        self.assertEqual(self.redis.get("customer:lock"), b"other-token")
+        self.redis.set("customer:lock", token)
+        self._redis_service.release_lock("customer:lock", token)
+        self.assertIsNone(self.redis.get("customer:lock"))
+
+    @pytest.mark.service
+    def test_invalidation_listener_closes_pubsub_on_reconnect(self):
+        disconnected, stopped = mock.Mock(), mock.Mock()
+        disconnected.get_message.side_effect = RedisError("connection reset")
+        stopped.subscribe.side_effect = KeyboardInterrupt
+        with mock.patch(
+            "app.services.redis_service.redis_conn.pubsub",
+            side_effect=[disconnected, stopped],
+        ), mock.patch("app.services.redis_service.time.sleep"):
+            with self.assertRaises(KeyboardInterrupt):
+                InvalidationListener("channel").listen()
+        disconnected.close.assert_called_once()
+        stopped.close.assert_called_once()
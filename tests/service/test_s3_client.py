@@ -0,0 +1,82 @@
+import tempfile
+import time
+from unittest import mock
+
+import pytest
+
+from app.health.health_check import ceph_available
+from app.services import CephObjectStorage
+from app.services.s3_client import LazyS3Client, s3_client
+from config import Config
+from tests.base_test_case import BaseTestCase
+
+CLIENT_OPTIONS = {
+    "aws_access_key_id": "access-key",
+    "aws_secret_access_key": "secret-key",
+    "endpoint_url": "http://localhost",
+}
+
+
+class TestS3Client(BaseTestCase):
+    @pytest.mark.service
+    def test_client_is_created_on_first_use(self):
+        lazy_client = LazyS3Client(**CLIENT_OPTIONS)
+        self.assertIsNone(lazy_client._client)
+        client = lazy_client.get()
+        self.assertEqual(client.meta.endpoint_url, "http://localhost")
+        self.assertIs(lazy_client.get(), client)
+
+    @pytest.mark.service
+    def test_client_is_created_again_after_fork(self):
+        lazy_client = LazyS3Client(**CLIENT_OPTIONS)
+        client = lazy_client.get()
+        with mock.patch("app.services.s3_client.os.getpid", return_value=-1):
+            forked_client = lazy_client.get()
+            self.assertIsNot(forked_client, client)
+            self.assertIs(lazy_client.get(), forked_client)
+
+    @pytest.mark.service
+    def test_client_is_shared(self):
+        self.assertIs(CephObjectStorage.s3_client, s3_client.get())
+        self.assertIs(CephObjectStorage().s3_client, s3_client.get())
+        with mock.patch.object(
+            s3_client.get(),
+            "head_bucket",
+            return_value={"ResponseMetadata": {"HTTPStatusCode": 200}},
+        ):
+            self.assertEqual(ceph_available(), (True, "ceph server is ok"))
+
+    @pytest.mark.service
+    def test_local_storage_available(self):
+        with tempfile.TemporaryDirectory() as root, mock.patch.object(
+            Config, "OBJECT_STORAGE", "local"
+        ), mock.patch.object(Config, "LOCAL_STORAGE_ROOT", root), mock.patch.object(
+            s3_client.get(), "head_bucket"
+        ) as head_bucket:
+            self.assertEqual(ceph_available(), (True, "local storage is ok"))
+            head_bucket.assert_not_called()
+            with mock.patch.object(Config, "LOCAL_STORAGE_ROOT", f"{root}/missing"):
+                self.assertFalse(ceph_available()[0])
+
+    @pytest.mark.benchmark
+    def test_client_creation_benchmark(self):
+        start = time.perf_counter()
+        lazy_client = LazyS3Client(**CLIENT_OPTIONS)
+        construction_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lazy_client.get()
+        creation_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            lazy_client.get()
+        reuse_time = (time.perf_counter() - start) / 1000
+        timings = (
+            f"import {construction_time * 1000:.3f}ms, first use "
+            f"{creation_time * 1000:.3f}ms, later uses {reuse_time * 1000:.4f}ms"
+        )
+
+        # reminder: the import and every health probe used to create a client
+        self.assertLess(construction_time, creation_time, timings)
+        self.assertLess(reuse_time, creation_time, timings)
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+
+from app.core.engine_pool import TimedQueuePool
+from config import Config
+from tests.base_test_case import BaseTestCase
+
+
+class TestEnginePool(BaseTestCase):
+    @pytest.mark.app
+    def test_engine_options(self):
+        options = Config().SQLALCHEMY_ENGINE_OPTIONS
+        self.assertEqual(options["pool_size"], Config.DB_POOL_SIZE)
+        self.assertTrue(options["pool_pre_ping"])
+        self.assertEqual(options["connect_args"]["application_name"], Config.APP_NAME)
+        self.assertIn("statement_timeout", options["connect_args"]["options"])
+        self.assertFalse(self.app.config["SQLALCHEMY_TRACK_MODIFICATIONS"])
+
+    @pytest.mark.app
+    def test_pool_stats(self):
+        engine = create_engine(
+            "sqlite://",
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.1,
+        )
+        connection = engine.connect()
+        with self.assertRaises(TimeoutError):
+            engine.connect()
+        stats = engine.pool.stats()
+        self.assertEqual(stats["checked_out"], 1)
+        self.assertEqual(stats["checkouts"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertGreaterEqual(stats["max_wait_ms"], 100)
+
+        connection.close()
+        self.assertEqual(engine.pool.stats()["checked_out"], 0)
+        engine.dispose()
@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from app.utils.log_config import MailHandler
+from tests.base_test_case import BaseTestCase
+
+# reminder: the base test case patches send_mail once the tests are set up
+send_mail = MailHandler.send_mail
+
+
+class TestMailHandler(BaseTestCase):
+    def mail_handler(self, **kwargs):
+        handler = MailHandler(
+            mailhost=("localhost", 587),
+            fromaddr="app@example.com",
+            toaddrs=["admin@example.com"],
+            subject="error_log",
+            credentials=("app@example.com", "password"),
+            digest_interval=3600,
+            **kwargs,
+        )
+        self.addCleanup(handler.close)
+        return handler
+
+    @staticmethod
+    def error_record(message, *args):
+        return logging.LogRecord("app", logging.ERROR, __file__, 1, message, args, None)
+
+    def digest(self, handler):
+        handler.listener.stop()
+        handler.digest.flush()
+        handler.listener.start()
+
+    @pytest.mark.app
+    def test_errors_are_mailed_as_digest(self):
+        handler = self.mail_handler()
+        threads = threading.active_count()
+        for _ in range(1000):
+            handler.handle(self.error_record("customer %s not found", "id"))
+        handler.handle(self.error_record("ceph operation error"))
+        self.assertLessEqual(threading.active_count(), threads + 2)
+        handler.send_mail.assert_not_called()
+
+        self.digest(handler)
+        handler.send_mail.assert_called_once()
+        records, dropped = handler.send_mail.call_args[0]
+        self.assertEqual(dropped, 0)
+        self.assertEqual(
+            [(record.fingerprint, count) for record, count in records],
+            [("customer id not found", 1000), ("ceph operation error", 1)],
+        )
+        self.assertEqual(records[0][0].mail_content, "customer id not found")
+
+        handler.send_mail.reset_mock()
+        self.digest(handler)
+        handler.send_mail.assert_not_called()
+
+    @pytest.mark.app
+    def test_digest_capacity(self):
+        handler = self.mail_handler(capacity=2)
+        for index in range(5):
+            handler.handle(self.error_record(f"error {index}"))
+        self.digest(handler)
+        records, dropped = handler.send_mail.call_args[0]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(dropped, 3)
+
+    @pytest.mark.app
+    def test_pending_errors_are_mailed_on_close(self):
+        handler = self.mail_handler()
+        handler.handle(self.error_record("customer id not found"))
+        handler.close()
+        handler.send_mail.assert_called_once()
+
+    @pytest.mark.app
+    def test_smtp_connection_is_reused(self):
+        handler = self.mail_handler()
+        handler.handle(self.error_record("customer id not found"))
+        with mock.patch.object(MailHandler, "send_mail", send_mail), mock.patch(
+            "smtplib.SMTP"
+        ) as smtp:
+            self.digest(handler)
+            handler.handle(self.error_record("customer id not found"))
+            self.digest(handler)
+            smtp.assert_called_once_with("localhost", 587, timeout=30)
+            self.assertEqual(smtp.return_value.send_message.call_count, 2)
+            message = smtp.return_value.send_message.call_args[0][0]
+            self.assertEqual(message["Subject"], "error_log (1 errors)")
+            self.assertIn("customer id not found", message.get_content())
+
+            smtp.return_value.noop.side_effect = ConnectionResetError
+            handler.handle(self.error_record("customer id not found"))
+            self.digest(handler)
+            self.assertEqual(smtp.call_count, 2)
+
+    @pytest.mark.app
+    def test_forked_worker_does_not_mail_records_of_parent(self):
+        handler = self.mail_handler()
+        handler.handle(self.error_record("customer id not found"))
+        smtp_lock = handler._smtp_lock
+        handler.listener.stop()
+        # reminder: a forked worker starts with the handler state of the parent
+        with mock.patch("os.getpid", return_value=-1):
+            handler.handle(self.error_record("ceph operation error"))
+            self.digest(handler)
+            records, _ = handler.send_mail.call_args[0]
+            self.assertEqual(
+                [record.fingerprint for record, _ in records], ["ceph operation error"]
+            )
+            self.assertIsNot(handler._smtp_lock, smtp_lock)
+            handler.close()
+
+    @pytest.mark.app
+    def test_mail_server_not_configured(self):
+        handler = MailHandler(
+            mailhost=None, fromaddr=None, toaddrs=[""], subject="error_log"
+        )
+        handler.handle(self.error_record("customer id not found"))
+        self.assertIsNone(handler.listener)
+
+    # reminder: timed against a wall clock, run with RUN_BENCHMARKS=1 pytest -m benchmark
+    @pytest.mark.benchmark
+    @pytest.mark.skipif(
+        not os.getenv("RUN_BENCHMARKS"), reason="RUN_BENCHMARKS is not set"
+    )
+    def test_error_burst_benchmark(self):
+        handler = self.mail_handler()
+        start = time.perf_counter()
+        for index in range(10000):
+            handler.handle(self.error_record("customer %s not found", index % 10))
+        emit_time = (time.perf_counter() - start) / 10000
+        self.digest(handler)
+
+        records, _ = handler.send_mail.call_args[0]
+        self.assertEqual(sum(count for _, count in records), 10000)
+        handler.send_mail.assert_called_once()
+        # reminder: every record used to start a thread and an smtp session
+        self.assertLess(
+            emit_time, 0.001, f"error mail handler {emit_time * 1000:.4f}ms per record"
+        )
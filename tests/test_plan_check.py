@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.core.plan_check import sequential_scans
+from app.repositories.query_shapes import QUERY_SHAPES
+from tests.base_test_case import BaseTestCase
+
+
+class TestPlanCheck(BaseTestCase):
+    @pytest.mark.app
+    def test_sequential_scans(self):
+        plan = {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "customers"},
+                {"Node Type": "Seq Scan", "Relation Name": "faq"},
+                {"Node Type": "Index Scan", "Relation Name": "login_attempts"},
+            ],
+        }
+        self.assertEqual(
+            sequential_scans(plan, {"customers", "login_attempts"}), ["customers"]
+        )
+
+    @pytest.mark.app
+    def test_query_shapes_use_an_index(self):
+        for name, (model, filter_param) in QUERY_SHAPES.items():
+            compiled = model.query.filter_by(**filter_param).statement.compile(
+                dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+            details = " ".join(row[-1] for row in plan)
+            self.assertNotIn("SCAN", details, name)
@@ -0,0 +1,44 @@
+import pytest
+from flask import url_for
+
+from app.core.query_stats import count_queries, fingerprint, query_metrics
+from app.models.faq_model import FaqModel
+from tests.base_test_case import BaseTestCase
+from tests.utils.query_budget import query_budget
+
+
+class TestQueryStats(BaseTestCase):
+    @pytest.mark.app
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT *\n  FROM faq WHERE id IN (?, ?, ?) LIMIT 10"),
+            fingerprint("SELECT * FROM faq WHERE id IN (?) LIMIT 20"),
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM faq WHERE question = 'a'"),
+            "SELECT * FROM faq WHERE question = ?",
+        )
+
+    @pytest.mark.app
+    def test_repeated_statements(self):
+        faq_id = self.faq_model.id
+        with count_queries() as stats:
+            for _ in range(5):
+                FaqModel.query.filter_by(id=faq_id).first()
+        self.assertEqual(stats.count, 5)
+        self.assertGreater(stats.duration, 0)
+        self.assertEqual(list(stats.repeated().values()), [5])
+
+        with self.assertRaises(AssertionError):
+            with query_budget(10):
+                for _ in range(5):
+                    FaqModel.query.filter_by(id=faq_id).first()
+
+    @pytest.mark.app
+    def test_request_metrics(self):
+        query_metrics.reset()
+        with self.client:
+            self.client.get(url_for("faq.get_faq"))
+        metrics = query_metrics.snapshot()
+        self.assertEqual(metrics["faq.get_faq"]["requests"], 1)
+        self.assertEqual(metrics["faq.get_faq"]["queries"], 1)
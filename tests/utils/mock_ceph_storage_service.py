@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 
+from app.core.repository import Page
 from app.services import CephObjectStorage
 
 
@@ -32,7 +33,7 @@ class MockCephObjectStorage(CephObjectStorage):
         }
         return obj
 
-    def list(self):
+    def objects(self):
         obj_list = [
             {
                 "ETag": "7e76d20a375c0259e21e985a5478bbac",
@@ -44,3 +45,16 @@ class MockCephObjectStorage(CephObjectStorage):
             }
         ]
         return obj_list
+
+    def list_page(self, page_token=None, page_size=None, prefix=""):
+        if page_token:
+            return Page(self.objects(), next_cursor=None)
+        return Page(self.objects(), next_cursor="next-page-token")
+
+    def stream(self, obj_id: str, chunk_size: int = None):
+        metadata = {
+            "ContentType": "image/jpeg",
+            "ContentLength": 5,
+            "ETag": "7e76d20a375c0259e21e985a5478bbac",
+        }
+        return iter([b"ima", b"ge"]), metadata
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+from app.core.query_stats import count_queries
+
+
+@contextmanager
+def query_budget(max_queries, max_repeats=None):
+    """
+    fails when the block issues more than max_queries sql statements, or repeats
+    a statement max_repeats times e.g an N+1 query introduced in an endpoint
+    :param max_queries: {int} statements the block may issue
+    :param max_repeats: {int} executions of the same statement that fail the
+    block, QUERY_REPEAT_THRESHOLD by default
+    """
+    with count_queries() as stats:
+        yield stats
+    statements = "\n".join(
+        f"{count} x {statement}" for statement, count in stats.fingerprints.items()
+    )
+    assert (
+        stats.count <= max_queries
+    ), f"{stats.count} queries issued, the budget is {max_queries}:\n{statements}"
+    repeated = stats.repeated(max_repeats)
+    assert not repeated, f"statements repeated in the block:\n{statements}"
@@ -29,3 +29,22 @@ class EventSubscriptionTestData:
                 "event_action": "unhandled",
             },
         }
+
+    @property
+    def profile_image_uploaded(self):
+        return {
+            "Records": [
+                {
+                    "eventVersion": "2.2",
+                    "eventSource": "ceph:s3",
+                    "eventName": "ObjectCreated:Put",
+                    "s3": {
+                        "bucket": {"name": "nova-bucket"},
+                        "object": {
+                            "key": "656f8140-3604-4b54-9149-d0473ac4ec23.jpg",
+                            "size": 294991,
+                        },
+                    },
+                }
+            ]
+        }
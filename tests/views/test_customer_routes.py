@@ -1,3 +1,4 @@
+import json
 from datetime import datetime, timedelta
 from unittest import mock
 
@@ -5,7 +6,9 @@ import pytest
 from flask import url_for
 
 from app.models import CustomerModel
+from config import Config
 from tests.base_test_case import BaseTestCase
+from tests.utils.query_budget import query_budget
 
 expiration_time = datetime.now() + timedelta(minutes=5)
 
@@ -22,6 +25,136 @@ class TestCustomerRoutes(BaseTestCase):
             self.assertIsInstance(response.json, list)
             self.assertIsInstance(response.json[0], dict)
 
+    @pytest.mark.views
+    def test_export_customers(self):
+        self.customer_repository.create(self.customer_test_data.create_customer)
+        with self.client:
+            response = self.client.get(
+                url_for("customer.export_customers"), headers=self.headers
+            )
+            self.assert200(response)
+            self.assertEqual(response.mimetype, "application/x-ndjson")
+            records = [json.loads(line) for line in response.data.splitlines()]
+            self.assertEqual(len(records), 2)
+            self.assertIn("phone_number", records[0])
+            self.assertNotIn("pin", records[0])
+
+            response = self.client.get(
+                url_for("customer.export_customers"),
+                headers=self.headers,
+                query_string={"format": "csv", "status": "blocked"},
+            )
+            self.assert200(response)
+            self.assertEqual(response.mimetype, "text/csv")
+            lines = response.data.decode().splitlines()
+            self.assertTrue(lines[0].startswith("id,phone_number"))
+            self.assertEqual(len(lines), 1)
+
+            response = self.client.get(
+                url_for("customer.export_customers"),
+                headers=self.headers,
+                query_string={"format": "xml"},
+            )
+            self.assert400(response)
+
+    @pytest.mark.views
+    def test_export_customers_command(self):
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["customer", "export", "--format", "csv"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(result.output.splitlines()), 2)
+
+        with mock.patch.object(self.ceph_object_storage, "save_stream") as save_stream:
+            with mock.patch(
+                "app.api.api_v1.endpoints.customer_view.customer_controller."
+                "ceph_object_storage",
+                self.ceph_object_storage,
+            ):
+                result = runner.invoke(
+                    args=["customer", "export", "--ceph-key", "exports/customers"]
+                )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(save_stream.call_args[0][0], "exports/customers")
+
+        result = runner.invoke(args=["customer", "export", "--status", "unknown"])
+        self.assertNotEqual(result.exit_code, 0)
+
+    @pytest.mark.views
+    def test_cleanup_profile_images_command(self):
+        runner = self.app.test_cli_runner()
+        with mock.patch(
+            "app.api.api_v1.endpoints.customer_view.customer_controller."
+            "ceph_object_storage",
+            self.ceph_object_storage,
+        ), mock.patch.object(
+            self.ceph_object_storage, "delete_many"
+        ) as mock_delete_many:
+            result = runner.invoke(
+                args=["customer", "cleanup-profile-images", "--dry-run"]
+            )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(json.loads(result.output)["scanned"], 2)
+        mock_delete_many.assert_not_called()
+
+    @pytest.mark.views
+    def test_get_customers_query_budget(self):
+        for index in range(5):
+            customer_data = self.customer_test_data.create_customer
+            customer_data["phone_number"] = f"02440000{index:02d}"
+            self.customer_repository.create(customer_data)
+        with self.client:
+            with query_budget(1) as stats:
+                response = self.client.get(
+                    url_for("customer.get_customers"),
+                    query_string={"page": 1, "per_page": 10},
+                )
+            self.assert200(response)
+            self.assertEqual(len(response.json), 6)
+            self.assertEqual(response.headers.get("X-Query-Count"), str(stats.count))
+            self.assertIn("X-Query-Time", response.headers)
+
+    @pytest.mark.views
+    def test_get_customers_with_cursor(self):
+        self.customer_repository.create(self.customer_test_data.create_customer)
+        with self.client:
+            response = self.client.get(
+                url_for("customer.get_customers"),
+                query_string={"cursor": "", "per_page": 1},
+            )
+            self.assert200(response)
+            self.assertEqual(len(response.json), 1)
+            cursor = response.headers.get("X-Next-Cursor")
+            self.assertTrue(cursor)
+
+            response = self.client.get(
+                url_for("customer.get_customers"),
+                query_string={"cursor": cursor, "per_page": 1},
+            )
+            self.assert200(response)
+            self.assertEqual(len(response.json), 1)
+            self.assertNotIn("X-Next-Cursor", response.headers)
+            self.assertNotIn("X-Total-Count", response.headers)
+
+            response = self.client.get(
+                url_for("customer.get_customers"),
+                query_string={"page": 1, "per_page": 1, "count": "exact"},
+            )
+            self.assert200(response)
+            self.assertEqual(response.headers.get("X-Total-Count"), "2")
+
+            response = self.client.get(
+                url_for("customer.get_customers"),
+                query_string={"cursor": "invalid", "per_page": 1},
+            )
+            self.assert400(response)
+
+            for per_page in (0, -1, Config.MAX_PER_PAGE + 1):
+                response = self.client.get(
+                    url_for("customer.get_customers"),
+                    query_string={"cursor": "", "per_page": per_page},
+                )
+                self.assert400(response)
+
     @pytest.mark.views
     def test_create_customer_account(self):
         with self.client:
@@ -143,6 +276,20 @@ class TestCustomerRoutes(BaseTestCase):
             self.assertIn("access_token", response_data)
             self.assertIn("refresh_token", response_data)
 
+    @pytest.mark.views
+    @mock.patch("app.services.keycloak_service.AuthService.update_user")
+    @mock.patch("app.services.keycloak_service.AuthService.get_token")
+    def test_login_query_budget(self, mock_get_token, mock_update_user):
+        mock_get_token.side_effect = self.auth_service.get_token
+        with self.client:
+            # reminder: the lockout checks read the login attempts of the phone number
+            with query_budget(6, max_repeats=4):
+                response = self.client.post(
+                    url_for("customer.login"),
+                    json=self.customer_test_data.customer_credential,
+                )
+            self.assert200(response)
+
     @pytest.mark.views
     @mock.patch("app.services.keycloak_service.AuthService.update_user")
     def test_update_by_id(self, mock_update_user):
@@ -199,6 +346,17 @@ class TestCustomerRoutes(BaseTestCase):
                 response_data.get("phone_number"),
             )
 
+    @pytest.mark.views
+    def test_find_customer_query_budget(self):
+        customer_id = self.customer_model.id
+        with self.client:
+            with query_budget(1):
+                response = self.client.get(
+                    url_for("customer.find_customer", customer_id=customer_id),
+                    headers=self.headers,
+                )
+            self.assert200(response)
+
     @pytest.mark.views
     def test_forgot_password(self):
         with self.client:
@@ -473,16 +631,59 @@ class TestCustomerRoutes(BaseTestCase):
             self.assertIn("refresh_token", response_data)
 
     @pytest.mark.views
-    @mock.patch("app.services.ceph_storage.CephObjectStorage.list")
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.list_page")
     def test_saved_images(self, mock_storage):
         with self.client:
-            mock_storage.side_effect = self.ceph_object_storage.list
+            mock_storage.side_effect = self.ceph_object_storage.list_page
             response = self.client.get(
                 url_for("customer.saved_images"),
             )
             response_data = response.json
             self.assertStatus(response, 200)
             self.assertIsInstance(response_data, list)
+            self.assertEqual(response.headers.get("X-Next-Cursor"), "next-page-token")
+
+            response = self.client.get(
+                url_for("customer.saved_images", cursor="next-page-token", per_page=50),
+            )
+            self.assertStatus(response, 200)
+            self.assertNotIn("X-Next-Cursor", response.headers)
+            self.assertEqual(
+                mock_storage.call_args[1],
+                {"page_token": "next-page-token", "page_size": 50},
+            )
+
+            response = self.client.get(url_for("customer.saved_images", per_page=5000))
+            self.assertStatus(response, 200)
+            self.assertEqual(mock_storage.call_args[1]["page_size"], 1000)
+
+            response = self.client.get(url_for("customer.saved_images", per_page=0))
+            self.assert400(response)
+
+    @pytest.mark.views
+    @mock.patch("app.services.ceph_storage.CephObjectStorage.stream")
+    def test_saved_image_content(self, mock_storage):
+        with self.client:
+            mock_storage.side_effect = self.ceph_object_storage.stream
+            self.customer_model.profile_image = None
+            response = self.client.get(
+                url_for(
+                    "customer.saved_image_content", customer_id=self.customer_model.id
+                ),
+            )
+            self.assert404(response)
+
+            self.customer_model.profile_image = "customer/obj_key"
+            response = self.client.get(
+                url_for(
+                    "customer.saved_image_content", customer_id=self.customer_model.id
+                ),
+            )
+            self.assertStatus(response, 200)
+            self.assertTrue(response.is_streamed)
+            self.assertEqual(response.mimetype, "image/jpeg")
+            self.assertEqual(response.content_length, 5)
+            self.assertEqual(response.data, b"image")
 
     @pytest.mark.views
     @mock.patch("app.services.ceph_storage.CephObjectStorage.view")
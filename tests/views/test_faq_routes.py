@@ -1,9 +1,13 @@
 from datetime import datetime, timedelta
+from unittest import mock
 
 import pytest
 from flask import url_for
 
+from app import db
+from app.repositories import FaqRepository
 from tests.base_test_case import BaseTestCase
+from tests.utils.query_budget import query_budget
 
 expiration_time = datetime.now() + timedelta(minutes=5)
 
@@ -17,6 +21,56 @@ class TestFaqRoutes(BaseTestCase):
             self.assertIsInstance(response.json, list)
             self.assertIsInstance(response.json[0], dict)
 
+    @pytest.mark.views
+    def test_get_faq_query_budget(self):
+        with self.client:
+            for _ in range(3):
+                self.client.post(
+                    url_for("faq.create_faq"),
+                    json=self.faq_test_data.create_faq,
+                )
+            with query_budget(1):
+                response = self.client.get(url_for("faq.get_faq"))
+            self.assert200(response)
+            self.assertEqual(len(response.json), 4)
+
+    @pytest.mark.views
+    def test_get_faq_not_modified(self):
+        with self.client:
+            response = self.client.get(url_for("faq.get_faq"))
+            etag = response.headers.get("ETag")
+            self.assertTrue(etag)
+            self.assertEqual(response.headers.get("Cache-Control"), "no-cache")
+
+            with mock.patch.object(FaqRepository, "index") as index:
+                response = self.client.get(
+                    url_for("faq.get_faq"), headers={"If-None-Match": etag}
+                )
+            index.assert_not_called()
+            self.assertStatus(response, 304)
+            self.assertEqual(response.headers.get("ETag"), etag)
+            self.assertFalse(response.data)
+
+            self.client.post(
+                url_for("faq.create_faq"), json=self.faq_test_data.create_faq
+            )
+            response = self.client.get(
+                url_for("faq.get_faq"), headers={"If-None-Match": etag}
+            )
+            self.assert200(response)
+            self.assertNotEqual(response.headers.get("ETag"), etag)
+            self.assertEqual(len(response.json), 2)
+
+    @pytest.mark.views
+    def test_request_commits_once(self):
+        with mock.patch.object(db.session, "commit", wraps=db.session.commit) as commit:
+            with self.client:
+                response = self.client.post(
+                    url_for("faq.create_faq"), json=self.faq_test_data.create_faq
+                )
+        self.assertStatus(response, 201)
+        commit.assert_called_once()
+
     @pytest.mark.views
     def test_create_faq(self):
         with self.client:
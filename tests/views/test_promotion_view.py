@@ -6,6 +6,7 @@ from flask import url_for
 
 from app.models import CustomerModel
 from tests.base_test_case import BaseTestCase
+from tests.utils.query_budget import query_budget
 
 expiration_time = datetime.now() + timedelta(minutes=5)
 
@@ -19,6 +20,19 @@ class TestPromotionRoutes(BaseTestCase):
             self.assertIsInstance(response.json, list)
             self.assertIsInstance(response.json[0], dict)
 
+    @pytest.mark.views
+    def test_get_promotion_query_budget(self):
+        with self.client:
+            for _ in range(3):
+                self.client.post(
+                    url_for("promotion.create_promotion"),
+                    json=self.promotion_test_data.create_promotion,
+                )
+            with query_budget(1):
+                response = self.client.get(url_for("promotion.get_promotion"))
+            self.assert200(response)
+            self.assertEqual(len(response.json), 4)
+
     @pytest.mark.views
     def test_create_promotion(self):
         with self.client:
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 import pytest
 from flask import url_for
 from tests.base_test_case import BaseTestCase
+from tests.utils.query_budget import query_budget
 
 expiration_time = datetime.now() + timedelta(minutes=5)
 
@@ -15,6 +16,19 @@ class TestSafetyRoutes(BaseTestCase):
             self.assertIsInstance(response.json, list)
             self.assertIsInstance(response.json[0], dict)
 
+    @pytest.mark.views
+    def test_get_safety_query_budget(self):
+        with self.client:
+            for _ in range(3):
+                self.client.post(
+                    url_for("safety.create_safety"),
+                    json=self.safety_test_data.create_safety,
+                )
+            with query_budget(1):
+                response = self.client.get(url_for("safety.get_safety"))
+            self.assert200(response)
+            self.assertEqual(len(response.json), 4)
+
     @pytest.mark.views
     def test_create_safety(self):
         with self.client:
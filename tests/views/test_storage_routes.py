@@ -0,0 +1,70 @@
+import io
+import tempfile
+from unittest import mock
+from urllib.parse import urlsplit
+
+import pytest
+from flask import url_for
+
+from app import create_app
+
+from app.services import LocalObjectStorage
+from config import Config
+from tests.base_test_case import BaseTestCase
+
+
+class TestStorageRoutes(BaseTestCase):
+    def create_app(self):
+        # reminder: the storage blueprint serves the objects of the local storage only
+        with mock.patch.object(Config, "OBJECT_STORAGE", "local"):
+            return super().create_app()
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        patch = mock.patch.object(Config, "LOCAL_STORAGE_ROOT", root.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.local_storage = LocalObjectStorage()
+
+    @pytest.mark.views
+    def test_upload_and_get_object(self):
+        with self.client:
+            pre_signed_post = self.local_storage.pre_signed_post("customer/obj_key.png")
+            response = self.client.post(
+                url_for("storage.upload_object"),
+                data={
+                    **pre_signed_post["fields"],
+                    "file": (io.BytesIO(b"image"), "obj_key.png"),
+                },
+            )
+            self.assertStatus(response, 204)
+
+            url = urlsplit(self.local_storage.pre_signed_get("customer/obj_key.png"))
+            response = self.client.get(f"{url.path}?{url.query}")
+            self.assert200(response)
+            self.assertEqual(response.data, b"image")
+            self.assertEqual(response.mimetype, "image/png")
+            response.close()
+
+            response = self.client.get(url.path)
+            self.assert401(response)
+            response = self.client.post(
+                url_for("storage.upload_object"),
+                data={
+                    **pre_signed_post["fields"],
+                    "key": "customer/other.png",
+                    "file": (io.BytesIO(b"image"), "obj_key.png"),
+                },
+            )
+            self.assert401(response)
+
+    @pytest.mark.views
+    def test_storage_blueprint_of_local_storage_only(self):
+        self.assertNotIn("storage", create_app("config.TestingConfig").blueprints)
+        with mock.patch.object(Config, "OBJECT_STORAGE", "local"), mock.patch.object(
+            Config, "LOCAL_STORAGE_SECRET", None
+        ):
+            with self.assertRaises(RuntimeError):
+                create_app("config.TestingConfig")